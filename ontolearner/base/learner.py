@@ -12,13 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+import hashlib
+import os
+import warnings
 from abc import ABC
-from typing import Any, List, Optional, Dict
+from typing import Any, Iterable, Iterator, List, Optional, Dict, Tuple
 from transformers import AutoModelForCausalLM, AutoTokenizer
+import numpy as np
 import torch
 import torch.nn.functional as F
-from sentence_transformers import SentenceTransformer
-from collections import defaultdict
+from sklearn.linear_model import LogisticRegression
+from collections import OrderedDict, defaultdict
+
+from ..utils.checkpoint import PredictionCheckpoint
+from ..utils.completion_cache import cached_generate
+from ..utils.cpu_inference import CPUInferenceProfile
+from ..utils.disk_index import DiskIndexWriter, load_disk_index
+from ..utils.model_pool import get_model_pool, load_causal_lm, load_sentence_transformer, pool_key, release_model
+from ..utils.prompt_compiler import PromptCompiler
+from ..utils.quantization import PRECISIONS, QuantizedEmbeddings, quantized_search
 
 class AutoLearner(ABC):
     """
@@ -29,6 +42,9 @@ class AutoLearner(ABC):
     implementations must inherit from this class and implement the required methods.
     """
 
+    #: Tasks whose predictions :meth:`predict_stream` yields batch by batch (see :meth:`_predict_stream`).
+    streaming_tasks: Tuple[str, ...] = ()
+
     def __init__(self, **kwargs: Any):
         """
         Initialize the learner with optional configuration parameters.
@@ -112,8 +128,64 @@ class AutoLearner(ABC):
         Raises:
             NotImplementedError: If not implemented by concrete class.
         """
-        eval_data = self.tasks_data_former(data=eval_data, task=task, test=True) if ontologizer else eval_data
+        eval_data = self._format_eval_data(eval_data, task, ontologizer)
+        if task in self.streaming_tasks:
+            return list(self._predict_stream(eval_data, task))
+        return self._predict_task(eval_data, task)
+
+    def predict_stream(self, eval_data: Any, task: str, ontologizer: bool = True,
+                       checkpoint_path: Optional[str] = None, chunk_size: int = 1000) -> Iterator[Any]:
+        """
+        Make predictions incrementally, yielding prediction records as batches complete.
+
+        For the learner's :attr:`streaming_tasks`, the inputs are processed in chunks of
+        ``chunk_size`` and the records of every chunk are yielded as soon as it is done.
+        With ``checkpoint_path``, intermediate results are appended to a JSONL file keyed
+        by a hash of their input (see :class:`PredictionCheckpoint`); re-running the same
+        prediction with the same file skips everything already computed, so a crashed run
+        resumes where it stopped. Other tasks yield their records once all predictions are done.
+
+        Args:
+            eval_data: Evaluation data, as for :meth:`predict`.
+            task: The ontology learning task to perform predictions for.
+            ontologizer: Format ``eval_data`` with :meth:`tasks_data_former` first.
+            checkpoint_path: Append-only JSONL checkpoint file; created or resumed.
+            chunk_size: Number of inputs (terms, type pairs, ...) per chunk.
+
+        Yields:
+            The prediction records that :meth:`predict` returns as a list.
+        """
+        eval_data = self._format_eval_data(eval_data, task, ontologizer)
+        if task not in self.streaming_tasks:
+            if checkpoint_path is not None:
+                warnings.warn(f"{type(self).__name__} does not stream '{task}' predictions; "
+                              f"the checkpoint is not used.")
+            predictions = self._predict_task(eval_data, task)
+            yield from predictions if isinstance(predictions, list) else [predictions]
+            return
+        checkpoint = PredictionCheckpoint(checkpoint_path) if checkpoint_path is not None else None
+        try:
+            yield from self._predict_stream(eval_data, task, checkpoint=checkpoint, chunk_size=chunk_size)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+    def _format_eval_data(self, eval_data: Any, task: str, ontologizer: bool) -> Any:
+        """Evaluation data in the form the task's prediction method expects."""
+        return self.tasks_data_former(data=eval_data, task=task, test=True) if ontologizer else eval_data
+
+    def _predict_stream(self, eval_data: Any, task: str, checkpoint: Optional[PredictionCheckpoint] = None,
+                        chunk_size: Optional[int] = None) -> Iterator[Any]:
+        """
+        Yield the prediction records of a streaming task (formatted ``eval_data``).
+
+        Implemented by learners that list the task in :attr:`streaming_tasks`. Without a
+        ``chunk_size`` all inputs form one chunk, which is what :meth:`predict` uses.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not stream '{task}' predictions.")
 
+    def _predict_task(self, eval_data: Any, task: str) -> Any:
+        """Dispatch formatted ``eval_data`` to the task's prediction method."""
         if task == 'term-typing':
             return self._term_typing(eval_data, test=True)
         elif task == 'taxonomy-discovery':
@@ -232,12 +304,35 @@ class AutoLLM(ABC):
         tokenizer: The tokenizer associated with the model.
     """
 
-    def __init__(self, label_mapper: Any, device: str='cpu', token: str="", max_length: int = 512) -> None:
+    #: Label words scored by :meth:`score` when neither ``label_tokens`` nor the label mapper define them.
+    default_label_tokens = {"yes": ["yes", "true"], "no": ["no", "false"]}
+
+    def __init__(self, label_mapper: Any, device: str='cpu', token: str="", max_length: int = 512,
+                 label_tokens: Optional[Dict[str, List[str]]] = None, prefix_caching: bool = False,
+                 prompt_prefix: Optional[str] = None, min_prefix_tokens: int = 16, max_cached_prefixes: int = 8,
+                 cpu_profile: Optional[CPUInferenceProfile] = None,
+                 prompt_templates: Optional[List[str]] = None) -> None:
         """
         Initialize the LLM component.
 
         Sets up the basic structure with model and tokenizer attributes
         that will be populated when load() is called.
+
+        Args:
+            label_tokens: Label -> words whose next-token probabilities are summed by
+                :meth:`label_probabilities`. Defaults to the label mapper's ``label_dict``.
+            prefix_caching: Encode the static prefix shared by the prompts of a batch once,
+                keep its KV cache and only run the variable suffixes through the model.
+            prompt_prefix: Known static prefix (e.g. from :meth:`AutoPrompt.static_prefix`). Without
+                it, the prefix is detected as the common prefix of a batch, cut after its last newline.
+            min_prefix_tokens: Shorter prefixes are not worth caching and are processed as usual.
+            max_cached_prefixes: Number of prefix KV caches kept per model.
+            cpu_profile: CPU inference settings (dtype, int8 quantization, compilation, threads,
+                warm-up) applied by :meth:`load` when ``device="cpu"``. Without it the model is
+                loaded in ``bfloat16``.
+            prompt_templates: Templates of the prompts (e.g. ``AutoPrompt.prompt_template``). Prompts
+                formatted from them are tokenized from pre-tokenized static segments and memoized
+                slot values (see :class:`PromptCompiler`) instead of as whole strings.
         """
         self.token = token
         self.label_mapper = label_mapper
@@ -245,6 +340,17 @@ class AutoLLM(ABC):
         self.model: Optional[Any] = None
         self.tokenizer: Optional[Any] = None
         self.max_length = max_length
+        self.label_tokens = label_tokens
+        self.calibration: Optional[Tuple[float, float]] = None
+        self._label_token_cache: Optional[Dict[str, List[int]]] = None
+        self.prefix_caching = prefix_caching
+        self.prompt_prefix = prompt_prefix
+        self.min_prefix_tokens = min_prefix_tokens
+        self.max_cached_prefixes = max_cached_prefixes
+        self._prefix_kv: "OrderedDict[Tuple[int, str], Optional[Tuple[torch.Tensor, Any]]]" = OrderedDict()
+        self.cpu_profile = cpu_profile
+        self.prompt_templates = list(prompt_templates or [])
+        self._prompt_compiler: Optional[PromptCompiler] = None
 
 
     def load(self, model_id: str) -> None:
@@ -264,24 +370,49 @@ class AutoLLM(ABC):
 
         Raises:
             NotImplementedError: If not implemented by concrete class.
+
+        Note:
+            The model comes from the process-wide :class:`~ontolearner.utils.model_pool.ModelPool`,
+            so LLM components loading the same model with the same settings share its weights.
         """
         self.tokenizer = AutoTokenizer.from_pretrained(model_id, padding_side='left', token=self.token)
         self.tokenizer.pad_token = self.tokenizer.eos_token
         if self.device == "cpu":
-            self.model = AutoModelForCausalLM.from_pretrained(
-                model_id,
-                torch_dtype=torch.bfloat16,
-                token=self.token
-            )
+            self._load_model(model_id, warmup_tokenizer=self.tokenizer,
+                             torch_dtype=self.cpu_profile.torch_dtype if self.cpu_profile else torch.bfloat16,
+                             token=self.token)
         else:
             device_map = "balanced"
-            self.model = AutoModelForCausalLM.from_pretrained(
-                model_id,
-                device_map=device_map,
-                token=self.token,
-                trust_remote_code=True,
-            )
-        self.label_mapper.fit()
+            self._load_model(model_id, device_map=device_map, token=self.token, trust_remote_code=True)
+        if self.label_mapper is not None:
+            self.label_mapper.fit()
+
+    def _load_model(self, model_id: str, model_class: Any = AutoModelForCausalLM, warmup_tokenizer: Any = None,
+                    **kwargs: Any) -> None:
+        """
+        Set ``self.model`` to ``model_class.from_pretrained(model_id, **kwargs)`` from the model pool.
+
+        On CPU, the ``cpu_profile`` is applied once to the pooled model (warming it up with
+        ``warmup_tokenizer``, if given), so profiled models are pooled per profile. The
+        previous model is released after the new one is acquired, so reloading the same
+        model keeps it.
+        """
+        profile = self.cpu_profile if self.device == "cpu" else None
+        if profile is None:
+            model = load_causal_lm(model_id, owner=self, model_class=model_class, **kwargs)
+        else:
+            key = pool_key(model_class.__name__, model_id, cpu_profile=profile, **kwargs)
+            model = get_model_pool().acquire(
+                key, lambda: profile.apply(model_class.from_pretrained(model_id, **kwargs), warmup_tokenizer),
+                owner=self)
+        self.unload()
+        self.model = model
+
+    def unload(self) -> None:
+        """Release the model to the model pool, which frees it once no other component uses it."""
+        release_model(self.model, owner=self)
+        self.model = None
+        self._prefix_kv.clear()
 
     @torch.no_grad()
     def generate(self, inputs: List[str], max_new_tokens: int = 50) -> List[str]:
@@ -306,12 +437,25 @@ class AutoLLM(ABC):
         Returns:
             List of generated text responses, one for each input prompt.
             Responses include the original input plus generated continuation.
+
+        Completions are looked up in the active completion cache first (see
+        :func:`~ontolearner.utils.completion_cache.enable_completion_cache`).
         """
-        encoded_inputs = self.tokenizer(inputs,
-                                        return_tensors="pt",
-                                        max_length=self.max_length,
-                                        truncation=True,
-                                        padding=True).to(self.model.device)
+        decoded_outputs = cached_generate(self.model, inputs,
+                                          lambda prompts: self._generate_completions(prompts, max_new_tokens),
+                                          {"backend": type(self).__name__, "max_new_tokens": max_new_tokens,
+                                           "max_length": self.max_length})
+        return self.label_mapper.predict(decoded_outputs)
+
+    @torch.no_grad()
+    def _generate_completions(self, inputs: List[str], max_new_tokens: int) -> List[str]:
+        """Greedy completions of ``inputs``, decoded without the prompt."""
+        prefix_inputs = self._encode_with_prefix(inputs)
+        if prefix_inputs is not None:
+            encoded_inputs, cache = prefix_inputs
+            encoded_inputs["past_key_values"] = cache
+        else:
+            encoded_inputs = self._encode_prompts(inputs)
         input_ids = encoded_inputs["input_ids"]
         input_length = input_ids.shape[1]
         outputs = self.model.generate(
@@ -321,8 +465,264 @@ class AutoLLM(ABC):
             eos_token_id=self.tokenizer.eos_token_id
         )
         generated_tokens = outputs[:, input_length:]
-        decoded_outputs = [self.tokenizer.decode(g, skip_special_tokens=True).strip() for g in generated_tokens]
-        return self.label_mapper.predict(decoded_outputs)
+        return [self.tokenizer.decode(g, skip_special_tokens=True).strip() for g in generated_tokens]
+
+    def prompt_lengths(self, inputs: List[str]) -> List[int]:
+        """Token length of each prompt (capped at ``max_length``), used to group prompts into batches."""
+        lengths = [len(ids) for ids in self._prompt_tokenizer()(inputs, add_special_tokens=True)["input_ids"]]
+        return [min(length, self.max_length) for length in lengths]
+
+    def _shared_prefix(self, inputs: List[str]) -> Optional[str]:
+        """Static prefix of all prompts: the configured one, a cached one, or the detected common prefix."""
+        if not inputs:
+            return None
+        known = [self.prompt_prefix] if self.prompt_prefix else []
+        known += sorted((prefix for (model_id, prefix), entry in self._prefix_kv.items()
+                         if model_id == id(self.model) and entry is not None), key=len, reverse=True)
+        for prefix in known:
+            if all(text.startswith(prefix) for text in inputs):
+                return prefix
+        if len(inputs) < 2:
+            return None
+        common = os.path.commonprefix(inputs)
+        # cut at a line break, where tokenizing prefix and suffix separately matches the full prompt best
+        cut = common.rfind("\n") + 1
+        return common[:cut] or None
+
+    def _prefix_cache(self, prefix: str) -> Optional[Tuple[torch.Tensor, Any]]:
+        """Token ids and KV cache of ``prefix``, computed once per model; ``None`` if the prefix is too short."""
+        key = (id(self.model), prefix)
+        if key in self._prefix_kv:
+            self._prefix_kv.move_to_end(key)
+            return self._prefix_kv[key]
+        prefix_ids = self.tokenizer(prefix, return_tensors="pt")["input_ids"].to(self.model.device)
+        entry = None
+        if prefix_ids.shape[1] >= self.min_prefix_tokens:
+            with torch.no_grad():
+                entry = (prefix_ids, self.model(input_ids=prefix_ids, use_cache=True).past_key_values)
+        self._prefix_kv[key] = entry
+        while len(self._prefix_kv) > self.max_cached_prefixes:
+            self._prefix_kv.popitem(last=False)
+        return entry
+
+    def _encode_with_prefix(self, inputs: List[str]) -> Optional[Tuple[Dict[str, torch.Tensor], Any]]:
+        """
+        Encode prompts as cached prefix + suffixes.
+
+        Returns:
+            ``None`` if prefix caching does not apply, otherwise the full ``input_ids`` /
+            ``attention_mask`` (prefix followed by the padded suffixes) and a copy of the prefix
+            KV cache expanded to the batch size.
+        """
+        if not self.prefix_caching:
+            return None
+        prefix = self._shared_prefix(inputs)
+        entry = self._prefix_cache(prefix) if prefix else None
+        if entry is None:
+            return None
+        prefix_ids, prefix_kv = entry
+        suffixes = self.tokenizer([text[len(prefix):] for text in inputs],
+                                  return_tensors="pt",
+                                  add_special_tokens=False,
+                                  max_length=max(self.max_length - prefix_ids.shape[1], 1),
+                                  truncation=True,
+                                  padding=True).to(self.model.device)
+        batch_size = suffixes["input_ids"].shape[0]
+        cache = copy.deepcopy(prefix_kv)
+        cache.batch_repeat_interleave(batch_size)
+        encoded = {
+            "input_ids": torch.cat([prefix_ids.expand(batch_size, -1), suffixes["input_ids"]], dim=1),
+            "attention_mask": torch.cat([torch.ones_like(prefix_ids).expand(batch_size, -1),
+                                         suffixes["attention_mask"]], dim=1),
+        }
+        return encoded, cache
+
+    def _prompt_tokenizer(self) -> Any:
+        """The tokenizer, behind a :class:`PromptCompiler` of ``prompt_templates`` if there are any."""
+        if not self.prompt_templates:
+            return self.tokenizer
+        compiler = self._prompt_compiler
+        if compiler is None or compiler.tokenizer is not self.tokenizer or compiler.templates != self.prompt_templates:
+            self._prompt_compiler = PromptCompiler(self.tokenizer, self.prompt_templates)
+        return self._prompt_compiler
+
+    def _encode_prompts(self, inputs: List[str]) -> Dict[str, torch.Tensor]:
+        """Tokenize prompts for a single forward pass."""
+        return self._prompt_tokenizer()(inputs,
+                                        return_tensors="pt",
+                                        max_length=self.max_length,
+                                        truncation=True,
+                                        padding=True).to(self.model.device)
+
+    def _encode_label_word(self, word: str) -> List[int]:
+        """Token ids of a label word as it would follow the prompt."""
+        return self.tokenizer.encode(word, add_special_tokens=False)
+
+    def scoring_token_ids(self) -> Dict[str, List[int]]:
+        """
+        First-token ids of every label word, including its capitalized and space-prefixed forms.
+
+        Token ids shared by several labels are dropped, so that each id votes for one label only.
+
+        Returns:
+            Label -> list of unique token ids.
+        """
+        if self._label_token_cache is None:
+            label_words = self.label_tokens or getattr(self, "label_dict", None) \
+                or getattr(self.label_mapper, "label_dict", None) or self.default_label_tokens
+            token_ids = {}
+            for label, words in label_words.items():
+                ids = []
+                for word in [label] + list(words):
+                    for variant in (word, word.capitalize(), " " + word, " " + word.capitalize()):
+                        encoded = self._encode_label_word(variant)
+                        if encoded and encoded[0] not in ids:
+                            ids.append(encoded[0])
+                token_ids[label] = ids
+            shared = {i for label, ids in token_ids.items() for other, other_ids in token_ids.items()
+                      if other != label for i in ids if i in other_ids}
+            self._label_token_cache = {label: [i for i in ids if i not in shared] for label, ids in token_ids.items()}
+        return self._label_token_cache
+
+    @torch.no_grad()
+    def label_probabilities(self, inputs: List[str]) -> Tuple[List[str], torch.Tensor]:
+        """
+        Next-token label distribution for each prompt from a single forward pass.
+
+        The probability mass of each label is the sum over its token ids, and the
+        result is renormalized over the labels. No tokens are generated.
+
+        Args:
+            inputs: Prompts, e.g. ending with ``Answer (yes or no):``.
+
+        Returns:
+            The label names and a ``[num_inputs, num_labels]`` probability matrix.
+        """
+        prefix_inputs = self._encode_with_prefix(inputs)
+        if prefix_inputs is not None:
+            encoded, cache = prefix_inputs
+            prefix_length = cache.get_seq_length()
+            attention_mask = encoded["attention_mask"]
+            position_ids = (attention_mask.cumsum(dim=1) - 1).clamp(min=0)[:, prefix_length:]
+            attention_mask = attention_mask[:, prefix_length:]
+            logits = self.model(input_ids=encoded["input_ids"][:, prefix_length:], attention_mask=encoded["attention_mask"],
+                                position_ids=position_ids, past_key_values=cache).logits
+        else:
+            encoded = self._encode_prompts(inputs)
+            attention_mask = encoded["attention_mask"]
+            logits = self.model(**encoded).logits
+        # last attended position, independent of the padding side
+        last = attention_mask.cumsum(dim=1).argmax(dim=1)
+        log_probs = F.log_softmax(logits[torch.arange(logits.shape[0], device=logits.device), last].float(), dim=-1)
+        label_ids = self.scoring_token_ids()
+        labels = list(label_ids)
+        label_log_probs = torch.stack([torch.logsumexp(log_probs[:, label_ids[label]], dim=-1) for label in labels],
+                                      dim=-1)
+        return labels, F.softmax(label_log_probs, dim=-1).cpu()
+
+    def _encode_continuation(self, text: str) -> List[int]:
+        """Token ids of ``text`` as it would follow a prompt ending with a colon."""
+        anchor = self._encode_label_word(":")
+        ids = self._encode_label_word(": " + text)
+        if anchor and ids[:len(anchor)] == anchor:
+            return ids[len(anchor):]
+        return self._encode_label_word(" " + text)
+
+    @torch.no_grad()
+    def continuation_log_likelihoods(self, inputs: List[str], continuations: List[List[str]],
+                                     normalize: bool = True) -> List[List[float]]:
+        """
+        Log-likelihood of candidate continuations (e.g. relation labels) of each prompt.
+
+        Every prompt is encoded once; its KV cache is then shared by all of its
+        continuations, which are scored together in a second forward pass (skipped if
+        all continuations are single tokens). No tokens are generated.
+
+        Args:
+            inputs: Prompts, e.g. ending with ``Relation:``.
+            continuations: Candidate continuations of each prompt.
+            normalize: Divide each log-likelihood by the number of continuation tokens,
+                so that long labels are not penalized.
+
+        Returns:
+            One list of log-likelihoods per prompt, aligned with its continuations.
+        """
+        rows = [(index, text) for index, texts in enumerate(continuations) for text in texts]
+        if not rows:
+            return [[] for _ in inputs]
+        encoded = self._encode_prompts(inputs)
+        attention_mask = encoded["attention_mask"]
+        position_ids = (attention_mask.cumsum(dim=1) - 1).clamp(min=0)
+        outputs = self.model(**encoded, position_ids=position_ids, use_cache=True)
+        device = outputs.logits.device
+        last = attention_mask.cumsum(dim=1).argmax(dim=1)
+        next_log_probs = F.log_softmax(outputs.logits[torch.arange(len(inputs), device=device), last].float(), dim=-1)
+
+        token_lists = [self._encode_continuation(text) or [self.tokenizer.eos_token_id] for _, text in rows]
+        width = max(len(ids) for ids in token_lists)
+        pad_id = self.tokenizer.pad_token_id if self.tokenizer.pad_token_id is not None else 0
+        continuation_ids = torch.tensor([ids + [pad_id] * (width - len(ids)) for ids in token_lists], device=device)
+        continuation_mask = torch.tensor([[1] * len(ids) + [0] * (width - len(ids)) for ids in token_lists],
+                                         device=device)
+        index = torch.tensor([row for row, _ in rows], device=device)
+        token_log_probs = next_log_probs[index].gather(1, continuation_ids[:, :1])
+        if width > 1:
+            cache = outputs.past_key_values
+            cache.batch_select_indices(index)
+            prompt_mask = attention_mask[index].to(device)
+            position_ids = prompt_mask.sum(dim=1, keepdim=True) + torch.arange(width, device=device)
+            logits = self.model(input_ids=continuation_ids,
+                                attention_mask=torch.cat([prompt_mask, continuation_mask], dim=1),
+                                position_ids=position_ids,
+                                past_key_values=cache).logits
+            rest = F.log_softmax(logits[:, :-1].float(), dim=-1).gather(2, continuation_ids[:, 1:, None]).squeeze(-1)
+            token_log_probs = torch.cat([token_log_probs, rest], dim=1)
+        totals = (token_log_probs * continuation_mask).sum(dim=1)
+        if normalize:
+            totals = totals / continuation_mask.sum(dim=1)
+        results: List[List[float]] = [[] for _ in inputs]
+        for (row, _), total in zip(rows, totals.tolist()):
+            results[row].append(total)
+        return results
+
+    def score(self, inputs: List[str], positive_label: str = "yes") -> List[float]:
+        """
+        Probability that the answer to each prompt is ``positive_label``.
+
+        If :meth:`calibrate` was called, the raw probabilities are mapped through the
+        fitted Platt scaling.
+
+        Args:
+            inputs: Prompts to score.
+            positive_label: Label whose probability is returned.
+
+        Returns:
+            One probability per prompt.
+        """
+        labels, probs = self.label_probabilities(inputs)
+        positive = probs[:, labels.index(positive_label)].clamp(1e-6, 1 - 1e-6)
+        if self.calibration is not None:
+            slope, intercept = self.calibration
+            positive = torch.sigmoid(slope * torch.logit(positive) + intercept)
+        return positive.tolist()
+
+    def calibrate(self, inputs: List[str], targets: List[bool], positive_label: str = "yes") -> Tuple[float, float]:
+        """
+        Fit Platt scaling of :meth:`score` on labelled prompts.
+
+        Args:
+            inputs: Prompts with a known answer.
+            targets: Whether the answer to each prompt is ``positive_label``. Both classes must occur.
+            positive_label: Label whose probability is calibrated.
+
+        Returns:
+            The fitted ``(slope, intercept)`` on the log-odds of the raw probability.
+        """
+        self.calibration = None
+        raw = torch.logit(torch.tensor(self.score(inputs, positive_label=positive_label)))
+        model = LogisticRegression().fit(raw.numpy().reshape(-1, 1), np.asarray(targets, dtype=int))
+        self.calibration = (float(model.coef_[0, 0]), float(model.intercept_[0]))
+        return self.calibration
 
 class AutoRetriever(ABC):
     """
@@ -333,16 +733,44 @@ class AutoRetriever(ABC):
     data to provide context for language models or to make direct predictions.
     """
 
-    def __init__(self) -> None:
+    #: Attributes that together make up an index, see :meth:`get_index_state`.
+    index_attributes = ("documents", "embeddings")
+    #: Attribute holding the document embedding matrix.
+    embeddings_attribute = "embeddings"
+    #: Whether documents can be encoded independently of each other. If False,
+    #: :meth:`add` / :meth:`remove` fall back to re-indexing the whole document set.
+    supports_incremental = True
+
+    def __init__(self, precision: str = "float32", rescore_multiplier: int = 4, quantize_chunk_size: int = 65536,
+                 query_cache_size: int = 10000) -> None:
         """
         Initialize the retriever component.
 
         Sets up the basic structure with a model attribute that will be
         populated when load() is called.
+
+        Args:
+            precision: Storage precision of document embeddings: "float32", "float16" or "int8"
+                (per-vector scale). Reduced precisions use quantized scoring followed by
+                float32 re-scoring of the top candidates.
+            rescore_multiplier: Number of quantized candidates re-scored per requested result.
+            quantize_chunk_size: Number of documents encoded and quantized at once, so the
+                full float32 matrix is never materialized.
+            query_cache_size: Maximum number of (query, parameters) results kept across
+                :meth:`retrieve` calls. Use 0 to only deduplicate queries within a call.
         """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision '{precision}'. Choose from {list(PRECISIONS)}.")
         self.embedding_model = None
         self.documents = []
         self.embeddings = None
+        self.precision = precision
+        self.rescore_multiplier = rescore_multiplier
+        self.quantize_chunk_size = quantize_chunk_size
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[Any, List[str]]" = OrderedDict()
+        self._query_cache_index = None
+        self.query_cache_stats = {"hits": 0, "misses": 0, "duplicates": 0}
 
     def load(self, model_id: str) -> None:
         """
@@ -359,8 +787,24 @@ class AutoRetriever(ABC):
 
         Raises:
             NotImplementedError: If not implemented by concrete class.
+
+        Note:
+            The model comes from the process-wide :class:`~ontolearner.utils.model_pool.ModelPool`,
+            so retrievers loading the same model share its weights.
         """
-        self.embedding_model = SentenceTransformer(model_id, trust_remote_code=True)
+        embedding_model = load_sentence_transformer(model_id, owner=self, trust_remote_code=True)
+        self.unload()
+        self.embedding_model = embedding_model
+
+    def unload(self) -> None:
+        """
+        Release the embedding model to the model pool, which frees it once no other component uses it.
+
+        Cached query results are dropped, since a model loaded next would rank differently.
+        """
+        release_model(self.embedding_model, owner=self)
+        self.embedding_model = None
+        self._query_cache.clear()
 
     def index(self, inputs: List[str]):
         """
@@ -377,49 +821,445 @@ class AutoRetriever(ABC):
             NotImplementedError: If not implemented by concrete class.
         """
         self.documents = inputs
-        self.embeddings = self.embedding_model.encode(inputs, convert_to_tensor=True)
+        self.embeddings = self._index_embeddings(inputs)
+
+    def _index_embeddings(self, inputs: List[str]) -> Any:
+        """
+        Encode documents and store them in the configured precision.
+
+        Reduced precisions are encoded, normalized and quantized chunk by chunk.
+        """
+        if self.precision == "float32":
+            return self._encode_documents(inputs)
+        chunks = [self._quantize_chunk(inputs[start:start + self.quantize_chunk_size])
+                  for start in range(0, len(inputs), self.quantize_chunk_size)]
+        return chunks[0].cat(*chunks[1:]) if chunks else None
+
+    def _encode_documents(self, inputs: List[str]) -> Any:
+        """
+        Encode documents into the embedding matrix stored under :attr:`embeddings_attribute`.
+
+        Args:
+            inputs: Documents to encode.
+
+        Returns:
+            Embedding matrix with one row per document.
+        """
+        return self.embedding_model.encode(inputs, convert_to_tensor=True)
+
+    def index_stream(self, inputs: Iterable[str], path: str, chunk_size: int = 10000) -> None:
+        """
+        Build an on-disk index from a (possibly unbounded) iterable of documents.
+
+        Documents are consumed ``chunk_size`` at a time; each chunk is encoded,
+        normalized, stored in the configured precision and appended to files under
+        ``path``, so neither the documents nor the embeddings are ever fully held in
+        memory. The finished index is then opened memory-mapped with :meth:`load_index`.
+
+        Args:
+            inputs: Iterable of documents, e.g. a generator reading a large file.
+            path: Directory of the on-disk index. Existing index files are overwritten.
+            chunk_size: Number of documents encoded at once.
+
+        Raises:
+            NotImplementedError: If documents cannot be encoded independently (see :attr:`supports_incremental`).
+        """
+        if not self.supports_incremental:
+            raise NotImplementedError(f"{type(self).__name__} must see all documents at once and cannot index a stream.")
+        with DiskIndexWriter(path, precision=self.precision) as writer:
+            chunk = []
+            for document in inputs:
+                chunk.append(document)
+                if len(chunk) == chunk_size:
+                    writer.append(chunk, self._quantize_chunk(chunk))
+                    chunk = []
+            if chunk:
+                writer.append(chunk, self._quantize_chunk(chunk))
+        self.load_index(path)
+
+    def _quantize_chunk(self, inputs: List[str], precision: Optional[str] = None) -> QuantizedEmbeddings:
+        embeddings = torch.as_tensor(self._encode_documents(inputs)).float()
+        return QuantizedEmbeddings.quantize(F.normalize(embeddings, p=2, dim=1), precision or self.precision)
+
+    def load_index(self, path: str) -> None:
+        """
+        Open an index written by :meth:`index_stream`.
+
+        Documents and embeddings stay memory-mapped and retrieval scores them chunk
+        by chunk. Incremental updates (:meth:`add`, :meth:`remove`, ...) still work,
+        but load the resulting index into memory.
+
+        Args:
+            path: Directory of the on-disk index.
+        """
+        documents, embeddings = load_disk_index(path)
+        self.documents = documents
+        setattr(self, self.embeddings_attribute, embeddings)
+
+    @staticmethod
+    def doc_id(document: str) -> str:
+        """
+        Content hash used to identify and deduplicate indexed documents.
+
+        Args:
+            document: Document text.
+
+        Returns:
+            Hex digest identifying the document.
+        """
+        return hashlib.sha1(document.encode("utf-8")).hexdigest()
+
+    def get_index_state(self) -> Dict[str, Any]:
+        """Return the attributes making up the current index."""
+        return {attribute: getattr(self, attribute, None) for attribute in self.index_attributes}
+
+    def set_index_state(self, state: Dict[str, Any]) -> None:
+        """Restore an index previously returned by :meth:`get_index_state`."""
+        for attribute, value in state.items():
+            setattr(self, attribute, value)
+
+    def reset_index(self) -> None:
+        """Drop all indexed documents and their embeddings."""
+        self.documents = []
+        setattr(self, self.embeddings_attribute, None)
+
+    def _document_rows(self) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Ids of the indexed documents and the row of every id, kept across incremental updates.
+
+        The mapping is rebuilt (hashing every document) only when :attr:`documents` was
+        replaced by something other than :meth:`add`, :meth:`remove` or :meth:`upsert`,
+        e.g. by :meth:`index`.
+        """
+        state = getattr(self, "_doc_rows_state", None)
+        if state is None or state[0] is not self.documents or len(state[1]) != len(self.documents):
+            ids = [self.doc_id(doc) for doc in self.documents]
+            state = (self.documents, ids, {key: row for row, key in enumerate(ids)})
+            self._doc_rows_state = state
+        return state[1], state[2]
+
+    def _set_documents(self, documents: List[str], ids: List[str], rows: Optional[Dict[str, int]] = None) -> None:
+        """Replace :attr:`documents`, keeping the id mapping of :meth:`_document_rows` in sync."""
+        self.documents = documents
+        self._doc_rows_state = (documents, ids, rows if rows is not None
+                                else {key: row for row, key in enumerate(ids)})
+
+    def _select_rows(self, positions: List[int]) -> None:
+        embeddings = getattr(self, self.embeddings_attribute, None)
+        if embeddings is not None:
+            if isinstance(embeddings, (torch.Tensor, QuantizedEmbeddings)):
+                embeddings = embeddings[torch.tensor(positions, dtype=torch.long, device=embeddings.device)]
+            else:
+                embeddings = embeddings[positions]
+            setattr(self, self.embeddings_attribute, embeddings)
+        ids, _ = self._document_rows()
+        self._set_documents([self.documents[i] for i in positions], [ids[i] for i in positions])
+
+    def add(self, inputs: List[str]) -> List[str]:
+        """
+        Add documents to the index, encoding only documents that are not indexed yet.
+
+        Documents are deduplicated by content hash, both against the index and
+        within ``inputs``. Only ``inputs`` are hashed: the ids of indexed documents
+        are kept from earlier calls.
+
+        Args:
+            inputs: Documents to add.
+
+        Returns:
+            Ids (see :meth:`doc_id`) of the newly added documents.
+        """
+        ids, rows = self._document_rows()
+        new_docs, new_ids, seen = [], [], set()
+        for doc in inputs:
+            key = self.doc_id(doc)
+            if key not in rows and key not in seen:
+                seen.add(key)
+                new_docs.append(doc)
+                new_ids.append(key)
+        if not new_docs:
+            return []
+        embeddings = getattr(self, self.embeddings_attribute, None)
+        if embeddings is None or not self.supports_incremental:
+            self.index(list(self.documents) + new_docs)
+        else:
+            if isinstance(embeddings, QuantizedEmbeddings):
+                embeddings = embeddings.cat(self._quantize_chunk(new_docs, embeddings.precision))
+            elif isinstance(embeddings, torch.Tensor):
+                new_embeddings = self._index_embeddings(new_docs).to(embeddings.device)
+                embeddings = torch.cat([embeddings, new_embeddings], dim=0)
+            else:
+                embeddings = np.concatenate([embeddings, self._index_embeddings(new_docs)], axis=0)
+            setattr(self, self.embeddings_attribute, embeddings)
+            rows = dict(rows)
+            rows.update((key, len(ids) + offset) for offset, key in enumerate(new_ids))
+            self._set_documents(list(self.documents) + new_docs, ids + new_ids, rows)
+        return new_ids
+
+    def remove(self, doc_ids: List[str]) -> None:
+        """
+        Remove documents from the index without re-encoding the remaining ones.
+
+        Args:
+            doc_ids: Ids (see :meth:`doc_id`) of the documents to remove.
+        """
+        ids, rows = self._document_rows()
+        drop = set(doc_ids)
+        if not any(key in rows for key in drop):
+            return
+        positions = [row for row, key in enumerate(ids) if key not in drop]
+        if not positions:
+            self.reset_index()
+        elif not self.supports_incremental:
+            self.index([self.documents[i] for i in positions])
+        else:
+            self._select_rows(positions)
+
+    def upsert(self, inputs: List[str]) -> List[str]:
+        """
+        Re-encode documents that are already indexed and add the missing ones.
+
+        Useful when the embedding model changed but most documents did not.
+
+        Args:
+            inputs: Documents to update or insert.
+
+        Returns:
+            Ids (see :meth:`doc_id`) of all given documents.
+        """
+        _, positions = self._document_rows()
+        existing, input_ids = {}, []
+        for doc in inputs:
+            key = self.doc_id(doc)
+            input_ids.append(key)
+            if key in positions:
+                existing[positions[key]] = doc
+        embeddings = getattr(self, self.embeddings_attribute, None)
+        if existing and embeddings is not None:
+            if not self.supports_incremental:
+                self.index(list(self.documents))
+            else:
+                rows = list(existing.keys())
+                if isinstance(embeddings, QuantizedEmbeddings):
+                    embeddings = embeddings.set_rows(rows, self._quantize_chunk(list(existing.values()),
+                                                                                embeddings.precision))
+                elif isinstance(embeddings, torch.Tensor):
+                    updated = self._index_embeddings(list(existing.values()))
+                    embeddings = embeddings.clone()
+                    embeddings[torch.tensor(rows, dtype=torch.long, device=embeddings.device)] = \
+                        updated.to(embeddings.device, embeddings.dtype)
+                else:
+                    embeddings = embeddings.copy()
+                    embeddings[rows] = self._index_embeddings(list(existing.values()))
+                setattr(self, self.embeddings_attribute, embeddings)
+        self.add(inputs)
+        return input_ids
+
+    def update_index(self, inputs: List[str]) -> None:
+        """
+        Make the index hold exactly ``inputs``, re-encoding as little as possible.
+
+        Nothing is encoded if the indexed document set is unchanged; otherwise
+        documents that are no longer present are removed and new ones are added.
+
+        Args:
+            inputs: Documents that should be indexed.
+        """
+        embeddings = getattr(self, self.embeddings_attribute, None)
+        if embeddings is None or not self.supports_incremental:
+            if embeddings is None or set(inputs) != set(self.documents):
+                self.index(inputs)
+            return
+        if set(inputs) == set(self.documents):
+            return
+        wanted = {self.doc_id(doc) for doc in inputs}
+        ids, _ = self._document_rows()
+        self.remove([key for key in ids if key not in wanted])
+        self.add(inputs)
 
     def retrieve(self, query: List[str], top_k: int = 5, batch_size: int = -1) -> List[List[str]]:
         """
         Retrieve the top-k most similar examples for each query in a list of queries.
 
+        Repeated queries are encoded and scored once, and results are cached
+        across calls (see :meth:`query_cache_info`).
+
         Args:
             query: List of query examples.
             top_k: Number of most similar examples to retrieve per query.
+            batch_size: Number of queries scored at once. -1 means all at once.
 
         Returns:
             A list of lists, where each sublist contains the top-k most similar examples for the corresponding query.
         """
+        return self._cached_retrieve(query, self._retrieve_queries, top_k=top_k, batch_size=batch_size)
+
+    def retrieve_with_scores(self, query: List[str], top_k: int = 5,
+                             batch_size: int = -1) -> List[List[Tuple[str, float]]]:
+        """
+        Like :meth:`retrieve`, but every result is a ``(document, score)`` pair.
+
+        Scores are the retriever's similarities (cosine similarity for embedding
+        retrievers), highest first. They let a caller act on confident results
+        directly, e.g. :class:`AutoRAGLearner` cascades.
+
+        Args:
+            query: List of query examples.
+            top_k: Number of most similar examples to retrieve per query.
+            batch_size: Number of queries scored at once. -1 means all at once.
+
+        Returns:
+            One list of ``(document, score)`` pairs per query.
+        """
+        return self._cached_retrieve(query, self._retrieve_queries, top_k=top_k, batch_size=batch_size,
+                                     with_scores=True)
+
+    def _retrieve_queries(self, query: List[str], top_k: int = 5, batch_size: int = -1,
+                          with_scores: bool = False) -> List[List[Any]]:
+        """Uncached retrieval for a list of unique queries."""
         if self.embeddings is None:
             raise RuntimeError("Retriever model must index documents before prediction.")
         query_embeddings = self.embedding_model.encode(query, convert_to_tensor=True)  # shape: [num_queries, dim]
-        if query_embeddings.shape[-1] != self.embeddings.shape[-1]:
+        return self.retrieve_by_embedding(query_embeddings=query_embeddings, top_k=top_k, batch_size=batch_size,
+                                          with_scores=with_scores)
+
+    def _cached_retrieve(self, query: List[str], retrieve_fn: Any, **params: Any) -> List[List[str]]:
+        """
+        Answer ``query`` through the result cache, calling ``retrieve_fn`` once for the unique misses.
+
+        Results are cached per query and ``params`` (except ``batch_size``, which does
+        not change results). The cache is tied to the current index and dropped as
+        soon as the document embeddings are replaced.
+
+        Args:
+            query: Queries, possibly with duplicates.
+            retrieve_fn: Uncached retrieval called as ``retrieve_fn(unique_queries, **params)``.
+            **params: Retrieval parameters, e.g. ``top_k``.
+
+        Returns:
+            One result list per query, in the order of ``query``.
+        """
+        embeddings = getattr(self, self.embeddings_attribute, None)
+        if self._query_cache_index is not embeddings:
+            self._query_cache.clear()
+            self._query_cache_index = embeddings
+        key_params = tuple(sorted((name, value) for name, value in params.items() if name != "batch_size"))
+        results: List[Optional[List[str]]] = [None] * len(query)
+        pending: Dict[str, List[int]] = {}
+        for position, text in enumerate(query):
+            key = (text, key_params)
+            if key in self._query_cache:
+                self._query_cache.move_to_end(key)
+                results[position] = list(self._query_cache[key])
+                self.query_cache_stats["hits"] += 1
+            elif text in pending:
+                pending[text].append(position)
+                self.query_cache_stats["duplicates"] += 1
+            else:
+                pending[text] = [position]
+                self.query_cache_stats["misses"] += 1
+        if pending:
+            unique = list(pending)
+            for text, result in zip(unique, retrieve_fn(unique, **params)):
+                for position in pending[text]:
+                    results[position] = list(result)
+                if self.query_cache_size > 0:
+                    self._query_cache[(text, key_params)] = list(result)
+            while len(self._query_cache) > max(self.query_cache_size, 0):
+                self._query_cache.popitem(last=False)
+        return results
+
+    def query_cache_info(self) -> Dict[str, float]:
+        """
+        Counters of the query result cache, useful to size ``query_cache_size``.
+
+        Returns:
+            Dict with ``hits`` (answered from the cache), ``duplicates`` (repeated
+            within a call), ``misses`` (retrieved), ``size`` and ``hit_rate``, the
+            fraction of queries that did not need retrieval.
+        """
+        total = sum(self.query_cache_stats.values())
+        saved = self.query_cache_stats["hits"] + self.query_cache_stats["duplicates"]
+        return {**self.query_cache_stats, "size": len(self._query_cache),
+                "hit_rate": saved / total if total else 0.0}
+
+    def clear_query_cache(self) -> None:
+        """Drop all cached query results and reset the counters."""
+        self._query_cache.clear()
+        self.query_cache_stats = {"hits": 0, "misses": 0, "duplicates": 0}
+
+    def retrieve_by_embedding(self, query_embeddings: Any, top_k: int = 5, batch_size: int = -1,
+                              with_scores: bool = False) -> List[List[Any]]:
+        """
+        Retrieve the top-k most similar examples for precomputed query embeddings.
+
+        Args:
+            query_embeddings: Query embedding matrix of shape [num_queries, dim].
+            top_k: Number of most similar examples to retrieve per query.
+            batch_size: Number of queries scored at once. -1 means all at once.
+            with_scores: Return ``(document, cosine similarity)`` pairs instead of documents.
+
+        Returns:
+            A list of lists, where each sublist contains the top-k most similar examples for the corresponding query.
+        """
+        doc_norm = self._normalized_documents()
+        query_embeddings = torch.as_tensor(query_embeddings, device=doc_norm.device,
+                                           dtype=torch.float32 if isinstance(doc_norm, QuantizedEmbeddings)
+                                           else doc_norm.dtype)
+        if query_embeddings.shape[-1] != doc_norm.shape[-1]:
             raise ValueError(
                 f"Embedding dimension mismatch: query embedding dim={query_embeddings.shape[-1]}, "
-                f"document embedding dim={self.embeddings.shape[-1]}"
+                f"document embedding dim={doc_norm.shape[-1]}"
             )
-        doc_norm = F.normalize(self.embeddings, p=2, dim=1)
         if batch_size == -1:
-            results = self._retrieve(query_embeddings=query_embeddings, doc_norm=doc_norm, top_k=top_k)
+            results = self._retrieve(query_embeddings=query_embeddings, doc_norm=doc_norm, top_k=top_k,
+                                     with_scores=with_scores)
         else:
-            results = self._batch_retrieve(query_embeddings=query_embeddings, doc_norm=doc_norm, top_k=top_k, batch_size=batch_size)
+            results = self._batch_retrieve(query_embeddings=query_embeddings, doc_norm=doc_norm, top_k=top_k,
+                                           batch_size=batch_size, with_scores=with_scores)
         return results
 
+    def _normalized_documents(self) -> Any:
+        """
+        Return the L2-normalized document matrix used for scoring.
+
+        Quantized embeddings are normalized before quantization and returned as they are.
+        """
+        embeddings = getattr(self, self.embeddings_attribute, None)
+        if embeddings is None:
+            raise RuntimeError("Retriever model must index documents before prediction.")
+        if hasattr(embeddings, "toarray"):
+            raise TypeError(f"{type(self).__name__} keeps sparse embeddings and cannot be queried by dense embeddings.")
+        if isinstance(embeddings, QuantizedEmbeddings):
+            return embeddings
+        return F.normalize(torch.as_tensor(embeddings), p=2, dim=1)
 
-    def _retrieve(self, query_embeddings, doc_norm, top_k: int = 5) -> List[List[str]]:
+    def _search(self, query_embeddings, doc_norm, top_k: int = 5):
+        """
+        Cosine top-k search returning ``(scores, indices)``, with float32 re-scoring for quantized documents.
+        """
         query_norm = F.normalize(query_embeddings, p=2, dim=1)
-        similarity_matrix = torch.matmul(query_norm, doc_norm.T)
         current_top_k = min(top_k, len(self.documents))
-        topk_similarities, topk_indices = torch.topk(similarity_matrix, k=current_top_k, dim=1)
-        results = [[self.documents[i] for i in indices] for indices in topk_indices]
+        if isinstance(doc_norm, QuantizedEmbeddings):
+            return quantized_search(query_norm, doc_norm, top_k=current_top_k,
+                                    rescore_multiplier=self.rescore_multiplier)
+        return torch.topk(torch.matmul(query_norm, doc_norm.T), k=current_top_k, dim=1)
+
+    def _retrieve(self, query_embeddings, doc_norm, top_k: int = 5, with_scores: bool = False) -> List[List[Any]]:
+        topk_similarities, topk_indices = self._search(query_embeddings, doc_norm, top_k=top_k)
+        if with_scores:
+            return [[(self.documents[i], score) for i, score in zip(indices, scores)]
+                    for indices, scores in zip(topk_indices.tolist(), topk_similarities.tolist())]
+        results = [[self.documents[i] for i in indices] for indices in topk_indices.tolist()]
         return results
 
 
-    def _batch_retrieve(self, query_embeddings, doc_norm, top_k: int = 5, batch_size: int = 1024) -> List[List[str]]:
+    def _batch_retrieve(self, query_embeddings, doc_norm, top_k: int = 5, batch_size: int = 1024,
+                        with_scores: bool = False) -> List[List[Any]]:
         results = []
         for i in range(0, query_embeddings.size(0), batch_size):
             batch_queries = query_embeddings[i:i + batch_size]
-            batch_results = self._retrieve(batch_queries, doc_norm, top_k=top_k)
+            batch_results = self._retrieve(batch_queries, doc_norm, top_k=top_k, with_scores=with_scores)
             results.extend(batch_results)
         return results
 
@@ -445,6 +1285,17 @@ class AutoPrompt(ABC):
         """
         self.prompt_template = prompt_template
 
+    def static_prefix(self) -> str:
+        """
+        Part of the template shared by all formatted prompts.
+
+        It ends at the last line break before the first placeholder, which makes it a
+        suitable ``prompt_prefix`` for :class:`AutoLLM` prefix caching.
+        """
+        first_placeholder = self.prompt_template.find("{")
+        head = self.prompt_template if first_placeholder < 0 else self.prompt_template[:first_placeholder]
+        return head[:head.rfind("\n") + 1]
+
     def format(self, **kwargs: Any) -> str:
         """
         Format the prompt template with the provided arguments.
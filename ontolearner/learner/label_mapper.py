@@ -17,7 +17,12 @@ It defines a base `LabelMapper` class and two specific subclasses:
 - `TFIDFLabelMapper`: Uses a TfidfVectorizer and a classifier for label prediction.
 - `SetFitShallowLabelMapper`: Uses a pretrained SetFit model for label prediction.
 """
-from typing import Dict, List, Tuple, Any
+import inspect
+import re
+from typing import Dict, List, Optional, Tuple, Any
+
+import joblib
+from sklearn.base import clone
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LogisticRegression
@@ -25,22 +30,30 @@ from sklearn.linear_model import LogisticRegression
 class LabelMapper:
     """
     LabelMapper subclass using a TF-IDF vectorizer and a classifier for label prediction.
+
+    Outputs that are, or start with, a known surface form of a label (e.g. ``"Yes."``
+    or ``"no, because ..."``) are mapped by a dictionary lookup; only the remaining
+    outputs go through the classifier. Results are memoized per output string.
     """
     def __init__(self,
                  classifier: Any=LogisticRegression(),
                  ngram_range: Tuple=(1, 1),
                  label_dict: Dict[str, List[str]]=None,
                  analyzer: str = 'word',
-                 iterator_no: int = 1000):
+                 iterator_no: int = 1000,
+                 memo_size: int = 100000):
         """
         Initializes the TFIDFLabelMapper with a specified classifier and TF-IDF configuration.
 
         Parameters:
-            classifier (Any): Classifier object (e.g., LogisticRegression, SVC).
+            classifier (Any): Classifier object (e.g., LogisticRegression, SVC). It is cloned, so
+                mappers never share a fitted classifier.
             ngram_range (Tuple): Range of n-grams for the TF-IDF vectorizer.
             label_dict (Dict[str, List[str]]): Dictionary mapping each label to a list of candidate phrases.
             analyzer (str): Specifies whether to analyze at the 'word' or 'char' level.
-            iterator_no (int): Number of iterations to replicate training data.
+            iterator_no (int): Weight of each training example (formerly the number of times the
+                training data was replicated).
+            memo_size (int): Maximum number of memoized output strings.
         """
         if label_dict is None:
             label_dict = {
@@ -53,17 +66,63 @@ class LabelMapper:
         for label, candidates in self.label_dict.items():
             self.x_train += [label] + candidates
             self.y_train += [label] * (len(candidates) + 1)
-        self.x_train = iterator_no * self.x_train
-        self.y_train = iterator_no * self.y_train
+        self.sample_weight = [float(iterator_no)] * len(self.x_train)
         assert len(self.x_train) == len(self.y_train)
+        self.iterator_no = iterator_no
         self.model = Pipeline([
             ('tfidf', TfidfVectorizer(analyzer=analyzer, ngram_range=ngram_range)),
-            ('classifier', classifier)
+            ('classifier', clone(classifier))
         ])
+        self.surface_forms = self._build_surface_forms()
+        self.memo_size = memo_size
+        self._memo: Dict[str, str] = {}
+        self._is_fitted = False
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace."""
+        return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+    def _build_surface_forms(self) -> Dict[str, str]:
+        """Normalized label and candidate phrases -> label; phrases claimed by several labels are left out."""
+        forms: Dict[str, Optional[str]] = {}
+        for label, candidates in self.label_dict.items():
+            for phrase in [label] + list(candidates):
+                form = self.normalize(phrase)
+                if form:
+                    forms[form] = label if forms.get(form, label) == label else None
+        return {form: label for form, label in forms.items() if label is not None}
+
+    def lookup(self, text: str) -> Optional[str]:
+        """
+        Fast-path label of an output: an exact match of a known surface form, or the longest
+        surface form the output starts with (followed by a word boundary).
 
-    def fit(self):
-        """Fits the TF-IDF pipeline on the training data."""
-        self.model.fit(self.x_train, self.y_train)
+        Returns:
+            The label, or ``None`` if the classifier is needed.
+        """
+        normalized = self.normalize(text)
+        if normalized in self.surface_forms:
+            return self.surface_forms[normalized]
+        matches = [form for form in self.surface_forms if normalized.startswith(form + " ")]
+        return self.surface_forms[max(matches, key=len)] if matches else None
+
+    def fit(self, force: bool = False):
+        """
+        Fits the TF-IDF pipeline on the training data.
+
+        The examples are weighted by ``iterator_no`` instead of being replicated. Fitting an
+        already fitted (or loaded) mapper is a no-op unless ``force`` is set.
+        """
+        if self._is_fitted and not force:
+            return
+        classifier = self.model.named_steps['classifier']
+        if 'sample_weight' in inspect.signature(classifier.fit).parameters:
+            self.model.fit(self.x_train, self.y_train, classifier__sample_weight=self.sample_weight)
+        else:
+            self.model.fit(self.iterator_no * self.x_train, self.iterator_no * self.y_train)
+        self._memo.clear()
+        self._is_fitted = True
 
     def validate_predicts(self, preds: List[str]):
         """
@@ -80,12 +139,63 @@ class LabelMapper:
         """
         Predicts labels for the given input using the TF-IDF pipeline.
 
+        Memoized outputs and outputs resolved by :meth:`lookup` skip the pipeline; the
+        remaining unique outputs are vectorized in a single call.
+
         Parameters:
             X (List[str]): List of input texts to classify.
 
         Returns:
             List[str]: Predicted labels.
         """
-        predictions = self.model.predict(X).tolist()
+        predictions: List[Optional[str]] = [None] * len(X)
+        pending: Dict[str, List[int]] = {}
+        for idx, text in enumerate(X):
+            label = self._memo.get(text)
+            if label is None:
+                label = self.lookup(text)
+                if label is not None:
+                    self._remember(text, label)
+            if label is None:
+                pending.setdefault(text, []).append(idx)
+            else:
+                predictions[idx] = label
+        if pending:
+            texts = list(pending)
+            for text, label in zip(texts, self.model.predict(texts).tolist()):
+                self._remember(text, label)
+                for idx in pending[text]:
+                    predictions[idx] = label
         self.validate_predicts(predictions)
         return predictions
+
+    def _remember(self, text: str, label: str) -> None:
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[text] = label
+
+    def save(self, path: str) -> None:
+        """
+        Save the (fitted) mapper to ``path`` with joblib.
+
+        Parameters:
+            path (str): Output file, e.g. ``label_mapper.joblib``.
+        """
+        self._memo.clear()
+        joblib.dump(self, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LabelMapper":
+        """
+        Load a mapper saved with :meth:`save`. Since :meth:`fit` is idempotent, ``AutoLLM.load`` does not refit a loaded mapper.
+
+        Parameters:
+            path (str): File written by :meth:`save`.
+
+        Returns:
+            LabelMapper: The loaded mapper.
+        """
+        mapper = joblib.load(path)
+        if not isinstance(mapper, cls):
+            raise TypeError(f"{path} does not hold a {cls.__name__}.")
+        return mapper
@@ -13,18 +13,82 @@
 # limitations under the License.
 
 from ..base import AutoLLM, AutoLearner
-from typing import Any, List
+from ..utils.batching import TokenBudgetBatchSampler
+from ..utils.blocking import CandidateBlocker
+from ..utils.checkpoint import PredictionCheckpoint
+from ..utils.completion_cache import cached_generate, get_completion_cache
+from ..utils.concurrency import TokenBucket, backoff_delay
+from ..utils.cpu_inference import CPUInferenceProfile
+from ..utils.parallel import DataParallelPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import copy
+import logging
+import os
+import threading
 import warnings
+import httpx
+import openai
+from openai import AsyncOpenAI
 from tqdm import tqdm
-from torch.utils.data import DataLoader
 import torch
 import torch.nn.functional as F
 from transformers import Mistral3ForConditionalGeneration
 from mistral_common.protocol.instruct.request import ChatCompletionRequest
 from mistral_common.tokens.tokenizers.mistral import MistralTokenizer
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+from transformers import AutoTokenizer, BitsAndBytesConfig
+
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_SERVER_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
 
 class AutoLLMLearner(AutoLearner):
+    """
+    Ontology learner that asks an LLM a yes/no question per candidate.
+
+    With ``scoring="generate"`` the LLM generates a short answer that the label
+    mapper turns into ``yes``/``no``. With ``scoring="logits"`` a single forward
+    pass per batch reads the next-token probability of the ``yes`` label (see
+    :meth:`AutoLLM.score`) and a candidate is accepted if it reaches ``threshold``.
+
+    With ``prefix_caching`` the instruction part shared by all prompts of a task
+    is encoded once and its KV cache is reused for every batch.
+
+    Prompts are batched by token length (see :class:`TokenBudgetBatchSampler`):
+    at most ``batch_size`` prompts and, if set, ``max_batch_tokens`` padded tokens
+    per batch. Predictions keep the original prompt order.
+
+    Taxonomy discovery and non-taxonomic relation extraction ask about pairs of types.
+    By default every pair is asked; with a ``candidate_blocker`` only its best candidate
+    pairs (see :class:`CandidateBlocker`) reach the LLM.
+
+    With ``relation_scoring="per-relation"`` every (head, tail, relation) triple is a yes/no
+    prompt. With ``relation_scoring="classify"`` each pair gets one prompt listing the
+    relations, every relation label is scored by its log-likelihood as the answer (see
+    :meth:`AutoLLM.continuation_log_likelihoods`), and up to ``max_relations`` relations
+    whose probability reaches ``relation_threshold`` are returned.
+
+    On CPU-only nodes a ``cpu_profile`` (see :class:`CPUInferenceProfile`) selects the weight
+    dtype, int8 dynamic quantization, compilation and thread counts of the LLM.
+
+    With ``num_workers > 1`` the learner runs data-parallel: :meth:`load` starts worker
+    processes that each load the model once and are pinned to ``cores_per_worker`` cores
+    (see :class:`DataParallelPool`). The prompt batches are spread over the workers and the
+    results are merged back in dataset order; the main process does not load the model.
+
+    All three tasks stream (see :meth:`AutoLearner.predict_stream`): every per-prompt result
+    is checkpointed as its batch completes, keyed by the prompt item.
+
+    With ``compile_prompts`` the prompt templates of all tasks are compiled for the LLM's
+    tokenizer (see :class:`PromptCompiler`): their instruction text is tokenized once and only
+    the term and type values of each prompt are tokenized, once per distinct value.
+    """
+
+    scoring_modes = ("generate", "logits")
+    relation_scoring_modes = ("per-relation", "classify")
+    #: Answer of the ``relation-classification`` prompt when no listed relation applies.
+    no_relation = "none"
+    streaming_tasks = ("term-typing", "taxonomy-discovery", "non-taxonomic-re")
 
     def __init__(self,
                  prompting,
@@ -33,27 +97,183 @@ class AutoLLMLearner(AutoLearner):
                  token: str = "",
                  max_new_tokens: int = 5,
                  batch_size: int = 10,
-                 device='cpu') -> None:
+                 device='cpu',
+                 scoring: str = "generate",
+                 threshold: float = 0.5,
+                 prefix_caching: bool = False,
+                 max_batch_tokens: Optional[int] = None,
+                 candidate_blocker: Optional[CandidateBlocker] = None,
+                 relation_scoring: str = "per-relation",
+                 relation_threshold: float = 0.3,
+                 max_relations: int = 3,
+                 cpu_profile: Optional[CPUInferenceProfile] = None,
+                 num_workers: int = 1,
+                 cores_per_worker: Optional[int] = None,
+                 compile_prompts: bool = False) -> None:
         super().__init__()
-        self.llm = llm(token=token, label_mapper=label_mapper, device=device)
+        if scoring not in self.scoring_modes:
+            raise ValueError(f"Unknown scoring '{scoring}'. Choose from {list(self.scoring_modes)}.")
+        if relation_scoring not in self.relation_scoring_modes:
+            raise ValueError(f"Unknown relation_scoring '{relation_scoring}'. "
+                             f"Choose from {list(self.relation_scoring_modes)}.")
+        self.llm = llm(token=token, label_mapper=label_mapper, device=device, prefix_caching=prefix_caching,
+                       cpu_profile=cpu_profile,
+                       prompt_templates=self._prompt_templates(prompting) if compile_prompts else None)
         self.prompting = prompting
         self.batch_size = batch_size
         self.max_new_tokens = max_new_tokens
+        self.scoring = scoring
+        self.threshold = threshold
+        self.max_batch_tokens = max_batch_tokens
+        self.candidate_blocker = candidate_blocker
+        self.relation_scoring = relation_scoring
+        self.relation_threshold = relation_threshold
+        self.max_relations = max_relations
+        self.num_workers = num_workers
+        self.cores_per_worker = cores_per_worker
+        if num_workers > 1 and isinstance(self.llm, ServerLLM):
+            raise ValueError("ServerLLM already sends requests concurrently; use num_workers=1.")
+        self._pool: Optional[DataParallelPool] = None
+        self._checkpoint: Optional[PredictionCheckpoint] = None
         self._is_term_typing_fit = False
 
+    @staticmethod
+    def _prompt_templates(prompting: Any) -> List[str]:
+        """Templates of every task the prompting class supports."""
+        templates = []
+        for task in ("term-typing", "taxonomy-discovery", "non-taxonomic-re", "relation-classification"):
+            try:
+                templates.append(prompting(task=task).prompt_template)
+            except ValueError:
+                continue
+        return templates
+
     def load(self, model_id: str = "mistralai/Mistral-7B-Instruct-v0.1", **kwargs: Any):
+        if self.num_workers > 1:
+            self.close()
+            cache = get_completion_cache()
+            self._pool = DataParallelPool(self._worker_copy(), setup="_load_worker", setup_args=(model_id,),
+                                          num_workers=self.num_workers, cores_per_worker=self.cores_per_worker,
+                                          completion_cache_path=str(cache.path) if cache is not None else None)
+        else:
+            self.llm.load(model_id=model_id)
+        if self.candidate_blocker is not None and self.candidate_blocker.encoder is None:
+            self.candidate_blocker.load()
+
+    def _worker_copy(self) -> "AutoLLMLearner":
+        """Copy of the learner without its model, pool or blocker, sent to the data-parallel workers."""
+        worker = copy.copy(self)
+        worker.llm = copy.copy(self.llm)
+        worker.llm.model, worker.llm.tokenizer = None, None
+        worker.llm._prefix_kv = type(self.llm._prefix_kv)()
+        worker.llm._prompt_compiler = None
+        worker._pool, worker.candidate_blocker, worker.num_workers = None, None, 1
+        return worker
+
+    def _load_worker(self, model_id: str) -> None:
         self.llm.load(model_id=model_id)
 
-    def _term_typing_predict(self, dataset):
-        dataloader = DataLoader(dataset, batch_size=self.batch_size, shuffle=False)
+    def close(self) -> None:
+        """Stop the data-parallel workers, if any."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def _candidate_pairs(self, types: List[str]) -> List[Tuple[str, str]]:
+        """Type pairs to ask the LLM about: all ``idx < jdx`` pairs, or the blocker's candidates."""
+        if self.candidate_blocker is not None:
+            return self.candidate_blocker.candidates(types)
+        return [(type_i, type_j) for idx, type_i in enumerate(types) for jdx, type_j in enumerate(types) if idx < jdx]
+
+    def _accept(self, prompts: List[str]) -> List[bool]:
+        """Yes/no decision for each prompt, by generation or by thresholding the ``yes`` probability."""
+        if self.scoring == "logits":
+            return [probability >= self.threshold for probability in self.llm.score(prompts)]
+        return [predict == 'yes' for predict in self.llm.generate(inputs=prompts, max_new_tokens=self.max_new_tokens)]
+
+    def _prompt_lengths(self, prompts: List[str]) -> List[int]:
+        """Token length of every prompt, computed by a worker when running data-parallel."""
+        if self._pool is not None:
+            return self._pool.call("_prompt_lengths", prompts)
+        return self.llm.prompt_lengths(prompts)
+
+    def _map_batches(self, dataset: List[Dict[str, Any]], fn: Callable[[List[Dict[str, Any]]], List[Any]]) -> List[Any]:
+        """
+        Apply ``fn`` to batches of items grouped by prompt token length; results are returned in dataset order.
+
+        When running data-parallel, ``fn`` must be a method of the learner; its batches are
+        spread over the workers. While a checkpoint is active (during :meth:`predict_stream`),
+        items whose result it holds are skipped and every finished batch is appended to it.
+        """
+        results: List[Any] = [None] * len(dataset)
+        pending = list(range(len(dataset)))
+        if self._checkpoint is not None:
+            keys = [PredictionCheckpoint.key(fn.__name__, item) for item in dataset]
+            pending = [index for index in pending if keys[index] not in self._checkpoint]
+            for index in set(range(len(dataset))).difference(pending):
+                results[index] = self._checkpoint.get(keys[index])
+        prompts = [dataset[index]['prompt'] for index in pending]
+        sampler = TokenBudgetBatchSampler(self._prompt_lengths(prompts) if prompts else [],
+                                          max_batch_size=self.batch_size,
+                                          max_batch_tokens=self.max_batch_tokens)
+        batches = [[dataset[pending[i]] for i in indices] for indices in sampler]
+        if self._pool is not None:
+            if getattr(fn, "__self__", None) is not self:
+                raise ValueError("Data-parallel batches must be mapped with a method of the learner.")
+            outputs = self._pool.map(fn.__name__, batches)
+        else:
+            outputs = map(fn, batches)
+        for indices, batch_results in tqdm(zip(sampler, outputs), total=len(sampler)):
+            batch_indices = [pending[i] for i in indices]
+            for index, result in zip(batch_indices, batch_results):
+                results[index] = result
+            if self._checkpoint is not None:
+                self._checkpoint.put_many({keys[index]: results[index] for index in batch_indices})
+        return results
+
+    def _accept_items(self, items: List[Dict[str, str]]) -> List[bool]:
+        return self._accept([item['prompt'] for item in items])
+
+    def _accept_dataset(self, dataset: List[Dict[str, str]]) -> List[bool]:
+        """Yes/no decision for every item's prompt, batched by token length and returned in dataset order."""
+        return self._map_batches(dataset, self._accept_items)
+
+    def _relation_probabilities(self, items: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+        """Distribution over each item's relations (and :attr:`no_relation`) from the label log-likelihoods."""
+        options = [list(item['relations']) + [self.no_relation] for item in items]
+        log_likelihoods = self.llm.continuation_log_likelihoods([item['prompt'] for item in items], options)
+        return [dict(zip(labels, torch.softmax(torch.tensor(scores), dim=0).tolist()))
+                for labels, scores in zip(options, log_likelihoods)]
+
+    def _relation_classification_dataset(self, pairs: List[Tuple[str, str]],
+                                         relations: List[List[str]]) -> List[Dict[str, Any]]:
+        """One ``relation-classification`` prompt per (head, tail) pair, listing the pair's candidate relations."""
+        prompting = self.prompting(task='relation-classification')
+        return [{"head": head, "tail": tail, "relations": pair_relations,
+                 "prompt": prompting.format(head=head, tail=tail,
+                                            relations="\n".join(f"- {relation}" for relation in pair_relations))}
+                for (head, tail), pair_relations in zip(pairs, relations)]
+
+    def _non_taxonomic_re_classify(self, dataset: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Top relations of every pair whose probability reaches ``relation_threshold``."""
+        predictions = []
+        for item, probabilities in zip(dataset, self._map_batches(dataset, self._relation_probabilities)):
+            ranked = sorted(((p, r) for r, p in probabilities.items()
+                             if r != self.no_relation and p >= self.relation_threshold), reverse=True)
+            predictions += [{"head": item['head'], "tail": item['tail'], "relation": relation}
+                            for _, relation in ranked[:self.max_relations]]
+        return predictions
+
+    def _term_typing_predict(self, dataset, accepted: Optional[List[bool]] = None):
+        """Group the accepted (term, type) items by term; ``accepted`` holds decisions made elsewhere, if any."""
         predictions = {}
-        for batch in tqdm(dataloader):
-            prediction = self.llm.generate(inputs=batch['prompt'], max_new_tokens=self.max_new_tokens)
-            for term, type, predict in zip(batch['term'], batch['type'], prediction):
-                if term not in predictions:
-                    predictions[term] = []
-                if predict == 'yes':
-                    predictions[term].append(type)
+        accepted = self._accept_dataset(dataset) if accepted is None else accepted
+        for item, predict in zip(dataset, accepted):
+            term = item['term']
+            if term not in predictions:
+                predictions[term] = []
+            if predict:
+                predictions[term].append(item['type'])
         predicts = [{"term": term, "types": types} for term, types in predictions.items()]
         return predicts
 
@@ -65,26 +285,42 @@ class AutoLLMLearner(AutoLearner):
         if not isinstance(data, list) and not all(isinstance(item, str) for item in data):
             raise TypeError("Expected a list of strings (types) for llm  at term-typing task.")
         if test:
-            if self._is_term_typing_fit:
-                prompting = self.prompting(task='term-typing')
-                dataset = [{"term": term, "type": type, "prompt": prompting.format(term=term, type=type)}
-                           for term in data for type in self.candidate_types]
-                return self._term_typing_predict(dataset=dataset)
-            else:
-                raise RuntimeError("Term typing model must be fit before prediction.")
+            return list(self._term_typing_stream(data))
         else:
             self.candidate_types = data
             self._is_term_typing_fit = True
 
-    def _taxonomy_discovery_predict(self, dataset):
-        dataloader = DataLoader(dataset, batch_size=self.batch_size, shuffle=False)
-        predictions = []
-        for batch in tqdm(dataloader):
-            prediction = self.llm.generate(inputs=batch['prompt'], max_new_tokens=self.max_new_tokens)
-            predictions.extend({"parent": parent, "child": child}
-                                for parent, child, predict in zip(batch['parent'], batch['child'], prediction)
-                                if predict == 'yes')
-        return predictions
+    def _predict_stream(self, eval_data: Any, task: str, checkpoint: Optional[PredictionCheckpoint] = None,
+                        chunk_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        streams = {"term-typing": self._term_typing_stream,
+                   "taxonomy-discovery": self._taxonomy_discovery_stream,
+                   "non-taxonomic-re": self._non_taxonomic_re_stream}
+        self._checkpoint = checkpoint
+        try:
+            yield from streams[task](eval_data, chunk_size)
+        finally:
+            self._checkpoint = None
+
+    @staticmethod
+    def _chunks(items: List[Any], chunk_size: Optional[int]) -> List[List[Any]]:
+        """Consecutive chunks of ``chunk_size`` items; one chunk without a size."""
+        chunk_size = chunk_size or max(len(items), 1)
+        return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+    def _term_typing_stream(self, data: List[str], chunk_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """``{"term", "types"}`` records, chunk by chunk of terms."""
+        if not self._is_term_typing_fit:
+            raise RuntimeError("Term typing model must be fit before prediction.")
+        prompting = self.prompting(task='term-typing')
+        for terms in self._chunks(data, chunk_size):
+            dataset = [{"term": term, "type": type, "prompt": prompting.format(term=term, type=type)}
+                       for term in terms for type in self.candidate_types]
+            yield from self._term_typing_predict(dataset=dataset)
+
+    def _taxonomy_discovery_predict(self, dataset, accepted: Optional[List[bool]] = None):
+        accepted = self._accept_dataset(dataset) if accepted is None else accepted
+        return [{"parent": item['parent'], "child": item['child']}
+                for item, predict in zip(dataset, accepted) if predict]
 
     def _taxonomy_discovery(self, data: Any, test: bool = False) -> Any:
         """
@@ -92,25 +328,23 @@ class AutoLLMLearner(AutoLearner):
         during testing (same data): data= ['type-1', ...]
         """
         if test:
-            if not isinstance(data, list) and not all(isinstance(item, str) for item in data):
-                raise TypeError("Expected a list of strings (types) for llm  at term-typing task.")
-            prompting = self.prompting(task='taxonomy-discovery')
-            dataset = [{"parent": type_i, "child": type_j, "prompt": prompting.format(parent=type_i, child=type_j)}
-                       for idx, type_i in enumerate(data) for jdx, type_j in enumerate(data) if idx < jdx]
-            return self._taxonomy_discovery_predict(dataset=dataset)
+            return list(self._taxonomy_discovery_stream(data))
         else:
             warnings.warn("No requirement for fiting the taxonomy-discovery model, the predict module will use the input data to do the 'is-a' relationship detection")
 
+    def _taxonomy_discovery_stream(self, data: List[str], chunk_size: Optional[int] = None) -> Iterator[Dict[str, str]]:
+        """Accepted ``{"parent", "child"}`` records, chunk by chunk of candidate pairs."""
+        if not isinstance(data, list) and not all(isinstance(item, str) for item in data):
+            raise TypeError("Expected a list of strings (types) for llm  at term-typing task.")
+        prompting = self.prompting(task='taxonomy-discovery')
+        for pairs in self._chunks(self._candidate_pairs(data), chunk_size):
+            dataset = [{"parent": type_i, "child": type_j, "prompt": prompting.format(parent=type_i, child=type_j)}
+                       for type_i, type_j in pairs]
+            yield from self._taxonomy_discovery_predict(dataset=dataset)
+
     def _non_taxonomic_re_predict(self, dataset):
-        dataloader = DataLoader(dataset, batch_size=self.batch_size, shuffle=False)
-        predictions = []
-        for batch in tqdm(dataloader):
-            prediction = self.llm.generate(inputs=batch['prompt'], max_new_tokens=self.max_new_tokens)
-            predictions.extend({"head": head, "tail": tail, "relation": relation}
-                                for head, tail, relation, predict in
-                                zip(batch['head'], batch['tail'], batch['relation'], prediction)
-                                if predict == 'yes')
-        return predictions
+        return [{"head": item['head'], "tail": item['tail'], "relation": item['relation']}
+                for item, predict in zip(dataset, self._accept_dataset(dataset)) if predict]
 
     def _non_taxonomic_re(self, data: Any, test: bool = False) -> Any:
         """
@@ -118,36 +352,69 @@ class AutoLLMLearner(AutoLearner):
         during testing: {'types': [...], 'relations': [... ]}
         """
         if test:
-            if 'types' not in data or 'relations' not in data:
-                raise ValueError("The non-taxonomic re predict should take {'types': [...], 'relations': [... ]}")
-            if len(data['types']) == 0:
-                warnings.warn("No `types` avaliable to do the non-taxonomic re-prediction.")
-                return None
+            return list(self._non_taxonomic_re_stream(data))
+        else:
+            warnings.warn("No requirement for fiting the non-taxonomic-re model, the predict module will use the input data to do the task.")
+
+    def _non_taxonomic_re_stream(self, data: Dict[str, List[str]],
+                                 chunk_size: Optional[int] = None) -> Iterator[Dict[str, str]]:
+        """``{"head", "tail", "relation"}`` records, chunk by chunk of candidate type pairs."""
+        if 'types' not in data or 'relations' not in data:
+            raise ValueError("The non-taxonomic re predict should take {'types': [...], 'relations': [... ]}")
+        if len(data['types']) == 0:
+            warnings.warn("No `types` avaliable to do the non-taxonomic re-prediction.")
+            return
+        for pairs in self._chunks(self._candidate_pairs(data['types']), chunk_size):
             # paring and finding paris that can have a relationship
             prompting = self.prompting(task='taxonomy-discovery')
             dataset = [{"parent": type_i, "child": type_j, "prompt": prompting.format(parent=type_i, child=type_j)}
-                       for idx, type_i in enumerate(data['types']) for jdx, type_j in enumerate(data['types']) if idx < jdx]
-            dataloader = DataLoader(dataset, batch_size=self.batch_size, shuffle=False)
-            predicts_lst = []
-            for batch in tqdm(dataloader):
-                prediction = self.llm.generate(inputs=batch['prompt'], max_new_tokens=self.max_new_tokens)
-                predicts_lst.extend((parent, child)
-                                    for parent, child, predict in zip(batch['parent'], batch['child'], prediction)
-                                    if predict == 'yes')
+                       for type_i, type_j in pairs]
+            predicts_lst = [(item['parent'], item['child'])
+                            for item, predict in zip(dataset, self._accept_dataset(dataset)) if predict]
             # finding relationships
+            if self.relation_scoring == "classify":
+                dataset = self._relation_classification_dataset(predicts_lst, [data['relations']] * len(predicts_lst))
+                yield from self._non_taxonomic_re_classify(dataset=dataset)
+                continue
             prompting = self.prompting(task='non-taxonomic-re')
             dataset = [{"head": head, "tail": tail, "relation": relation,
                         "prompt": prompting.format(head=head, tail=tail, relation=relation)}
                        for head, tail in predicts_lst for relation in data['relations']]
-            return self._non_taxonomic_re_predict(dataset=dataset)
-        else:
-            warnings.warn("No requirement for fiting the non-taxonomic-re model, the predict module will use the input data to do the task.")
+            yield from self._non_taxonomic_re_predict(dataset=dataset)
+
+
+def _encode_mistral_chat(tokenizer: Any, inputs: List[str], pad_token_id: int, device: Any) -> Dict[str, torch.Tensor]:
+    """Encode prompts as single-turn Mistral chat requests, right-padded into one batch."""
+    tokenized_list = []
+    for prompt in inputs:
+        messages = [{"role": "user", "content": [{"type": "text", "text": prompt}]}]
+        tokenized_list.append(tokenizer.encode_chat_completion(ChatCompletionRequest(messages=messages)).tokens)
+    max_len = max(len(tokens) for tokens in tokenized_list)
+    input_ids, attention_masks = [], []
+    for tokens in tokenized_list:
+        pad_len = max_len - len(tokens)
+        input_ids.append(tokens + [pad_token_id] * pad_len)
+        attention_masks.append([1] * len(tokens) + [0] * pad_len)
+    return {"input_ids": torch.tensor(input_ids).to(device), "attention_mask": torch.tensor(attention_masks).to(device)}
+
+
+def _mistral_chat_lengths(tokenizer: Any, inputs: List[str]) -> List[int]:
+    """Token length of each prompt as a single-turn Mistral chat request."""
+    return [len(tokenizer.encode_chat_completion(
+        ChatCompletionRequest(messages=[{"role": "user", "content": [{"type": "text", "text": prompt}]}])).tokens)
+        for prompt in inputs]
+
+
+def _encode_mistral_word(tokenizer: Any, word: str) -> List[int]:
+    """Token ids of a word, stripped of the chat-request control tokens."""
+    messages = [{"role": "user", "content": [{"type": "text", "text": word}]}]
+    return tokenizer.encode_chat_completion(ChatCompletionRequest(messages=messages)).tokens[2:-1]
 
 
 class FalconLLM(AutoLLM):
 
     @torch.no_grad()
-    def generate(self, inputs: List[str], max_new_tokens: int = 50) -> List[str]:
+    def _generate_completions(self, inputs: List[str], max_new_tokens: int) -> List[str]:
         encoded_inputs = self.tokenizer(inputs,
                                         return_tensors="pt",
                                         padding=True,
@@ -160,8 +427,7 @@ class FalconLLM(AutoLLM):
             pad_token_id=self.tokenizer.eos_token_id
         )
         generated_tokens = outputs[:, input_length:]
-        decoded_outputs = [self.tokenizer.decode(g, skip_special_tokens=True).strip() for g in generated_tokens]
-        return self.label_mapper.predict(decoded_outputs)
+        return [self.tokenizer.decode(g, skip_special_tokens=True).strip() for g in generated_tokens]
 
 
 class MistralLLM(AutoLLM):
@@ -172,18 +438,17 @@ class MistralLLM(AutoLLM):
             device_map = "cpu"
         else:
             device_map = "balanced"
-        self.model = Mistral3ForConditionalGeneration.from_pretrained(
-            model_id,
-            device_map=device_map,
-            torch_dtype=torch.bfloat16,
-            token=self.token
-        )
+        # the mistral_common tokenizer cannot drive the warm-up forward pass of the CPU profile
+        self._load_model(model_id, model_class=Mistral3ForConditionalGeneration, device_map=device_map,
+                         torch_dtype=self.cpu_profile.torch_dtype if self.cpu_profile and self.device == "cpu"
+                         else torch.bfloat16,
+                         token=self.token)
         if not hasattr(self.tokenizer, "pad_token_id") or self.tokenizer.pad_token_id is None:
             self.tokenizer.pad_token_id = self.model.generation_config.eos_token_id
         self.label_mapper.fit()
 
     @torch.no_grad()
-    def generate(self, inputs: List[str], max_new_tokens: int = 50) -> List[str]:
+    def _generate_completions(self, inputs: List[str], max_new_tokens: int) -> List[str]:
         tokenized_list = []
         for prompt in inputs:
             messages = [{"role": "user", "content": [{"type": "text", "text": prompt}]}]
@@ -210,7 +475,16 @@ class MistralLLM(AutoLLM):
         for i, tokens in enumerate(outputs):
             output_text = self.tokenizer.decode(tokens[len(tokenized_list[i]):])
             decoded_outputs.append(output_text)
-        return self.label_mapper.predict(decoded_outputs)
+        return decoded_outputs
+
+    def _encode_prompts(self, inputs: List[str]) -> Dict[str, torch.Tensor]:
+        return _encode_mistral_chat(self.tokenizer, inputs, self.tokenizer.pad_token_id, self.model.device)
+
+    def prompt_lengths(self, inputs: List[str]) -> List[int]:
+        return _mistral_chat_lengths(self.tokenizer, inputs)
+
+    def _encode_label_word(self, word: str) -> List[int]:
+        return _encode_mistral_word(self.tokenizer, word)
 
 
 class LogitMistralLLM(AutoLLM):
@@ -236,12 +510,11 @@ class LogitMistralLLM(AutoLLM):
         self.tokenizer = MistralTokenizer.from_hf_hub(model_id)
         self.tokenizer.padding_side = 'left'
         device_map = "cpu" if self.device == "cpu" else "balanced"
-        self.model = Mistral3ForConditionalGeneration.from_pretrained(
-            model_id,
-            device_map=device_map,
-            torch_dtype=torch.bfloat16,
-            token=self.token
-        )
+        # the mistral_common tokenizer cannot drive the warm-up forward pass of the CPU profile
+        self._load_model(model_id, model_class=Mistral3ForConditionalGeneration, device_map=device_map,
+                         torch_dtype=self.cpu_profile.torch_dtype if self.cpu_profile and self.device == "cpu"
+                         else torch.bfloat16,
+                         token=self.token)
         self.pad_token_id = self.model.generation_config.eos_token_id
         self.label_token_ids = self._get_label_token_ids()
 
@@ -282,10 +555,19 @@ class LogitMistralLLM(AutoLLM):
             predictions.append(max(label_scores, key=label_scores.get))
         return predictions
 
+    def _encode_prompts(self, inputs: List[str]) -> Dict[str, torch.Tensor]:
+        return _encode_mistral_chat(self.tokenizer, inputs, self.pad_token_id, self.model.device)
+
+    def prompt_lengths(self, inputs: List[str]) -> List[int]:
+        return _mistral_chat_lengths(self.tokenizer, inputs)
+
+    def _encode_label_word(self, word: str) -> List[int]:
+        return _encode_mistral_word(self.tokenizer, word)
+
 
 class QwenInstructLLM(AutoLLM):
 
-    def generate(self, inputs: List[str], max_new_tokens: int = 50) -> List[str]:
+    def _generate_completions(self, inputs: List[str], max_new_tokens: int) -> List[str]:
         messages = [[{"role": "user", "content": prompt + " Please show your final response with 'answer': 'label'."}]
                     for prompt in inputs]
 
@@ -305,13 +587,13 @@ class QwenInstructLLM(AutoLLM):
             output_ids = generated_ids[i][prompt_len:].tolist()
             output_content = self.tokenizer.decode(output_ids, skip_special_tokens=True).strip()
             decoded_outputs.append(output_content)
-        return self.label_mapper.predict(decoded_outputs)
+        return decoded_outputs
 
 
 class QwenThinkingLLM(AutoLLM):
 
     @torch.no_grad()
-    def generate(self, inputs: List[str], max_new_tokens: int = 50) -> List[str]:
+    def _generate_completions(self, inputs: List[str], max_new_tokens: int) -> List[str]:
         messages = [[{"role": "user", "content": prompt + " Please show your final response with 'answer': 'label'."}]
                     for prompt in inputs]
         texts = self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
@@ -328,7 +610,7 @@ class QwenThinkingLLM(AutoLLM):
                 thinking_ids = output_ids
             thinking_content = self.tokenizer.decode(thinking_ids, skip_special_tokens=True).strip()
             decoded_outputs.append(thinking_content)
-        return self.label_mapper.predict(decoded_outputs)
+        return decoded_outputs
 
 
 class LogitAutoLLM(AutoLLM):
@@ -396,12 +678,10 @@ class LogitQuantAutoLLM(AutoLLM):
         self.tokenizer.pad_token = self.tokenizer.eos_token
         if self.device == "cpu":
             # device_map = "cpu"
-            self.model = AutoModelForCausalLM.from_pretrained(
-                model_id,
-                # device_map=device_map,
-                torch_dtype=torch.bfloat16,
-                token=self.token
-            )
+            self._load_model(model_id, warmup_tokenizer=self.tokenizer,
+                             # device_map=device_map,
+                             torch_dtype=self.cpu_profile.torch_dtype if self.cpu_profile else torch.bfloat16,
+                             token=self.token)
         else:
             device_map = "balanced"
             # self.model = AutoModelForCausalLM.from_pretrained(
@@ -416,7 +696,7 @@ class LogitQuantAutoLLM(AutoLLM):
                 bnb_4bit_compute_dtype=torch.float16,
                 bnb_4bit_use_double_quant=True
             )
-            self.model = AutoModelForCausalLM.from_pretrained(
+            self._load_model(
                 model_id,
                 quantization_config=bnb_config,
                 device_map=device_map,
@@ -463,3 +743,186 @@ class LogitQuantAutoLLM(AutoLLM):
 
             predictions.append(max(label_scores, key=label_scores.get))
         return predictions
+
+
+class ServerLLM(AutoLLM):
+    """
+    LLM served by an OpenAI-compatible endpoint, e.g. a local vLLM or llama.cpp server.
+
+    Instead of loading weights in-process, prompts are sent to the server, so several
+    workers can share one continuously batched model. Requests are issued from a
+    background asyncio event loop with at most ``max_concurrency`` requests in flight
+    over a pooled HTTP connection; with the ``completions`` API up to
+    ``prompts_per_request`` prompts go in one request. Failed requests (connection errors,
+    timeouts, rate limits, server errors) are retried with exponential backoff.
+    Completions go through the completion cache (see :mod:`ontolearner.utils.completion_cache`)
+    when ``temperature`` is 0.
+
+    Example:
+        >>> from functools import partial
+        >>> llm = partial(ServerLLM, base_url="http://localhost:8000/v1", max_concurrency=32)
+        >>> learner = AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(), llm=llm)
+        >>> learner.load(model_id="Qwen/Qwen2.5-7B-Instruct")  # the model name known to the server
+    """
+
+    apis = ("completions", "chat")
+
+    def __init__(self,
+                 label_mapper: Any,
+                 device: str = 'cpu',
+                 token: str = "",
+                 base_url: Optional[str] = None,
+                 api: str = "completions",
+                 max_concurrency: int = 16,
+                 prompts_per_request: int = 8,
+                 requests_per_minute: Optional[float] = None,
+                 max_retries: int = 5,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 timeout: float = 120.0,
+                 temperature: float = 0.0,
+                 top_p: float = 1.0,
+                 **kwargs: Any) -> None:
+        """
+        Args:
+            label_mapper: Maps completions to labels in :meth:`generate`; may be ``None`` when
+                only :meth:`complete` is used.
+            device: Unused; the server owns the device.
+            token: API key of the server (any string for servers without authentication).
+            base_url: Server URL including the API prefix. Defaults to ``$OPENAI_BASE_URL``
+                or ``http://localhost:8000/v1``.
+            api: ``"completions"`` (raw prompts, several per request) or ``"chat"`` (one user
+                message per request; the server applies the chat template).
+            max_concurrency: Maximum number of requests in flight (and pooled connections).
+            prompts_per_request: Prompts per ``completions`` request.
+            requests_per_minute: Request rate limit. ``None`` disables rate limiting.
+            max_retries: Retries per request before the error is raised.
+            backoff_base: Delay in seconds before the first retry; doubled on each further retry.
+            backoff_max: Upper bound of the retry delay in seconds.
+            timeout: Timeout of a single request in seconds.
+            temperature: Sampling temperature; 0 is greedy decoding.
+            top_p: Nucleus sampling parameter.
+            **kwargs: Passed to :class:`AutoLLM` (e.g. ``prefix_caching``, which has no effect here).
+        """
+        super().__init__(label_mapper=label_mapper, device=device, token=token, **kwargs)
+        if api not in self.apis:
+            raise ValueError(f"Unknown api '{api}'. Choose from {list(self.apis)}.")
+        self.base_url = base_url or os.environ.get("OPENAI_BASE_URL", "http://localhost:8000/v1")
+        self.api = api
+        self.max_concurrency = max(1, max_concurrency)
+        self.prompts_per_request = max(1, prompts_per_request) if api == "completions" else 1
+        self.rate_limiter = TokenBucket(requests_per_minute / 60.0) if requests_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.temperature = temperature
+        self.top_p = top_p
+        self.model_id: Optional[str] = None
+        self.client: Optional[AsyncOpenAI] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def load(self, model_id: str) -> None:
+        """Connect to the server; ``model_id`` is the model name the server knows."""
+        self.model_id = model_id
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="ServerLLM", daemon=True).start()
+        self._run(self._connect())
+        if self.label_mapper is not None:
+            self.label_mapper.fit()
+
+    async def _connect(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        # retries are handled in _request, so that they go through the rate limiter and the retry cap
+        self.client = AsyncOpenAI(api_key=self.token or "EMPTY", base_url=self.base_url, max_retries=0,
+                                  timeout=self.timeout, http_client=httpx.AsyncClient(limits=limits))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _run(self, coroutine: Any) -> Any:
+        """Run a coroutine on the background event loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def close(self) -> None:
+        """Close the connection pool and stop the background event loop."""
+        if self._loop is None:
+            return
+        if self.client is not None:
+            self._run(self.client.close())
+            self.client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    async def _request(self, prompts: List[str], max_new_tokens: int, temperature: float, top_p: float) -> List[str]:
+        """Complete one request's prompts, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire_async()
+                try:
+                    if self.api == "chat":
+                        response = await self.client.chat.completions.create(
+                            model=self.model_id, messages=[{"role": "user", "content": prompts[0]}],
+                            max_tokens=max_new_tokens, temperature=temperature, top_p=top_p)
+                        return [response.choices[0].message.content or ""]
+                    response = await self.client.completions.create(
+                        model=self.model_id, prompt=prompts, max_tokens=max_new_tokens,
+                        temperature=temperature, top_p=top_p)
+                    completions = [""] * len(prompts)
+                    for choice in response.choices:
+                        completions[choice.index] = choice.text
+                    return completions
+                except _RETRYABLE_SERVER_ERRORS as error:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = backoff_delay(attempt, base=self.backoff_base, maximum=self.backoff_max)
+                    logger.warning(f"Request to {self.base_url} failed ({error}); retrying in {delay:.1f}s.")
+            await asyncio.sleep(delay)
+
+    async def _complete_all(self, prompts: List[str], max_new_tokens: int, temperature: float,
+                            top_p: float) -> List[str]:
+        chunks = [prompts[i:i + self.prompts_per_request] for i in range(0, len(prompts), self.prompts_per_request)]
+        results = await asyncio.gather(*(self._request(chunk, max_new_tokens, temperature, top_p) for chunk in chunks))
+        return [completion for chunk in results for completion in chunk]
+
+    def complete(self, prompts: List[str], max_new_tokens: int = 50, temperature: Optional[float] = None,
+                 top_p: Optional[float] = None) -> List[str]:
+        """
+        Raw completions of ``prompts``, requested concurrently.
+
+        Args:
+            prompts: Prompts to complete.
+            max_new_tokens: Maximum number of generated tokens per prompt.
+            temperature: Overrides the default ``temperature``.
+            top_p: Overrides the default ``top_p``.
+
+        Returns:
+            One completion per prompt, stripped.
+        """
+        if self.client is None:
+            raise RuntimeError("ServerLLM must be loaded before generation.")
+        temperature = self.temperature if temperature is None else temperature
+        top_p = self.top_p if top_p is None else top_p
+        generation_kwargs = {"backend": type(self).__name__, "api": self.api, "base_url": self.base_url,
+                             "max_new_tokens": max_new_tokens, "temperature": temperature, "top_p": top_p}
+        return cached_generate(None, prompts,
+                               lambda batch: [text.strip() for text in
+                                              self._run(self._complete_all(batch, max_new_tokens, temperature, top_p))],
+                               generation_kwargs, model_id=self.model_id, sampling=temperature > 0)
+
+    def generate(self, inputs: List[str], max_new_tokens: int = 50) -> List[str]:
+        return self.label_mapper.predict(self.complete(inputs, max_new_tokens=max_new_tokens))
+
+    def prompt_lengths(self, inputs: List[str]) -> List[int]:
+        """Approximate token lengths (4 characters per token); the tokenizer lives on the server."""
+        return [max(1, len(prompt) // 4) for prompt in inputs]
+
+    def label_probabilities(self, inputs: List[str]) -> Tuple[List[str], torch.Tensor]:
+        raise NotImplementedError("ServerLLM has no access to the model logits; use scoring='generate'.")
+
+    def continuation_log_likelihoods(self, inputs: List[str], continuations: List[List[str]],
+                                     normalize: bool = True) -> List[List[float]]:
+        raise NotImplementedError("ServerLLM has no access to the model logits; use relation_scoring='per-relation'.")
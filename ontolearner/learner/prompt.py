@@ -61,6 +61,23 @@ Head type: {head}
 Tail type: {tail}
 Relation: {relation}
 Answer (yes or no):"""
+        elif task == "relation-classification":
+            prompt_template = """You are classifying non-taxonomic conceptual relationships.
+
+Given two conceptual types, choose the relation from the list that typically holds between them.
+
+Rules:
+- Choose a relation only if it commonly and meaningfully applies.
+- Answer "none" if no relation in the list applies.
+- Do not explain.
+
+Relations:
+{relations}
+
+Head type: {head}
+Tail type: {tail}
+Relation:"""
         else:
-            raise ValueError("Unknown task! Current tasks are: 'term-typing', 'taxonomy-discovery', 'non-taxonomic-re'")
+            raise ValueError("Unknown task! Current tasks are: 'term-typing', 'taxonomy-discovery', 'non-taxonomic-re', "
+                             "'relation-classification'")
         super().__init__(prompt_template)
@@ -12,19 +12,100 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
+import time
 import warnings
-from typing import Any
+from typing import Any, Dict, List, Optional
 from ...base import AutoLearner
 
+logger = logging.getLogger(__name__)
+
 class AutoRAGLearner(AutoLearner):
     def __init__(self,
                  retriever: Any,
-                 llm: Any):
+                 llm: Any,
+                 threshold: Optional[float] = None,
+                 accept_above: Optional[float] = None,
+                 reject_below: Optional[float] = None):
+        """
+        Args:
+            retriever: Retriever learner proposing candidates.
+            llm: LLM learner verifying the candidates.
+            threshold: Acceptance threshold on the LLM ``yes`` probability. Overrides the
+                LLM learner's threshold and only applies with ``scoring="logits"``.
+            accept_above: Cascade mode: term typing and taxonomy discovery candidates whose
+                retriever score is at least this value are accepted without asking the LLM.
+            reject_below: Cascade mode: candidates whose retriever score is below this value
+                are rejected without asking the LLM. Only the candidates in between (the
+                uncertainty band) are verified by the LLM; see :attr:`cascade_stats`.
+        """
         super().__init__()
+        if accept_above is not None and reject_below is not None and reject_below > accept_above:
+            raise ValueError(f"reject_below ({reject_below}) must not exceed accept_above ({accept_above}).")
         self.retriever = retriever
         self.llm = llm
+        if threshold is not None:
+            self.llm.threshold = threshold
+        self.accept_above = accept_above
+        self.reject_below = reject_below
+        self.cascade_stats: Dict[str, float] = {}
         self._is_term_typing_fit = False
 
+    @property
+    def cascade(self) -> bool:
+        """Whether confident candidates are decided from their retriever scores alone."""
+        return self.accept_above is not None or self.reject_below is not None
+
+    def _retrieve_candidates(self, data: Any, task: str) -> List[Dict[str, Any]]:
+        """
+        Retriever predictions, timed for :attr:`cascade_stats`.
+
+        In cascade mode the retriever's ``return_scores`` is switched on for this call
+        only, so the retriever learner keeps its own output format elsewhere.
+        """
+        start = time.perf_counter()
+        return_scores = getattr(self.retriever, "return_scores", None)
+        if self.cascade and return_scores is not None:
+            self.retriever.return_scores = True
+        try:
+            retriever_predictions = self.retriever.predict(data, task=task, ontologizer=False)
+        finally:
+            if return_scores is not None:
+                self.retriever.return_scores = return_scores
+        self.cascade_stats = {"retriever_seconds": time.perf_counter() - start}
+        return retriever_predictions
+
+    def _cascade_accept(self, dataset: List[Dict[str, Any]]) -> Optional[List[bool]]:
+        """
+        Accept or reject the items whose ``score`` lies outside the uncertainty band and ask
+        the LLM about the rest. Returns ``None`` (the LLM decides everything) without a cascade.
+
+        Per-stage counts and LLM latency are stored in :attr:`cascade_stats`.
+        """
+        if not self.cascade:
+            return None
+        if any("score" not in item for item in dataset):
+            raise ValueError("Cascade inference needs retriever scores; use a retriever learner "
+                             "that supports `return_scores`.")
+        decisions: List[Optional[bool]] = []
+        for item in dataset:
+            if self.accept_above is not None and item["score"] >= self.accept_above:
+                decisions.append(True)
+            elif self.reject_below is not None and item["score"] < self.reject_below:
+                decisions.append(False)
+            else:
+                decisions.append(None)
+        band = [item for item, decision in zip(dataset, decisions) if decision is None]
+        start = time.perf_counter()
+        band_decisions = iter(self.llm._accept_dataset(band) if band else [])
+        self.cascade_stats.update({"candidates": len(dataset),
+                                   "accepted": decisions.count(True),
+                                   "rejected": decisions.count(False),
+                                   "llm": len(band),
+                                   "llm_seconds": time.perf_counter() - start})
+        logger.info(f"Cascade: {self.cascade_stats}")
+        return [next(band_decisions) if decision is None else decision for decision in decisions]
+
     def load(self,
              retriever_id: str = 'sentence-transformers/all-MiniLM-L6-v2',
              llm_id: str="mistralai/Mistral-7B-Instruct-v0.1"):
@@ -39,12 +120,16 @@ class AutoRAGLearner(AutoLearner):
         task = 'term-typing'
         if test:
             if self._is_term_typing_fit:
-                retriever_predictions = self.retriever.predict(data, task=task, ontologizer=False)
+                retriever_predictions = self._retrieve_candidates(data, task=task)
                 prompting = self.llm.prompting(task=task)
                 dataset = [{"term": retriever_prediction['term'], "type": type,
                             "prompt": prompting.format(term=retriever_prediction['term'], type=type)}
                            for retriever_prediction in retriever_predictions for type in retriever_prediction['types']]
-                return self.llm._term_typing_predict(dataset=dataset)
+                if self.cascade:
+                    for item, score in zip(dataset, (score for retriever_prediction in retriever_predictions
+                                                     for score in retriever_prediction.get('scores', []))):
+                        item['score'] = score
+                return self.llm._term_typing_predict(dataset=dataset, accepted=self._cascade_accept(dataset))
             else:
                 raise RuntimeError("Term typing model must be fit before prediction.")
         else:
@@ -58,12 +143,16 @@ class AutoRAGLearner(AutoLearner):
         """
         task = 'taxonomy-discovery'
         if test:
-            retriever_predictions = self.retriever.predict(data, task=task, ontologizer=False)
+            retriever_predictions = self._retrieve_candidates(data, task=task)
             prompting = self.llm.prompting(task=task)
             dataset = [{"parent": retriever_prediction['parent'], "child": retriever_prediction['child'],
                         "prompt": prompting.format(parent=retriever_prediction['parent'], child=retriever_prediction['child'])}
                        for retriever_prediction in retriever_predictions]
-            return self.llm._taxonomy_discovery_predict(dataset=dataset)
+            if self.cascade:
+                for item, retriever_prediction in zip(dataset, retriever_predictions):
+                    if 'score' in retriever_prediction:
+                        item['score'] = retriever_prediction['score']
+            return self.llm._taxonomy_discovery_predict(dataset=dataset, accepted=self._cascade_accept(dataset))
         else:
             warnings.warn("No requirement for fiting the taxonomy discovery model, the predict module will use the input data to do the fit as well.")
 
@@ -75,6 +164,14 @@ class AutoRAGLearner(AutoLearner):
         task = "non-taxonomic-re"
         if test:
             retriever_predictions = self.retriever.predict(data, task=task, ontologizer=False)
+            if self.llm.relation_scoring == "classify":
+                # one prompt per pair, listing the relations retrieved for it
+                pair_relations = {}
+                for retriever_prediction in retriever_predictions:
+                    pair = (retriever_prediction['head'], retriever_prediction['tail'])
+                    pair_relations.setdefault(pair, []).append(retriever_prediction['relation'])
+                dataset = self.llm._relation_classification_dataset(list(pair_relations), list(pair_relations.values()))
+                return self.llm._non_taxonomic_re_classify(dataset=dataset)
             prompting = self.llm.prompting(task='non-taxonomic-re')
             dataset = [{"head": retriever_prediction['head'],
                         "tail": retriever_prediction['tail'],
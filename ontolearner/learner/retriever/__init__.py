@@ -15,5 +15,6 @@
 from .crossencoder import CrossEncoderRetriever
 from .embedding import GloveRetriever, Word2VecRetriever
 from .ngram import NgramRetriever
+from .vector_store import MemmapKeyedVectors
 from .learner import AutoRetrieverLearner, LLMAugmentedRetrieverLearner
 from .augmented_retriever import LLMAugmenterGenerator, LLMAugmenter, LLMAugmentedRetriever
@@ -12,16 +12,79 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import ast
+import hashlib
+import json
+import logging
+import time
 from abc import ABC
-from typing import Any, List, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, List, Dict, Optional, Tuple, Union
+
+import openai
 from openai import OpenAI
-import time
 from tqdm import tqdm
-import torch
-import torch.nn.functional as F
 
 from ...base import AutoRetriever
 from ...utils import load_json
+from ...utils.concurrency import TokenBucket, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# client errors that will not go away by retrying
+_NON_RETRYABLE_ERRORS = (openai.AuthenticationError, openai.PermissionDeniedError,
+                         openai.NotFoundError, openai.BadRequestError)
+
+
+class AugmentationError(RuntimeError):
+    """Raised when a query could not be augmented within the retry budget."""
+
+
+class AugmentationCache:
+    """
+    Persistent (model, task, query, request) -> candidates cache stored as a JSON-lines file.
+
+    ``request`` is a fingerprint of everything else that shapes the answer (prompt,
+    function schema, number of candidates), see :func:`request_fingerprint`. Every result is appended and flushed as soon as it is produced, so an
+    interrupted augmentation run resumes where it stopped. A truncated last
+    line left by a crash is ignored on load.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._entries: Dict[Tuple[str, str, str, Optional[str]], List[str]] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    key = (entry["model"], entry["task"], entry["query"], entry.get("request"))
+                    self._entries[key] = entry["candidates"]
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Loaded {len(self._entries)} cached augmentations from {self.path}.")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, model_id: str, task: str, query: str, request: str) -> Optional[List[str]]:
+        return self._entries.get((model_id, task, query, request))
+
+    def put(self, model_id: str, task: str, query: str, request: str, candidates: List[str]) -> None:
+        self._entries[(model_id, task, query, request)] = candidates
+        with open(self.path, "a", encoding="utf8") as f:
+            f.write(json.dumps({"model": model_id, "task": task, "query": query, "request": request,
+                                "candidates": candidates}, ensure_ascii=False) + "\n")
+
+
+def request_fingerprint(conversation: Any, function: Any, top_n_candidate: int) -> str:
+    """Short hash of an augmentation request: its messages, function schema and number of candidates."""
+    payload = json.dumps({"conversation": conversation, "function": function, "top_n_candidate": top_n_candidate},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf8")).hexdigest()[:16]
 
 
 class LLMAugmenterGenerator(ABC):
@@ -37,6 +100,13 @@ class LLMAugmenterGenerator(ABC):
     For taxonomy discovery, it invokes a function-calling LLM that returns
     candidate parent classes for each query term.
 
+    Queries are augmented concurrently by a pool of ``max_concurrency`` workers
+    sharing one (thread-safe) client. Requests can be rate limited with a token
+    bucket, failed requests and malformed outputs are retried with exponential
+    backoff up to ``max_retries`` times, and results can be persisted to an
+    on-disk cache so that interrupted runs resume where they stopped. Any
+    OpenAI-compatible server can be used through ``base_url``.
+
     Attributes:
         client (OpenAI): OpenAI API client used for LLM inference.
         model_id (str): The LLM model identifier.
@@ -49,7 +119,17 @@ class LLMAugmenterGenerator(ABC):
         non_taxonomic_re_prompt (str): Prompt template for non-taxonomic RE.
     """
 
-    def __init__(self, model_id: str = 'gpt-4.1-mini', token: str = '', top_n_candidate: int = 5) -> None:
+    def __init__(self,
+                 model_id: str = 'gpt-4.1-mini',
+                 token: str = '',
+                 top_n_candidate: int = 5,
+                 base_url: Optional[str] = None,
+                 max_concurrency: int = 8,
+                 requests_per_minute: Optional[float] = None,
+                 max_retries: int = 5,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 60.0,
+                 cache_path: Optional[str] = None) -> None:
         """
         Initialize the LLM augmenter generator.
 
@@ -57,10 +137,24 @@ class LLMAugmenterGenerator(ABC):
             model_id (str): Name of the OpenAI model to use.
             token (str): API key for authentication.
             top_n_candidate (int): Number of generated candidate parents per query.
+            base_url (str, optional): Base URL of an OpenAI-compatible server, e.g. ``http://localhost:8000/v1``.
+            max_concurrency (int): Maximum number of requests in flight.
+            requests_per_minute (float, optional): Request rate limit. ``None`` disables rate limiting.
+            max_retries (int): Number of retries per query before it is given up.
+            backoff_base (float): Delay in seconds before the first retry; doubled on each further retry.
+            backoff_max (float): Upper bound of the retry delay in seconds.
+            cache_path (str, optional): JSON-lines file caching (model, task, query) -> candidates.
         """
-        self.client = OpenAI(api_key=token)
+        # retries are handled here, so that they go through the rate limiter and the retry cap
+        self.client = OpenAI(api_key=token, base_url=base_url, max_retries=0)
 
         self.model_id = model_id
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limiter = TokenBucket(requests_per_minute / 60.0) if requests_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = AugmentationCache(cache_path) if cache_path else None
 
         self.term_typing_function = []
         self.taxonomy_discovery_function = [
@@ -107,27 +201,71 @@ class LLMAugmenterGenerator(ABC):
         """
         Call an LLM to produce augmented candidates using function-calling.
 
+        Failed requests and malformed outputs are retried with exponential backoff;
+        client errors such as an invalid API key are raised immediately.
+
         Args:
             conversation (list): Dialogue messages to send to the LLM.
             function (list): Function schemas supplied to the model.
 
         Returns:
             list[str]: A list of top-k generated candidates.
+
+        Raises:
+            AugmentationError: If no valid output was obtained within ``max_retries`` retries.
         """
-        while True:
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
             try:
                 completion = self.client.chat.completions.create(
                     model=self.model_id,
                     messages=conversation,
                     functions=function
                 )
-                inference = eval(completion.choices[0].message.function_call.arguments)['candidate_parents'][:self.top_n_candidate]
-                assert len(inference) == self.top_n_candidate
-                break
-            except Exception:
-                print("sleep for 5 seconds")
-                time.sleep(5)
-        return inference
+                return self.parse_candidates(completion)
+            except _NON_RETRYABLE_ERRORS:
+                raise
+            except Exception as error:
+                if attempt == self.max_retries:
+                    raise AugmentationError(f"No valid augmentation after {attempt + 1} attempts: {error}") from error
+                delay = backoff_delay(attempt, base=self.backoff_base, maximum=self.backoff_max)
+                logger.warning(f"Augmentation request failed ({error}); retrying in {delay:.1f}s.")
+                time.sleep(delay)
+
+    def parse_candidates(self, completion: Any) -> List[str]:
+        """
+        Extract the candidate list from a function-calling completion.
+
+        The function arguments (or, for servers without function calling, the
+        message content) are parsed as JSON, falling back to Python literal syntax,
+        which some models emit.
+
+        Args:
+            completion: Chat completion response.
+
+        Returns:
+            list[str]: The first ``top_n_candidate`` candidates.
+
+        Raises:
+            ValueError: If the output holds fewer than ``top_n_candidate`` candidates.
+        """
+        message = completion.choices[0].message
+        function_call = getattr(message, "function_call", None)
+        arguments = getattr(function_call, "arguments", None)
+        if not isinstance(arguments, str):
+            arguments = message.content or ""
+        try:
+            parsed = json.loads(arguments)
+        except json.JSONDecodeError:
+            try:
+                parsed = ast.literal_eval(arguments)
+            except (ValueError, SyntaxError) as error:
+                raise ValueError(f"Unparsable augmentation output: {arguments[:200]!r}") from error
+        candidates = parsed.get("candidate_parents") if isinstance(parsed, dict) else None
+        if not isinstance(candidates, list) or len(candidates) < self.top_n_candidate:
+            raise ValueError(f"Expected {self.top_n_candidate} candidate parents, got: {arguments[:200]!r}")
+        return [str(candidate) for candidate in candidates[:self.top_n_candidate]]
 
     def tasks_data_former(self, data: Any, task: str) -> List[str] | Dict[str, List[str]]:
         """
@@ -162,22 +300,60 @@ class LLMAugmenterGenerator(ABC):
 
         return formatted_data
 
-    def _augment(self, query, conversations, function):
+    def _augment(self, query, conversations, function, task: str = 'taxonomy-discovery'):
         """
         Internal helper to generate augmented candidates for a batch of queries.
 
+        Repeated queries are requested once. Cached queries are answered from the
+        cache; the others are sent concurrently and every result is cached as soon
+        as it arrives. Queries that still fail
+        after all retries are logged and left out, so a later run retries them.
+
         Args:
             query (list[str]): Input query terms.
             conversations (list): LLM conversation blocks for each query.
             function (list): Function-calling schemas.
+            task (str): Task the queries belong to, part of the cache key.
 
         Returns:
             dict[str, list[str]]: Mapping from query → list of augmented candidates.
         """
-        results = {}
-        for qu, conversation in tqdm(zip(query, conversations)):
-            results[qu] = self.generate(conversation=conversation, function=function)
-        return results
+        results, pending, requests = {}, [], {}
+        # a repeated query (with the same conversation) is requested and cached once
+        for qu, conversation in dict(zip(query, conversations)).items():
+            cached = None
+            if self.cache is not None:
+                requests[qu] = request_fingerprint(conversation, function, self.top_n_candidate)
+                cached = self.cache.get(self.model_id, task, qu, requests[qu])
+            if cached is not None:
+                results[qu] = cached
+            else:
+                pending.append((qu, conversation))
+        if results:
+            logger.info(f"{len(results)} of {len(query)} queries answered from the augmentation cache.")
+
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {executor.submit(self.generate, conversation=conversation, function=function): qu
+                       for qu, conversation in pending}
+            try:
+                for future in tqdm(as_completed(futures), total=len(futures)):
+                    qu = futures[future]
+                    try:
+                        results[qu] = future.result()
+                    except AugmentationError as error:
+                        failed += 1
+                        logger.error(f"Giving up on query {qu!r}: {error}")
+                        continue
+                    if self.cache is not None:
+                        self.cache.put(self.model_id, task, qu, requests[qu], results[qu])
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        if failed:
+            logger.warning(f"{failed} queries could not be augmented and are missing from the results.")
+        return {qu: results[qu] for qu in query if qu in results}
 
     def augment_term_typing(self, query: List[str]) -> List[str]:
         """
@@ -226,7 +402,8 @@ class LLMAugmenterGenerator(ABC):
             ]
             conversations.append(conversation)
 
-        return self._augment(query=query, conversations=conversations, function=self.taxonomy_discovery_function)
+        return self._augment(query=query, conversations=conversations, function=self.taxonomy_discovery_function,
+                             task='taxonomy-discovery')
 
     def augment(self, data: Any, task: str):
         """
@@ -299,13 +476,17 @@ class LLMAugmentedRetriever(AutoRetriever):
     Attributes:
         augmenter: An augmenter instance that provides transform() and top_n_candidate.
     """
-    def __init__(self, threshold: float = 0.0, cutoff_rate: float = 100.0) -> None:
-        super().__init__()
+    def __init__(self, threshold: float = 0.0, cutoff_rate: float = 100.0,
+                 precision: str = "float32", rescore_multiplier: int = 4) -> None:
+        super().__init__(precision=precision, rescore_multiplier=rescore_multiplier)
         self.threshold = threshold
         self.cutoff_rate = cutoff_rate
 
     def set_augmenter(self, augmenter):
+        """Use ``augmenter`` for later retrievals; cached results of the previous augmenter are dropped."""
         self.augmenter = augmenter
+        self._query_cache.clear()
+        self._query_cache_index = None
 
     def retrieve(self, query: List[str], top_k: int = 5, batch_size: int = -1, task: str = None) -> List[List[str]]:
         """
@@ -325,10 +506,20 @@ class LLMAugmentedRetriever(AutoRetriever):
         return self.augmented_retrieve(query, top_k=top_k, batch_size=batch_size, task=task)
 
     def augmented_retrieve(self, query: List[str], top_k: int = 5, batch_size: int = -1, task: str = None):
+        """
+        Retrieve documents for each query by summing the scores of its augmented variants.
+
+        Repeated queries are answered once and cached across calls, and augmented
+        variants shared by several queries are encoded and scored only once.
+        """
+        return self._cached_retrieve(query, self._augmented_retrieve, top_k=top_k, batch_size=batch_size, task=task)
+
+    def _augmented_retrieve(self, query: List[str], top_k: int = 5, batch_size: int = -1, task: str = None):
         if self.embeddings is None:
             raise RuntimeError("Retriever model must index documents before prediction.")
 
-        augmented_queries, index_map = [], []
+        # augmented variant -> indices of the queries it belongs to (once per occurrence)
+        index_map: Dict[str, List[int]] = {}
         for qu_idx, qu in enumerate(query):
             try:
                 augmented = self.augmenter.transform(qu, task=task)
@@ -336,29 +527,26 @@ class LLMAugmentedRetriever(AutoRetriever):
                 augmented = self.augmenter[task].get(qu, [qu])
 
             for aug in augmented:
-                augmented_queries.append(aug)
-                index_map.append(qu_idx)
+                index_map.setdefault(aug, []).append(qu_idx)
+        augmented_queries = list(index_map)
 
-        doc_norm = F.normalize(self.embeddings, p=2, dim=1)
+        doc_norm = self._normalized_documents()
         results = [dict() for _ in range(len(query))]
 
         if batch_size == -1:
-            batch_size = len(augmented_queries)
+            batch_size = max(len(augmented_queries), 1)
 
         for start in range(0, len(augmented_queries), batch_size):
             batch_aug = augmented_queries[start:start + batch_size]
             batch_embeddings = self.embedding_model.encode(batch_aug, convert_to_tensor=True)
-            batch_norm = F.normalize(batch_embeddings, p=2, dim=1)
-            similarity_matrix = torch.matmul(batch_norm, doc_norm.T)
-            current_top_k = min(top_k, len(self.documents))
-            topk_similarities, topk_indices = torch.topk(similarity_matrix, k=current_top_k, dim=1)
-
-            for i, (doc_indices, sim_scores) in enumerate(zip(topk_indices, topk_similarities)):
-                original_query_idx = index_map[start + i]
-
-                for doc_idx, score in zip(doc_indices.tolist(), sim_scores.tolist()):
-                    if score >= self.threshold:
-                        doc = self.documents[doc_idx]
+            topk_similarities, topk_indices = self._search(batch_embeddings, doc_norm, top_k=top_k)
+
+            for aug, doc_indices, sim_scores in zip(batch_aug, topk_indices, topk_similarities):
+                hits = [(self.documents[doc_idx], score)
+                        for doc_idx, score in zip(doc_indices.tolist(), sim_scores.tolist())
+                        if score >= self.threshold]
+                for original_query_idx in index_map[aug]:
+                    for doc, score in hits:
                         prev = results[original_query_idx].get(doc, 0.0)
                         results[original_query_idx][doc] = prev + score
 
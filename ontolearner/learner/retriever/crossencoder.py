@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import logging
-from typing import List
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import torch
 from sentence_transformers import CrossEncoder, SentenceTransformer, util
-from tqdm import tqdm
-import numpy as np
 
 from ...base import AutoRetriever
+from ...utils.model_pool import get_model_pool, pool_key, release_model
+from ...utils.quantization import QuantizedEmbeddings
 
 logger = logging.getLogger(__name__)
 
@@ -39,9 +41,18 @@ class CrossEncoderRetriever(AutoRetriever):
 
     This provides an efficient and accurate alternative to pure CrossEncoder
     or pure BiEncoder approaches.
+
+    Reranking is batched across queries: the (query, candidate) pairs of all
+    queries are flattened, sorted by length so batches need little padding,
+    scored together, and scattered back per query. Scores of already-seen
+    (query, document) pairs are kept in a bounded cache.
     """
 
-    def __init__(self, bi_encoder_model_id: str = None) -> None:
+    index_attributes = ("documents", "document_embeddings")
+    embeddings_attribute = "document_embeddings"
+
+    def __init__(self, bi_encoder_model_id: str = None, cache_size: int = 100000,
+                 precision: str = "float32", rescore_multiplier: int = 4) -> None:
         """
         Initialize the retriever.
 
@@ -50,9 +61,22 @@ class CrossEncoderRetriever(AutoRetriever):
                 Model ID for the BiEncoder used in the first-stage retrieval.
                 If not provided, the CrossEncoder model_id passed to `load()`
                 will also be used as the BiEncoder.
+            cache_size (int):
+                Maximum number of (query, document) CrossEncoder scores kept
+                across calls. Use `0` to disable the cache.
+            precision (str):
+                Storage precision of the BiEncoder document embeddings:
+                `"float32"`, `"float16"` or `"int8"`.
+            rescore_multiplier (int):
+                Number of quantized candidates re-scored in float32 per requested candidate.
         """
-        super().__init__()
+        super().__init__(precision=precision, rescore_multiplier=rescore_multiplier)
         self.bi_encoder_model_id = bi_encoder_model_id
+        self.bi_encoder = None
+        self.cross_encoder = None
+        self.document_embeddings = None
+        self.cache_size = cache_size
+        self._score_cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
 
     def load(self, model_id: str):
         """
@@ -67,11 +91,24 @@ class CrossEncoderRetriever(AutoRetriever):
         Notes:
             - BiEncoder is used for fast vector similarity search.
             - CrossEncoder is used for slow but accurate reranking.
+            - Both come from the process-wide model pool, shared with other components.
         """
         if not self.bi_encoder_model_id:
             self.bi_encoder_model_id = model_id
-        self.bi_encoder = SentenceTransformer(self.bi_encoder_model_id)
-        self.cross_encoder = CrossEncoder(model_id)
+        pool, bi_encoder_model_id = get_model_pool(), self.bi_encoder_model_id
+        bi_encoder = pool.acquire(pool_key("SentenceTransformer", bi_encoder_model_id),
+                                  lambda: SentenceTransformer(bi_encoder_model_id), owner=self)
+        cross_encoder = pool.acquire(pool_key("CrossEncoder", model_id), lambda: CrossEncoder(model_id), owner=self)
+        self.unload()
+        self.bi_encoder, self.cross_encoder = bi_encoder, cross_encoder
+
+    def unload(self) -> None:
+        """Release the BiEncoder and CrossEncoder to the model pool and drop their cached scores."""
+        super().unload()
+        release_model(self.bi_encoder, owner=self)
+        release_model(self.cross_encoder, owner=self)
+        self.bi_encoder, self.cross_encoder = None, None
+        self.clear_cache()
 
     def index(self, inputs: List[str]):
         """
@@ -87,15 +124,74 @@ class CrossEncoderRetriever(AutoRetriever):
             - `self.document_embeddings`: Tensor of BiEncoder embeddings.
         """
         self.documents = inputs
-        self.document_embeddings = self.bi_encoder.encode(inputs, convert_to_tensor=True, show_progress_bar=True)
+        self.document_embeddings = self._index_embeddings(inputs)
+
+    def _encode_documents(self, inputs: List[str]):
+        return self.bi_encoder.encode(inputs, convert_to_tensor=True, show_progress_bar=True)
+
+    def clear_cache(self) -> None:
+        """Drop all cached CrossEncoder scores."""
+        self._score_cache.clear()
+
+    def _cache_put(self, pair: Tuple[str, str], score: float) -> None:
+        if self.cache_size <= 0:
+            return
+        self._score_cache[pair] = score
+        self._score_cache.move_to_end(pair)
+        while len(self._score_cache) > self.cache_size:
+            self._score_cache.popitem(last=False)
+
+    def _score_pairs(self, query: List[str], pending: List[Tuple[int, int]],
+                     scores: List[Dict[int, float]], batch_size: int) -> None:
+        """
+        Score (query index, document index) pairs with the CrossEncoder in one flattened call.
 
-    def retrieve(self, query: List[str], top_k: int = 5, rerank_k: int = 100, batch_size: int = 32) -> List[List[str]]:
+        Cached pairs are answered from the cache, duplicates are scored once, and the
+        remaining pairs are sorted by length before batching so each batch holds
+        similarly sized inputs. Scores are written into ``scores[query_idx][doc_idx]``.
+        """
+        to_score = []
+        for qi, doc_idx in pending:
+            pair = (query[qi], self.documents[doc_idx])
+            if pair in self._score_cache:
+                self._score_cache.move_to_end(pair)
+                scores[qi][doc_idx] = self._score_cache[pair]
+            else:
+                to_score.append((qi, doc_idx, pair))
+        if not to_score:
+            return
+
+        if batch_size <= 0:
+            # `AutoRetrieverLearner` passes -1 ("all at once"), which is not a usable CrossEncoder batch size
+            batch_size = 32
+        unique_pairs = list(dict.fromkeys(pair for _, _, pair in to_score))
+        unique_pairs.sort(key=lambda pair: len(pair[0]) + len(pair[1]))
+        predicted = self.cross_encoder.predict(unique_pairs, batch_size=batch_size, show_progress_bar=True)
+        new_scores = {pair: float(score) for pair, score in zip(unique_pairs, predicted)}
+        for pair, score in new_scores.items():
+            self._cache_put(pair, score)
+        for qi, doc_idx, pair in to_score:
+            scores[qi][doc_idx] = new_scores[pair]
+
+    def retrieve(self,
+                 query: List[str],
+                 top_k: int = 5,
+                 rerank_k: int = 100,
+                 batch_size: int = 32,
+                 rerank_step: Optional[int] = None,
+                 score_margin: Optional[float] = None) -> List[List[str]]:
         """
         Retrieve top-k most relevant documents per query using a two-stage process.
 
         Stage 1: Retrieve top `rerank_k` documents using BiEncoder embeddings.
         Stage 2: Rerank those candidates using the CrossEncoder, returning `top_k`.
 
+        Candidates are reranked in rounds of `rerank_step` BiEncoder ranks, each
+        round scoring the pairs of every still-active query in one batched call.
+        With `score_margin`, a query stops after a round whose best new score is
+        at least `score_margin` below its current k-th best score. Repeated queries
+        are answered once and results are cached across calls.
+
         Args:
             query (List[str]):
                 List of user query strings.
@@ -105,25 +201,71 @@ class CrossEncoderRetriever(AutoRetriever):
                 Number of candidates to retrieve before reranking.
             batch_size (int):
                 Batch size for CrossEncoder inference.
+            rerank_step (int, optional):
+                Number of candidates per query scored in each round. Defaults to
+                `rerank_k` (a single round) when `score_margin` is not set.
+            score_margin (float, optional):
+                Score margin that enables early termination of reranking.
 
         Returns:
             List[List[str]]:
                 For each query, a list of top-k reranked documents.
         """
-        results = []
+        return self._cached_retrieve(query, self._retrieve_queries, top_k=top_k, rerank_k=rerank_k,
+                                     batch_size=batch_size, rerank_step=rerank_step, score_margin=score_margin)
+
+    def _retrieve_queries(self,
+                          query: List[str],
+                          top_k: int = 5,
+                          rerank_k: int = 100,
+                          batch_size: int = 32,
+                          rerank_step: Optional[int] = None,
+                          score_margin: Optional[float] = None,
+                          with_scores: bool = False) -> List[List[Any]]:
+        """Uncached two-stage retrieval for a list of unique queries, with CrossEncoder scores if ``with_scores``."""
         # Step 1: Encode queries with the BiEncoder
         query_embeddings = self.bi_encoder.encode(
             query, convert_to_tensor=True, show_progress_bar=True
         )
         # Step 2: Retrieve candidate documents
-        hits_batch = util.semantic_search(query_embeddings, self.document_embeddings, top_k=rerank_k)
-        # Step 3: Rerank using CrossEncoder
-        for i, hits in enumerate(tqdm(hits_batch, desc="Reranking")):
-            candidates = [self.documents[hit["corpus_id"]] for hit in hits]
-            pairs = [(query[i], doc) for doc in candidates]
-            scores = self.cross_encoder.predict(pairs, batch_size=batch_size, show_progress_bar=False)
-            reranked_idx = np.argsort(scores)[::-1][:top_k]
-            top_docs = [candidates[j] for j in reranked_idx]
-            results.append(top_docs)
+        if isinstance(self.document_embeddings, QuantizedEmbeddings):
+            _, indices = self._search(torch.as_tensor(query_embeddings), self.document_embeddings, top_k=rerank_k)
+            candidates = indices.tolist()
+        else:
+            hits_batch = util.semantic_search(query_embeddings, self.document_embeddings, top_k=rerank_k)
+            candidates = [[hit["corpus_id"] for hit in hits] for hits in hits_batch]
+        # Step 3: Rerank using CrossEncoder, batching pairs across queries
+        if rerank_step is None:
+            rerank_step = rerank_k if score_margin is None else max(top_k, 1)
+        scores: List[Dict[int, float]] = [{} for _ in candidates]
+        active = [qi for qi, cands in enumerate(candidates) if cands]
+        start = 0
+        while active:
+            pending = [(qi, doc_idx) for qi in active for doc_idx in candidates[qi][start:start + rerank_step]]
+            self._score_pairs(query, pending, scores, batch_size)
+            end = start + rerank_step
+            active = [qi for qi in active
+                      if end < len(candidates[qi])
+                      and not self._reached_margin(scores[qi], candidates[qi][start:end], top_k, score_margin)]
+            start = end
 
+        results = []
+        for qi, cands in enumerate(candidates):
+            scored = [doc_idx for doc_idx in cands if doc_idx in scores[qi]]
+            # sorted() is stable, so ties keep the BiEncoder order
+            reranked = sorted(scored, key=lambda doc_idx: scores[qi][doc_idx], reverse=True)[:top_k]
+            if with_scores:
+                results.append([(self.documents[doc_idx], float(scores[qi][doc_idx])) for doc_idx in reranked])
+            else:
+                results.append([self.documents[doc_idx] for doc_idx in reranked])
         return results
+
+    @staticmethod
+    def _reached_margin(query_scores: Dict[int, float], last_round: List[int], top_k: int,
+                        score_margin: Optional[float]) -> bool:
+        """Return True if the last reranking round fell `score_margin` below the current k-th best score."""
+        if score_margin is None or len(query_scores) < top_k or not last_round:
+            return False
+        kth_best = sorted(query_scores.values(), reverse=True)[top_k - 1]
+        round_best = max(query_scores[doc_idx] for doc_idx in last_round)
+        return kth_best - round_best >= score_margin
@@ -15,18 +15,93 @@ import logging
 import torch
 import torch.nn.functional as F
 import numpy as np
+import scipy.sparse as sp
 
 from tqdm import tqdm
-from typing import List, Optional
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import Any, Callable, List, Optional
 from gensim.models import KeyedVectors
 from gensim.utils import simple_preprocess
 
 from ...base import AutoRetriever
+from ...utils.model_pool import get_model_pool, pool_key
+from .vector_store import MemmapKeyedVectors
 
 logger = logging.getLogger(__name__)
 
 
+def bag_of_words_encode(texts: List[str],
+                        tokenize: Callable[[str], List[str]],
+                        embedding_model: Any,
+                        dim: int) -> np.ndarray:
+    """
+    Encode a batch of texts as the mean of their in-vocabulary word vectors.
+
+    Every text is tokenized once and each token is mapped to a column of a
+    batch-local vocabulary, so the embedding model is queried only once per
+    unique token. The averaged embeddings are then obtained with a single
+    sparse document-term x dense term-vector matrix product.
+
+    Args:
+        texts (List[str]): Texts to encode.
+        tokenize (Callable[[str], List[str]]): Tokenizer applied to each text.
+        embedding_model (Any): Mapping-like word vector store supporting ``in`` and ``[]``.
+        dim (int): Dimensionality of the word vectors.
+
+    Returns:
+        np.ndarray: Matrix of shape ``(len(texts), dim)``. Texts without any
+        in-vocabulary word are encoded as zero vectors.
+    """
+    vocab, vectors = {}, []
+    indices, indptr = [], [0]
+    for text in texts:
+        for word in tokenize(text):
+            idx = vocab.get(word)
+            if idx is None:
+                if word in embedding_model:
+                    idx = len(vectors)
+                    vectors.append(np.asarray(embedding_model[word], dtype=np.float32))
+                else:
+                    idx = -1
+                vocab[word] = idx
+            if idx >= 0:
+                indices.append(idx)
+        indptr.append(len(indices))
+
+    if not vectors:
+        return np.zeros((len(texts), dim), dtype=np.float32)
+
+    doc_term = sp.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr),
+                             shape=(len(texts), len(vectors)))
+    counts = np.diff(doc_term.indptr).astype(np.float32)
+    summed = np.asarray(doc_term @ np.stack(vectors))
+    return summed / np.maximum(counts, 1.0)[:, None]
+
+
+def top_k_indices(similarity: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Return the column indices of the ``top_k`` highest scores per row, best first.
+
+    Uses ``np.argpartition`` so only the selected candidates are sorted.
+
+    Args:
+        similarity (np.ndarray): Score matrix of shape ``(num_queries, num_documents)``.
+        top_k (int): Number of indices to keep per row.
+
+    Returns:
+        np.ndarray: Index matrix of shape ``(num_queries, min(top_k, num_documents))``.
+    """
+    top_k = min(top_k, similarity.shape[1])
+    if top_k <= 0:
+        return np.empty((similarity.shape[0], 0), dtype=np.int64)
+    if top_k < similarity.shape[1]:
+        candidates = np.argpartition(-similarity, top_k - 1, axis=1)[:, :top_k]
+    else:
+        candidates = np.tile(np.arange(similarity.shape[1]), (similarity.shape[0], 1))
+    candidate_scores = np.take_along_axis(similarity, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
 class Word2VecRetriever(AutoRetriever):
     """
     Retriever that encodes each document by averaging its Word2Vec-style
@@ -40,19 +115,42 @@ class Word2VecRetriever(AutoRetriever):
         :meth:`load` before indexing or retrieval.
         """
         super().__init__()
-        self.embedding_model: Optional[KeyedVectors] = None
+        self.embedding_model: Optional[KeyedVectors | MemmapKeyedVectors] = None
         self.documents: List[str] = []
         self.embeddings: Optional[torch.Tensor] = None
 
-    def load(self, model_id: str) -> None:
+    def load(self, model_id: str, cache_dir: Optional[str] = None, dtype: str = "float32") -> None:
         """
         Load a pre-trained Word2Vec KeyedVectors model.
 
         Args:
             model_id (str):
-                Path to a Word2Vec `.bin` or `.txt` vector file.
+                Path to a Word2Vec `.bin` or `.txt` vector file, or to a
+                :class:`MemmapKeyedVectors` store directory.
+            cache_dir (str, optional):
+                Directory of a memory-mapped vector store. On the first call the
+                model is converted into it; later calls open it directly.
+            dtype (str):
+                Storage dtype used when converting, `"float32"` or `"float16"`.
+
+        Note:
+            Vectors read into memory come from the process-wide model pool, so retrievers
+            loading the same file share them.
         """
-        self.embedding_model = KeyedVectors.load_word2vec_format(model_id, binary=True)
+        if MemmapKeyedVectors.is_store(model_id):
+            self.unload()
+            self.embedding_model = MemmapKeyedVectors(model_id)
+        elif cache_dir is not None:
+            if not MemmapKeyedVectors.is_store(cache_dir):
+                MemmapKeyedVectors.from_keyed_vectors(model_id, cache_dir, dtype=dtype)
+            self.unload()
+            self.embedding_model = MemmapKeyedVectors(cache_dir)
+        else:
+            embedding_model = get_model_pool().acquire(
+                pool_key("KeyedVectors", model_id, binary=True),
+                lambda: KeyedVectors.load_word2vec_format(model_id, binary=True), owner=self)
+            self.unload()
+            self.embedding_model = embedding_model
 
     def _encode_text(self, text: str) -> np.ndarray:
         """
@@ -65,16 +163,35 @@ class Word2VecRetriever(AutoRetriever):
             np.ndarray: Averaged embedding vector. If no word is in the vocabulary,
             a zero vector of appropriate dimensionality is returned.
         """
+        return self._encode_texts([text])[0]
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode a batch of texts by averaging in-vocabulary word embeddings.
+
+        Args:
+            texts (List[str]): Input text strings.
+
+        Returns:
+            np.ndarray: Matrix with one averaged embedding per text.
+        """
         if self.embedding_model is None:
             raise RuntimeError("Word2Vec model must be loaded before encoding.")
+        return bag_of_words_encode(texts, tokenize=simple_preprocess,
+                                   embedding_model=self.embedding_model,
+                                   dim=self.embedding_model.vector_size)
 
-        words = simple_preprocess(text)
-        valid_vectors = [self.embedding_model[word] for word in words if word in self.embedding_model]
+    def _encode_documents(self, inputs: List[str]) -> torch.Tensor:
+        """
+        Encode documents into L2-normalized embeddings.
 
-        if not valid_vectors:
-            return np.zeros(self.embedding_model.vector_size)
+        Args:
+            inputs (List[str]): Documents to encode.
 
-        return np.mean(valid_vectors, axis=0)
+        Returns:
+            torch.Tensor: Normalized embedding matrix.
+        """
+        return F.normalize(torch.from_numpy(self._encode_texts(inputs)), p=2, dim=1)
 
     def index(self, inputs: List[str]) -> None:
         """
@@ -88,10 +205,10 @@ class Word2VecRetriever(AutoRetriever):
             - self.embeddings: L2-normalized document embeddings.
         """
         self.documents = inputs
-        embeddings = [self._encode_text(doc) for doc in tqdm(inputs)]
-        self.embeddings = F.normalize(torch.tensor(np.stack(embeddings)), p=2, dim=1)
+        self.embeddings = self._encode_documents(inputs)
 
-    def retrieve(self, query: List[str], top_k: int = 5, batch_size: int = -1) -> List[List[str]]:
+    def _retrieve_queries(self, query: List[str], top_k: int = 5, batch_size: int = -1,
+                          with_scores: bool = False) -> List[List[Any]]:
         """
         Retrieve the top-k most similar documents for each query.
 
@@ -99,6 +216,7 @@ class Word2VecRetriever(AutoRetriever):
             query (List[str]): Query texts.
             top_k (int): Number of results to return per query.
             batch_size (int): Batch size for processing queries. -1 means all at once.
+            with_scores (bool): Return ``(document, cosine similarity)`` pairs.
 
         Returns:
             List[List[str]]: One list per query containing top-k matching documents.
@@ -106,8 +224,7 @@ class Word2VecRetriever(AutoRetriever):
         if self.embeddings is None:
             raise RuntimeError("Documents must be indexed before retrieval.")
 
-        query_vec = [self._encode_text(q) for q in query]
-        query_vec = F.normalize(torch.tensor(np.stack(query_vec)), p=2, dim=1)
+        query_vec = F.normalize(torch.from_numpy(self._encode_texts(query)), p=2, dim=1)
 
         if batch_size == -1:
             batch_size = len(query)
@@ -115,12 +232,14 @@ class Word2VecRetriever(AutoRetriever):
         results = []
         for i in tqdm(range(0, len(query), batch_size)):
             q_batch = query_vec[i:i + batch_size]
-            sim = cosine_similarity(q_batch, self.embeddings)
-
-            topk_idx = np.argsort(sim, axis=1)[:, ::-1][:, :top_k]
+            sim = torch.matmul(q_batch, self.embeddings.T).numpy()
+            topk_idx = top_k_indices(sim, top_k)
 
-            for row in topk_idx:
-                results.append([self.documents[j] for j in row])
+            for scores, row in zip(sim, topk_idx):
+                if with_scores:
+                    results.append([(self.documents[j], float(scores[j])) for j in row])
+                else:
+                    results.append([self.documents[j] for j in row])
 
         return results
 
@@ -136,29 +255,60 @@ class GloveRetriever(AutoRetriever):
         Initialize an empty GloveRetriever. Model must be loaded before use.
         """
         super().__init__()
-        self.embedding_model: Optional[dict] = None
+        self.embedding_model: Optional[dict | MemmapKeyedVectors] = None
         self.documents: List[str] = []
         self.embeddings: Optional[torch.Tensor] = None
 
-    def load(self, model_id: str) -> None:
+    def load(self, model_id: str, cache_dir: Optional[str] = None, dtype: str = "float32") -> None:
         """
-        Load GloVe embeddings from a text file.
+        Load GloVe embeddings from a text file or a memory-mapped vector store.
 
         Args:
             model_id (str):
-                Path to GloVe `.txt` file, e.g. `glove.6B.300d.txt`.
+                Path to GloVe `.txt` file, e.g. `glove.6B.300d.txt`, or to a
+                :class:`MemmapKeyedVectors` store directory.
+            cache_dir (str, optional):
+                Directory of a memory-mapped vector store. On the first call the
+                text file is converted into it; later calls open it directly
+                without parsing the text file.
+            dtype (str):
+                Storage dtype used when converting, `"float32"` or `"float16"`.
+
+        Note:
+            Vectors read into memory come from the process-wide model pool, so retrievers
+            loading the same file share them.
         """
-        logger.info(f"Loading GloVe embeddings from {model_id} ...")
-        self.embedding_model = {}
-
-        with open(model_id, "r", encoding="utf8") as f:
+        if MemmapKeyedVectors.is_store(model_id):
+            self.unload()
+            self.embedding_model = MemmapKeyedVectors(model_id)
+            return
+        if cache_dir is not None:
+            if not MemmapKeyedVectors.is_store(cache_dir):
+                MemmapKeyedVectors.from_glove(model_id, cache_dir, dtype=dtype)
+            self.unload()
+            self.embedding_model = MemmapKeyedVectors(cache_dir)
+            return
+
+        embedding_model = get_model_pool().acquire(pool_key("GloVe", model_id), lambda: self._read_glove(model_id),
+                                                   owner=self)
+        self.unload()
+        self.embedding_model = embedding_model
+
+    @staticmethod
+    def _read_glove(path: str) -> dict:
+        """Read a GloVe text file into a word -> vector dict."""
+        logger.info(f"Loading GloVe embeddings from {path} ...")
+        embedding_model = {}
+
+        with open(path, "r", encoding="utf8") as f:
             for line in f:
                 values = line.split()
                 word = values[0]
                 vec = [float(v) for v in values[1:]]
-                self.embedding_model[word] = vec
+                embedding_model[word] = vec
 
-        logger.info(f"Loaded {len(self.embedding_model)} GloVe words.")
+        logger.info(f"Loaded {len(embedding_model)} GloVe words.")
+        return embedding_model
 
     def _encode_text(self, text: str) -> np.ndarray:
         """
@@ -170,17 +320,38 @@ class GloveRetriever(AutoRetriever):
         Returns:
             np.ndarray: Averaged embedding vector. Returns zero vector if no words match.
         """
+        return self._encode_texts([text])[0]
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode a batch of texts by averaging GloVe embeddings.
+
+        Args:
+            texts (List[str]): Input texts.
+
+        Returns:
+            np.ndarray: Matrix with one averaged embedding per text.
+        """
         if self.embedding_model is None:
             raise RuntimeError("GloVe model must be loaded before encoding.")
+        if isinstance(self.embedding_model, MemmapKeyedVectors):
+            dim = self.embedding_model.vector_size
+        else:
+            dim = len(next(iter(self.embedding_model.values())))
+        return bag_of_words_encode(texts, tokenize=lambda text: text.lower().split(),
+                                   embedding_model=self.embedding_model, dim=dim)
 
-        words = text.lower().split()
-        vecs = [self.embedding_model[w] for w in words if w in self.embedding_model]
+    def _encode_documents(self, inputs: List[str]) -> torch.Tensor:
+        """
+        Encode documents into L2-normalized embeddings.
 
-        if not vecs:
-            dim = len(next(iter(self.embedding_model.values())))
-            return np.zeros(dim)
+        Args:
+            inputs (List[str]): Documents to encode.
 
-        return np.mean(vecs, axis=0)
+        Returns:
+            torch.Tensor: Normalized embedding matrix.
+        """
+        return F.normalize(torch.from_numpy(self._encode_texts(inputs)), p=2, dim=1)
 
     def index(self, inputs: List[str]) -> None:
         """
@@ -193,10 +364,10 @@ class GloveRetriever(AutoRetriever):
             raise RuntimeError("You must load a GloVe model before indexing.")
 
         self.documents = inputs
-        embeddings = [self._encode_text(doc) for doc in tqdm(inputs)]
-        self.embeddings = F.normalize(torch.tensor(np.stack(embeddings)), p=2, dim=1)
+        self.embeddings = self._encode_documents(inputs)
 
-    def retrieve(self, query: List[str], top_k: int = 5, batch_size: int = -1) -> List[List[str]]:
+    def _retrieve_queries(self, query: List[str], top_k: int = 5, batch_size: int = -1,
+                          with_scores: bool = False) -> List[List[Any]]:
         """
         Retrieve top-k most similar documents.
 
@@ -204,6 +375,7 @@ class GloveRetriever(AutoRetriever):
             query (List[str]): Query texts.
             top_k (int): Number of results per query.
             batch_size (int): Batch size for query computation.
+            with_scores (bool): Return ``(document, cosine similarity)`` pairs.
 
         Returns:
             List[List[str]]: Each entry is a list of top-k matching documents.
@@ -211,8 +383,7 @@ class GloveRetriever(AutoRetriever):
         if self.embeddings is None:
             raise RuntimeError("Documents must be indexed before retrieval.")
 
-        query_vec = [self._encode_text(q) for q in query]
-        query_vec = F.normalize(torch.tensor(np.stack(query_vec)), p=2, dim=1)
+        query_vec = F.normalize(torch.from_numpy(self._encode_texts(query)), p=2, dim=1)
 
         if batch_size == -1:
             batch_size = len(query)
@@ -220,10 +391,13 @@ class GloveRetriever(AutoRetriever):
         results = []
         for i in tqdm(range(0, len(query), batch_size)):
             q_batch = query_vec[i:i + batch_size]
-            sim = cosine_similarity(q_batch, self.embeddings)
-            topk_idx = np.argsort(sim, axis=1)[:, ::-1][:, :top_k]
-
-            for row in topk_idx:
-                results.append([self.documents[j] for j in row])
+            sim = torch.matmul(q_batch, self.embeddings.T).numpy()
+            topk_idx = top_k_indices(sim, top_k)
+
+            for scores, row in zip(sim, topk_idx):
+                if with_scores:
+                    results.append([(self.documents[j], float(scores[j])) for j in row])
+                else:
+                    results.append([self.documents[j] for j in row])
 
         return results
@@ -13,31 +13,126 @@
 # limitations under the License.
 
 from ...base import AutoRetriever, AutoLearner
-from typing import Any, Optional
+from ...utils.quantization import QuantizedEmbeddings
+from typing import Any, List, Optional, Tuple
+import torch
+import torch.nn.functional as F
 import warnings
 
 class AutoRetrieverLearner(AutoLearner):
-    def __init__(self, base_retriever: Any = AutoRetriever(), top_k: int = 5, batch_size: int = -1):
+    pair_compositions = ("concat-projection", "difference", "mean")
+
+    def __init__(self,
+                 base_retriever: Any = AutoRetriever(),
+                 top_k: int = 5,
+                 batch_size: int = -1,
+                 pair_composition: Optional[str] = None,
+                 pair_projection: Optional[Any] = None,
+                 return_scores: bool = False):
+        """
+        Args:
+            base_retriever: Retriever used for indexing and retrieval.
+            top_k: Number of candidates retrieved per query.
+            batch_size: Number of queries scored at once, -1 means all at once.
+            pair_composition: If set, non-taxonomic RE builds (head, tail) pair queries in
+                embedding space from the cached type vectors instead of encoding
+                "Head: ...\nTail: ..." texts. One of 'concat-projection', 'difference' (tail - head) or 'mean'.
+            pair_projection: Matrix of shape [2 * dim, dim] applied to concatenated [head; tail]
+                vectors, e.g. learned on known (head, relation, tail) triples. Required for 'concat-projection'.
+            return_scores: Add the retriever scores to term typing (``"scores"``, aligned with
+                ``"types"``) and taxonomy discovery (``"score"`` per pair) predictions.
+        """
         super().__init__()
+        if pair_composition is not None and pair_composition not in self.pair_compositions:
+            raise ValueError(f"Unknown pair_composition '{pair_composition}'. Choose from {list(self.pair_compositions)}.")
+        if pair_composition == "concat-projection" and pair_projection is None:
+            raise ValueError("pair_composition='concat-projection' needs a pair_projection matrix of shape [2 * dim, dim].")
         self.retriever = base_retriever
         self.top_k = top_k
         self._is_term_typing_fit = False
         self._batch_size = batch_size
+        self.pair_composition = pair_composition
+        self.pair_projection = pair_projection
+        self.return_scores = return_scores
+        self._index_slot = None
+        self._index_states = {}
 
     def load(self, model_id: str = "sentence-transformers/all-MiniLM-L6-v2"):
         self.retriever.load(model_id=model_id)
+        self._index_slot = None
+        self._index_states = {}
+
+    def _switch_index(self, slot: str):
+        """
+        Make `slot` the active index of the retriever, keeping the other indexes aside.
 
-    def _retriever_fit(self, data: Any):
+        Types and relations are indexed in separate slots, so repeated predictions
+        reuse both indexes instead of rebuilding them alternately.
+        """
+        if slot == self._index_slot:
+            return
+        if self._index_slot is not None:
+            self._index_states[self._index_slot] = self.retriever.get_index_state()
+            if slot in self._index_states:
+                self.retriever.set_index_state(self._index_states.pop(slot))
+            else:
+                self.retriever.reset_index()
+        self._index_slot = slot
+
+    def _retriever_fit(self, data: Any, slot: str = "types"):
         if isinstance(data, list) and all(isinstance(item, str) for item in data):
-            self.retriever.index(inputs=data)
+            self._switch_index(slot)
+            self.retriever.update_index(inputs=data)
         else:
             raise TypeError("Expected a list of strings for retriever at term-typing task.")
 
-    def _retriever_predict(self, data:Any, top_k: int) -> Any:
+    def _compose_pair_embeddings(self, pairs: List[Tuple[str, str]]) -> torch.Tensor:
+        """
+        Build (head, tail) pair vectors from the embeddings of the active types index.
+        """
+        embeddings = getattr(self.retriever, self.retriever.embeddings_attribute)
+        if hasattr(embeddings, "toarray"):
+            raise ValueError(f"pair_composition needs dense embeddings, but {type(self.retriever).__name__} "
+                             f"keeps sparse ones; use pair_composition=None with this retriever.")
+        if isinstance(embeddings, QuantizedEmbeddings):
+            embeddings = embeddings.dequantize()
+        embeddings = F.normalize(torch.as_tensor(embeddings).float(), p=2, dim=1)
+        rows = {doc: idx for idx, doc in enumerate(self.retriever.documents)}
+        missing = [term for pair in pairs for term in pair if term not in rows]
+        if missing:
+            raise ValueError(f"Cannot compose pair vectors: type '{missing[0]}' is not in the types index.")
+        heads = embeddings[[rows[head] for head, _ in pairs]]
+        tails = embeddings[[rows[tail] for _, tail in pairs]]
+        if self.pair_composition == "mean":
+            return (heads + tails) / 2
+        if self.pair_composition == "difference":
+            return tails - heads
+        projection = torch.as_tensor(self.pair_projection, dtype=torch.float32)
+        if projection.shape[0] != 2 * embeddings.shape[1]:
+            raise ValueError(f"pair_projection must have {2 * embeddings.shape[1]} rows for [head; tail] "
+                             f"vectors of dimension {embeddings.shape[1]}, got shape {tuple(projection.shape)}.")
+        return torch.cat([heads, tails], dim=1) @ projection.to(embeddings.device)
+
+    def _relation_candidates(self, relations: List[str], pairs: List[Tuple[str, str]],
+                             pairs_query: List[str], **kwargs) -> List[List[str]]:
+        """
+        Retrieve candidate relations for (head, tail) pairs, either from their text
+        queries or, with `pair_composition`, from vectors composed in embedding space.
+        """
+        if self.pair_composition is None:
+            self._retriever_fit(data=relations, slot='relations')
+            return self._retriever_predict(data=pairs_query, top_k=self.top_k, **kwargs)
+        pair_embeddings = self._compose_pair_embeddings(pairs)
+        self._retriever_fit(data=relations, slot='relations')
+        return self.retriever.retrieve_by_embedding(query_embeddings=pair_embeddings, top_k=self.top_k,
+                                                    batch_size=self._batch_size)
+
+    def _retriever_predict(self, data:Any, top_k: int, with_scores: bool = False) -> Any:
+        retrieve = self.retriever.retrieve_with_scores if with_scores else self.retriever.retrieve
         if isinstance(data, list):
-            return self.retriever.retrieve(query=data, top_k=top_k, batch_size=self._batch_size)
+            return retrieve(query=data, top_k=top_k, batch_size=self._batch_size)
         if isinstance(data, str):
-            return self.retriever.retrieve(query=[data], top_k=top_k)
+            return retrieve(query=[data], top_k=top_k)
         raise TypeError(f"Unsupported data type {type(data)}. You should pass a List[str] or a str.")
 
     def _term_typing(self, data: Any, test: bool = False) -> Optional[Any]:
@@ -47,12 +142,16 @@ class AutoRetrieverLearner(AutoLearner):
         """
         if test:
             if self._is_term_typing_fit:
-                types = self._retriever_predict(data=data, top_k=self.top_k)
+                self._switch_index('term-typing')
+                types = self._retriever_predict(data=data, top_k=self.top_k, with_scores=self.return_scores)
+                if self.return_scores:
+                    return [{"term": term, "types": [type for type, _ in scored], "scores": [score for _, score in scored]}
+                            for term, scored in zip(data, types)]
                 return [{"term": term, "types": type} for term, type in zip(data, types)]
             else:
                 raise RuntimeError("Term typing model must be fit before prediction.")
         else:
-            self._retriever_fit(data=data)
+            self._retriever_fit(data=data, slot='term-typing')
             self._is_term_typing_fit = True
 
     def _taxonomy_discovery(self, data: Any, test: bool = False) -> Optional[Any]:
@@ -62,19 +161,19 @@ class AutoRetrieverLearner(AutoLearner):
         """
         if test:
             self._retriever_fit(data=data)
-            candidates_lst =  self._retriever_predict(data=data, top_k=self.top_k + 1)
-            taxonomic_pairs = [{"parent": candidate, "child": query}
+            candidates_lst =  self._retriever_predict(data=data, top_k=self.top_k + 1, with_scores=True)
+            taxonomic_pairs = [({"parent": candidate, "child": query}, score)
                                for query, candidates in zip(data, candidates_lst)
-                               for candidate in candidates if candidate.lower() != query.lower()]
-            taxonomic_pairs += [{"parent": query, "child": candidate}
+                               for candidate, score in candidates if candidate.lower() != query.lower()]
+            taxonomic_pairs += [({"parent": query, "child": candidate}, score)
                                for query, candidates in zip(data, candidates_lst)
-                               for candidate in candidates if candidate.lower() != query.lower()]
+                               for candidate, score in candidates if candidate.lower() != query.lower()]
             unique_taxonomic_pairs, seen = [], set()
-            for pair in taxonomic_pairs:
+            for pair, score in taxonomic_pairs:
                 key = (pair["parent"].lower(), pair["child"].lower()) # Directional key (parent, child)
                 if key not in seen:
                     seen.add(key)
-                    unique_taxonomic_pairs.append(pair)
+                    unique_taxonomic_pairs.append({**pair, "score": score} if self.return_scores else pair)
             return unique_taxonomic_pairs
         else:
             warnings.warn("No requirement for fiting the taxonomy discovery model, the predict module will use the input data to do the fit as well.")
@@ -112,8 +211,8 @@ class AutoRetrieverLearner(AutoLearner):
                             taxonomic_pairs.append((candidate, query))
                             taxonomic_pairs_query.append(f"Head: {candidate}\nTail: {query}")
 
-            self._retriever_fit(data=data['relations'])
-            candidate_relations_lst = self._retriever_predict(data=taxonomic_pairs_query, top_k=self.top_k)
+            candidate_relations_lst = self._relation_candidates(data['relations'], taxonomic_pairs,
+                                                                taxonomic_pairs_query)
             non_taxonomic_re = [{"head": head, "tail": tail, "relation": relation}
                                 for (head, tail), candidate_relations in zip(taxonomic_pairs, candidate_relations_lst)
                                 for relation in candidate_relations]
@@ -141,6 +240,7 @@ class LLMAugmentedRetrieverLearner(AutoRetrieverLearner):
         """
         if test:
             if self._is_term_typing_fit:
+                self._switch_index('term-typing')
                 types = self._retriever_predict(data=data, top_k=self.top_k, task='term-typing')
                 return [{"term": term, "types": type} for term, type in zip(data, types)]
             else:
@@ -205,9 +305,8 @@ class LLMAugmentedRetrieverLearner(AutoRetrieverLearner):
                             taxonomic_pairs.append((candidate, query))
                             taxonomic_pairs_query.append(f"Head: {candidate}\nTail: {query}")
 
-            self._retriever_fit(data=data['relations'])
-            candidate_relations_lst = self._retriever_predict(data=taxonomic_pairs_query, top_k=self.top_k,
-                                                              task='non-taxonomic-re')
+            candidate_relations_lst = self._relation_candidates(data['relations'], taxonomic_pairs,
+                                                                taxonomic_pairs_query, task='non-taxonomic-re')
             non_taxonomic_re = [{"head": head, "tail": tail, "relation": relation}
                                 for (head, tail), candidate_relations in zip(taxonomic_pairs, candidate_relations_lst)
                                 for relation in candidate_relations]
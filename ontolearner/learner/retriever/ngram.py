@@ -13,7 +13,8 @@
 # limitations under the License.
 import logging
 import numpy as np
-from typing import List
+from typing import Any, List
+from sklearn.base import clone
 from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from tqdm import tqdm
@@ -32,8 +33,14 @@ class NgramRetriever(AutoRetriever):
     vectors and ranks documents using cosine similarity. It is simple,
     interpretable, and suitable for small-scale baselines or non-semantic
     text matching.
+
+    The vectorizer vocabulary depends on the whole document set, so incremental
+    index updates re-fit the vectorizer on the updated documents.
     """
 
+    index_attributes = ("documents", "embeddings", "vectorizer")
+    supports_incremental = False
+
     def __init__(self, **vectorizer_kwargs) -> None:
         """
         Initialize the n-gram retriever.
@@ -81,11 +88,14 @@ class NgramRetriever(AutoRetriever):
             self.load(model_id="tfidf")
 
         self.documents = inputs
+        # fit a fresh copy so previously saved index states keep their own fitted vectorizer
+        self.vectorizer = clone(self.vectorizer)
         logger.info("Fitting vectorizer and transforming documents...")
         self.embeddings = self.vectorizer.fit_transform(inputs)
         logger.info(f"Document embeddings created with shape: {self.embeddings.shape}")
 
-    def retrieve(self, query: List[str], top_k: int = 5, batch_size: int = -1) -> List[List[str]]:
+    def _retrieve_queries(self, query: List[str], top_k: int = 5, batch_size: int = -1,
+                          with_scores: bool = False) -> List[List[Any]]:
         """
         Retrieve the most similar documents for each query string.
 
@@ -94,6 +104,7 @@ class NgramRetriever(AutoRetriever):
             top_k (int): Number of most similar documents to return per query.
             batch_size (int): Number of queries to process at once.
                 Use `-1` to process all queries in a single batch.
+            with_scores (bool): Return ``(document, cosine similarity)`` pairs.
 
         Returns:
             List[List[str]]: For each query, a list containing the top-k
@@ -117,7 +128,10 @@ class NgramRetriever(AutoRetriever):
             q_batch = query_vec[i : i + batch_size]
             sim = cosine_similarity(q_batch, self.embeddings)
             topk_idx = np.argsort(sim, axis=1)[:, ::-1][:, :top_k]
-            for row_indices in topk_idx:
-                results.append([self.documents[j] for j in row_indices])
+            for row, row_indices in enumerate(topk_idx):
+                if with_scores:
+                    results.append([(self.documents[j], float(sim[row, j])) for j in row_indices])
+                else:
+                    results.append([self.documents[j] for j in row_indices])
 
         return results
@@ -0,0 +1,165 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import os
+import numpy as np
+
+from pathlib import Path
+from typing import Any, List, Optional, Union
+from tqdm import tqdm
+from gensim.models import KeyedVectors
+
+logger = logging.getLogger(__name__)
+
+
+class MemmapKeyedVectors:
+    """
+    Read-only word vector store backed by a memory-mapped matrix.
+
+    A store is a directory holding two files:
+
+    - ``vocab.txt``: one word per ``"\n"``-terminated line, the line number being the row
+      index. Other line breaks (e.g. ``"\r"``, which some vocabularies contain) are part of a word.
+    - ``vectors.npy``: a ``float32`` or ``float16`` matrix of shape ``(vocab_size, dim)``.
+
+    The vocabulary is loaded into a dictionary, while the matrix is opened with
+    ``np.load(mmap_mode="r")``. Loading is therefore near-instant and processes
+    on the same host share the matrix pages through the OS page cache.
+    Stores are created once with :meth:`from_glove` or :meth:`from_keyed_vectors`.
+    """
+
+    VOCAB_FILE = "vocab.txt"
+    VECTORS_FILE = "vectors.npy"
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """
+        Open an existing vector store.
+
+        Args:
+            path (str | Path): Directory created by one of the conversion methods.
+
+        Raises:
+            FileNotFoundError: If ``path`` is not a vector store.
+            ValueError: If the vocabulary and the matrix have different lengths.
+        """
+        self.path = Path(path)
+        if not self.is_store(self.path):
+            raise FileNotFoundError(f"No vector store found at {self.path}")
+        with open(self.path / self.VOCAB_FILE, "r", encoding="utf8", newline="\n") as f:
+            self.index_to_key: List[str] = f.read().split("\n")
+        self.vectors = np.load(self.path / self.VECTORS_FILE, mmap_mode="r")
+        if len(self.index_to_key) != self.vectors.shape[0]:
+            raise ValueError(f"Vector store {self.path} is inconsistent: {len(self.index_to_key)} words "
+                             f"but {self.vectors.shape[0]} vectors.")
+        self.key_to_index = {word: idx for idx, word in enumerate(self.index_to_key)}
+        self.vector_size = self.vectors.shape[1]
+        logger.info(f"Opened vector store {self.path} with {len(self.index_to_key)} words.")
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.key_to_index
+
+    def __getitem__(self, word: str) -> np.ndarray:
+        return self.vectors[self.key_to_index[word]]
+
+    def __len__(self) -> int:
+        return len(self.index_to_key)
+
+    @classmethod
+    def is_store(cls, path: Union[str, Path]) -> bool:
+        """Return ``True`` if ``path`` is a directory holding a vector store."""
+        path = Path(path)
+        return (path / cls.VOCAB_FILE).is_file() and (path / cls.VECTORS_FILE).is_file()
+
+    @classmethod
+    def _write(cls, path: Union[str, Path], words: List[str], vectors: Optional[np.ndarray] = None) -> None:
+        """
+        Write vocabulary and matrix, renaming them into place so readers never see
+        partial files. ``vectors=None`` means the temporary matrix is already on disk.
+        """
+        path = Path(path)
+        invalid = next((word for word in words if "\n" in word), None)
+        if invalid is not None:
+            raise ValueError(f"Word {invalid!r} contains a newline and cannot be stored in {cls.VOCAB_FILE}.")
+        path.mkdir(parents=True, exist_ok=True)
+        tmp_vocab = path / f"{cls.VOCAB_FILE}.tmp"
+        with open(tmp_vocab, "w", encoding="utf8", newline="\n") as f:
+            f.write("\n".join(words))
+        if vectors is not None:
+            np.save(path / f"{cls.VECTORS_FILE}.tmp.npy", vectors)
+        os.replace(path / f"{cls.VECTORS_FILE}.tmp.npy", path / cls.VECTORS_FILE)
+        os.replace(tmp_vocab, path / cls.VOCAB_FILE)
+
+    @classmethod
+    def from_glove(cls, glove_path: str, path: Union[str, Path], dtype: str = "float32") -> "MemmapKeyedVectors":
+        """
+        Convert a GloVe text file into a vector store.
+
+        The file is read twice: once to count words and detect the dimension,
+        and once to fill a preallocated on-disk matrix, so the full vector set
+        is never held in memory.
+
+        Args:
+            glove_path (str): Path to a GloVe ``.txt`` file, e.g. ``glove.6B.300d.txt``.
+            path (str | Path): Output directory of the store.
+            dtype (str): Storage dtype, ``"float32"`` or ``"float16"``.
+
+        Returns:
+            MemmapKeyedVectors: The opened store.
+        """
+        logger.info(f"Converting GloVe embeddings from {glove_path} into {path} ...")
+        size, dim = 0, None
+        with open(glove_path, "r", encoding="utf8", newline="\n") as f:
+            for line in f:
+                if dim is None:
+                    dim = len(line.rstrip().split(" ")) - 1
+                size += 1
+        if dim is None:
+            raise ValueError(f"GloVe file {glove_path} is empty.")
+
+        Path(path).mkdir(parents=True, exist_ok=True)
+        vectors = np.lib.format.open_memmap(Path(path) / f"{cls.VECTORS_FILE}.tmp.npy",
+                                            mode="w+", dtype=np.dtype(dtype), shape=(size, dim))
+        words = []
+        with open(glove_path, "r", encoding="utf8", newline="\n") as f:
+            for idx, line in enumerate(tqdm(f, total=size)):
+                values = line.rstrip().split(" ")
+                # some GloVe releases contain tokens with inner spaces
+                words.append(" ".join(values[:-dim]))
+                vectors[idx] = np.asarray(values[-dim:], dtype=np.float32)
+        vectors.flush()
+        del vectors
+        cls._write(path, words)
+        return cls(path)
+
+    @classmethod
+    def from_keyed_vectors(cls, keyed_vectors: Any, path: Union[str, Path], dtype: str = "float32",
+                           binary: bool = True) -> "MemmapKeyedVectors":
+        """
+        Convert gensim ``KeyedVectors`` into a vector store.
+
+        Args:
+            keyed_vectors (KeyedVectors | str): A loaded model or a path to a
+                Word2Vec-format file.
+            path (str | Path): Output directory of the store.
+            dtype (str): Storage dtype, ``"float32"`` or ``"float16"``.
+            binary (bool): Whether the Word2Vec file at ``keyed_vectors`` is binary.
+
+        Returns:
+            MemmapKeyedVectors: The opened store.
+        """
+        if isinstance(keyed_vectors, (str, Path)):
+            keyed_vectors = KeyedVectors.load_word2vec_format(keyed_vectors, binary=binary)
+        logger.info(f"Converting {len(keyed_vectors.index_to_key)} word vectors into {path} ...")
+        cls._write(path, list(keyed_vectors.index_to_key), keyed_vectors.vectors.astype(dtype, copy=False))
+        return cls(path)
@@ -25,6 +25,7 @@ from tqdm import tqdm
 from torch.cuda.amp import GradScaler
 
 from ...base import AutoLearner
+from ...utils.model_pool import load_sentence_transformer, release_model
 
 
 class RMSNorm(nn.Module):
@@ -191,9 +192,11 @@ class AlexbekCrossAttnLearner(AutoLearner):
             torch.cuda.manual_seed_all(self.seed)
 
     def load(self, **kwargs: Any):
-        """Load the sentence embedding model and initialize the cross-attention head."""
+        """Load the sentence embedding model (from the model pool; it is never trained) and initialize the cross-attention head."""
         model_id = kwargs.get("embedding_model", self.embedding_model_id)
-        self.embedder = SentenceTransformer(model_id, trust_remote_code=True, device=str(self.device))
+        embedder = load_sentence_transformer(model_id, owner=self, trust_remote_code=True, device=str(self.device))
+        release_model(self.embedder, owner=self)
+        self.embedder = embedder
 
         probe_embedding = self.embedder.encode(["_dim_probe_"],
                                                convert_to_tensor=True,
@@ -235,8 +238,9 @@ class AlexbekCrossAttnLearner(AutoLearner):
 
         # Load embedder if not already loaded
         if self.embedder is None:
-            self.embedder = SentenceTransformer(
+            self.embedder = load_sentence_transformer(
                 self.embedding_model_id,
+                owner=self,
                 trust_remote_code=True,
                 device=str(self.device)
             )
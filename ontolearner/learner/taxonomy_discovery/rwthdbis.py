@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import json
 import os
 import random
@@ -38,6 +39,7 @@ from transformers import (
 )
 
 from ...base import AutoLearner
+from ...utils.cpu_inference import CPUInferenceProfile
 
 
 class RWTHDBISSFTLearner(AutoLearner):
@@ -76,6 +78,8 @@ class RWTHDBISSFTLearner(AutoLearner):
         ontology_name: Logical dataset/domain label used in prompts and filtering
             (filenames still use the fixed `rwthdbis_onto_*` prefix).
         device: user-defined argument as 'cuda' or 'cpu'.
+        cpu_profile: CPU inference settings (int8 quantization, compilation/ONNX, threads)
+            applied to the model used for prediction when `device` is 'cpu'.
         model: Loaded/initialized `AutoModelForSequenceClassification`.
         tokenizer: Loaded/initialized `AutoTokenizer`.
     """
@@ -130,6 +134,7 @@ class RWTHDBISSFTLearner(AutoLearner):
         bidirectional_templates: bool = True,
         context_json_path: Optional[str] = None,
         ontology_name: str = "Geonames",
+        cpu_profile: Optional[CPUInferenceProfile] = None,
     ) -> None:
         """
         Initialize the taxonomy-edge learner and set training/inference knobs.
@@ -171,7 +176,9 @@ class RWTHDBISSFTLearner(AutoLearner):
 
         self.ontology_name = ontology_name
         self.device = device
+        self.cpu_profile = cpu_profile
         self.model: Optional[AutoModelForSequenceClassification] = None
+        self._cpu_model: Optional[Any] = None
         self.tokenizer: Optional[AutoTokenizer] = None
 
         # Context caches built from the context JSON.
@@ -1123,6 +1130,7 @@ class RWTHDBISSFTLearner(AutoLearner):
         trainer.save_model()
         # Persist tokenizer alongside the model for from_pretrained() loads.
         self.tokenizer.save_pretrained(self.output_dir)
+        self._cpu_model = None
 
 ################################################################################
 #  Model Inference ##########################################################
@@ -1146,6 +1154,7 @@ class RWTHDBISSFTLearner(AutoLearner):
 
         self._ensure_loaded_for_inference()
         model_device = next(self.model.parameters()).device
+        model = self._inference_model()
 
         candidate_pairs = self._extract_pairs_for_eval(eval_data)
         if not candidate_pairs:
@@ -1165,7 +1174,7 @@ class RWTHDBISSFTLearner(AutoLearner):
                     max_length=self.max_length,
                 )
                 inputs = {key: tensor.to(model_device) for key, tensor in inputs.items()}
-                logits = self.model(**inputs).logits
+                logits = model(**inputs).logits
                 probabilities = F.softmax(logits, dim=-1).squeeze(0)
                 p_positive = float(probabilities[1].item())
                 predicted_label = int(torch.argmax(logits, dim=-1).item())
@@ -1207,3 +1216,14 @@ class RWTHDBISSFTLearner(AutoLearner):
             and getattr(self.model.config, "pad_token_id", None) is not None
         ):
             self.tokenizer.pad_token_id = self.model.config.pad_token_id
+
+    def _inference_model(self) -> Any:
+        """
+        Model used for prediction: `self.model`, or its CPU-optimized copy when
+        a `cpu_profile` is set and `device` is 'cpu' (built once, reset by training).
+        """
+        if self.cpu_profile is None or str(self.device) != "cpu":
+            return self.model
+        if self._cpu_model is None:
+            self._cpu_model = self.cpu_profile.apply(copy.deepcopy(self.model), self.tokenizer)
+        return self._cpu_model
@@ -2,13 +2,15 @@
 # License: MIT
 
 import os
-import re
 import json
 from typing import Any, Dict, List, Optional
 
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
+from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig, StoppingCriteriaList
 from ...base import AutoLearner
+from ...utils.completion_cache import cached_generate
+from ...utils.model_pool import load_causal_lm, release_model
+from ...utils.structured_output import JsonStoppingCriteria, parse_json_value
 
 
 class SBUNLPFewShotLearner(AutoLearner):
@@ -36,6 +38,7 @@ class SBUNLPFewShotLearner(AutoLearner):
         top_p: float = 1.0,
         limit_num_prompts: Optional[int] = None,
         output_dir: Optional[str] = None,
+        llm: Optional[Any] = None,
         **kwargs: Any,
     ) -> None:
         """
@@ -53,6 +56,8 @@ class SBUNLPFewShotLearner(AutoLearner):
             top_p: Nucleus sampling parameter (used when temperature > 0).
             limit_num_prompts: Optional hard cap on prompts issued (debug/cost).
             output_dir: Optional directory to save per-batch JSON predictions.
+            llm: Optional served LLM (e.g. :class:`ServerLLM`) completing the prompts instead of an
+                in-process model; only the tokenizer (for the chat template) is loaded locally.
             **kwargs: Forwarded to the base class.
         """
         super().__init__(**kwargs)
@@ -68,6 +73,7 @@ class SBUNLPFewShotLearner(AutoLearner):
         self.top_p = top_p
         self.limit_num_prompts = limit_num_prompts
         self.output_dir = output_dir
+        self.llm = llm
 
         self.tokenizer: Optional[AutoTokenizer] = None
         self.model: Optional[AutoModelForCausalLM] = None
@@ -163,14 +169,21 @@ class SBUNLPFewShotLearner(AutoLearner):
             elif getattr(self.tokenizer, "unk_token", None) is not None:
                 self.tokenizer.pad_token = self.tokenizer.unk_token
 
-        self.model = AutoModelForCausalLM.from_pretrained(
+        if self.llm is not None:
+            self.llm.load(self.model_name)
+            return
+        # shared with other learners loading the same model and settings
+        model = load_causal_lm(
             self.model_name,
+            owner=self,
             device_map=("auto" if self.device == "cuda" else None),
             torch_dtype=(torch.float16 if self.device == "cuda" else torch.float32),
             quantization_config=quant_config,
         )
         if self.device == "cpu":
-            self.model.to("cpu")
+            model.to("cpu")
+        release_model(self.model, owner=self)
+        self.model = model
 
     def _format_chat(self, user_text: str) -> str:
         """
@@ -213,6 +226,25 @@ class SBUNLPFewShotLearner(AutoLearner):
         Returns:
             Model continuation string (prompt-echo stripped when applicable).
         """
+        if self.llm is not None:
+            return self._generate_many([prompt_text])[0]
+        generation_kwargs = {"backend": type(self).__name__, "max_input_tokens": self.max_input_tokens,
+                             "max_new_tokens": self.max_new_tokens, "do_sample": self.temperature > 0.0,
+                             "temperature": self.temperature, "top_p": self.top_p, "stop": "json"}
+        return cached_generate(self.model, [prompt_text],
+                               lambda prompts: [self._generate_uncached(prompt) for prompt in prompts],
+                               generation_kwargs)[0]
+
+    def _generate_many(self, prompts: List[str]) -> List[str]:
+        """Generate for several prompts; a served LLM completes them concurrently."""
+        if self.llm is None:
+            return [self._generate(prompt) for prompt in prompts]
+        return self.llm.complete([self._format_chat(prompt) for prompt in prompts],
+                                 max_new_tokens=self.max_new_tokens, temperature=self.temperature, top_p=self.top_p)
+
+    @torch.no_grad()
+    def _generate_uncached(self, prompt_text: str) -> str:
+        """Run :meth:`_generate` without the completion cache."""
         formatted = self._format_chat(prompt_text)
         ids = self.tokenizer(formatted, add_special_tokens=False, return_tensors=None)[
             "input_ids"
@@ -231,6 +263,8 @@ class SBUNLPFewShotLearner(AutoLearner):
             pad_token_id=self.tokenizer.pad_token_id,
             eos_token_id=getattr(self.tokenizer, "eos_token_id", None),
             use_cache=True,
+            stopping_criteria=StoppingCriteriaList(
+                [JsonStoppingCriteria(self.tokenizer, input_ids.shape[1], types=(list,))]),
         )
 
         decoded_full = self.tokenizer.decode(out[0], skip_special_tokens=True)
@@ -287,7 +321,7 @@ class SBUNLPFewShotLearner(AutoLearner):
 
         Parsing strategy:
           1) Try to parse the entire string as JSON; expect a list.
-          2) Else, regex-extract the outermost JSON-like array and parse that.
+          2) Else, parse the first complete JSON array in the text.
           3) On failure, return an empty list.
 
         Args:
@@ -303,15 +337,8 @@ class SBUNLPFewShotLearner(AutoLearner):
                 return self._clean_pairs(obj)
         except Exception:
             pass
-        m = re.search(r"\[\s*(?:\{[\s\S]*?\}\s*,?\s*)*\]", text)
-        if m:
-            try:
-                obj = json.loads(m.group(0))
-                if isinstance(obj, list):
-                    return self._clean_pairs(obj)
-            except Exception:
-                pass
-        return []
+        obj = parse_json_value(text, types=(list,))
+        return self._clean_pairs(obj) if obj is not None else []
 
     def fit(self, train_data: Any, task: str, ontologizer: bool = True):
         """
@@ -362,7 +389,7 @@ class SBUNLPFewShotLearner(AutoLearner):
         """
         if not test:
             return None
-        if self.model is None or self.tokenizer is None:
+        if self.tokenizer is None or (self.model is None and self.llm is None):
             self.load()
 
         if isinstance(data, list) and (len(data) == 0 or isinstance(data[0], str)):
@@ -378,25 +405,26 @@ class SBUNLPFewShotLearner(AutoLearner):
         self._ensure_dir(self.output_dir)
 
         merged: List[Dict[str, str]] = []
-        issued = 0
+        cells = []
 
         for ti, tr in enumerate(train_chunks, 1):
             for si, ts in enumerate(test_chunks, 1):
-                issued += 1
-                if self.limit_num_prompts and issued > self.limit_num_prompts:
+                if self.limit_num_prompts and len(cells) >= self.limit_num_prompts:
                     break
-                prompt = self._build_prompt(tr, ts)
-                resp = self._generate(prompt)
-                pairs = self._parse_pairs(resp)
+                cells.append((ti, si, self._build_prompt(tr, ts)))
 
-                if self.output_dir:
-                    path = os.path.join(self.output_dir, f"pairs_T{ti}_S{si}.json")
-                    with open(path, "w", encoding="utf-8") as f:
-                        json.dump(pairs, f, ensure_ascii=False, indent=2)
+            if self.limit_num_prompts and len(cells) >= self.limit_num_prompts:
+                break
 
-                merged.extend(pairs)
+        responses = self._generate_many([prompt for _, _, prompt in cells])
+        for (ti, si, _), resp in zip(cells, responses):
+            pairs = self._parse_pairs(resp)
 
-            if self.limit_num_prompts and issued >= (self.limit_num_prompts or 0):
-                break
+            if self.output_dir:
+                path = os.path.join(self.output_dir, f"pairs_T{ti}_S{si}.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(pairs, f, ensure_ascii=False, indent=2)
+
+            merged.extend(pairs)
 
         return self._clean_pairs(merged)
@@ -11,6 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import copy
 import os
 import re
 import random
@@ -23,7 +24,6 @@ from typing import Any, Optional, List, Tuple, Dict
 from transformers import (
     AutoTokenizer,
     AutoModelForSequenceClassification,
-    AutoModelForCausalLM,
     BertTokenizer,
     BertForSequenceClassification,
     pipeline,
@@ -33,6 +33,10 @@ from transformers import (
 from tqdm import tqdm
 from ...base import AutoLearner, AutoPrompt
 from ...utils import taxonomy_split, train_test_split as ontology_split
+from ...utils.completion_cache import cached_generate
+from ...utils.constrained_decoding import LabelTrie
+from ...utils.cpu_inference import CPUInferenceProfile
+from ...utils.model_pool import load_causal_lm, release_model
 from ...data_structure import OntologyData, TaxonomicRelation
 
 
@@ -112,6 +116,7 @@ class SKHNLPSequentialFTLearner(AutoLearner):
             load_best_model_at_end: bool = True,
             use_fast_tokenizer: Optional[bool] = None,
             trust_remote_code: bool = False,
+            cpu_profile: Optional[CPUInferenceProfile] = None,
     ) -> None:
         """Configure the sequential fine-tuning learner.
 
@@ -136,6 +141,8 @@ class SKHNLPSequentialFTLearner(AutoLearner):
             save_strategy: Checkpoint save schedule ('no', 'steps', 'epoch').
             load_best_model_at_end: Whether to restore the best checkpoint.
             use_fast_tokenizer: Force fast/slow tokenizer. If None, try fast then fallback to slow.
+            cpu_profile: CPU inference settings (int8 quantization, compilation/ONNX, threads) applied
+                to a copy of the fine-tuned model used for prediction on CPU; training is unaffected.
         Notes:
             The model is fine-tuned *sequentially* across prompt columns.
             You can control the eval split and negative sampling mix via
@@ -159,6 +166,8 @@ class SKHNLPSequentialFTLearner(AutoLearner):
 
         self.tokenizer: Optional[BertTokenizer] = None
         self.model: Optional[BertForSequenceClassification] = None
+        self.cpu_profile = cpu_profile
+        self._cpu_model: Optional[Any] = None
         self.prompter = SKHNLPTaxonomyPrompts()
 
         # Candidate parents (unique parent list) for multi-class parent selection.
@@ -245,6 +254,15 @@ class SKHNLPSequentialFTLearner(AutoLearner):
 
         # Move to target device
         self.model.to(self.device)
+        self._cpu_model = None
+
+    def _inference_model(self) -> Any:
+        """Model used for prediction: ``self.model``, or its CPU-optimized copy when a ``cpu_profile`` is set."""
+        if self.cpu_profile is None or str(self.model.device) != "cpu":
+            return self.model
+        if self._cpu_model is None:
+            self._cpu_model = self.cpu_profile.apply(copy.deepcopy(self.model), self.tokenizer)
+        return self._cpu_model
 
     def tasks_ground_truth_former(self, data: Any, task: str) -> Any:
         """Normalize ground-truth inputs for 'taxonomy-discovery'.
@@ -437,7 +455,7 @@ class SKHNLPSequentialFTLearner(AutoLearner):
             True iff the predicted class index is 1 (positive).
         """
         enc = self.tokenizer(sentence, return_tensors="pt").to(self.model.device)
-        logits = self.model(**enc).logits
+        logits = self._inference_model()(**enc).logits
         predicted_label = torch.argmax(logits, dim=1).item()
         return predicted_label == 1
 
@@ -529,7 +547,7 @@ class SKHNLPSequentialFTLearner(AutoLearner):
         ).to(self.model.device)
 
         # Single forward pass for all prompts
-        logits = self.model(**encodings).logits
+        logits = self._inference_model()(**encodings).logits
 
         # Get probabilities for the "True" class (index 1)
         true_probs = torch.softmax(logits, dim=1)[:, 1]
@@ -592,7 +610,7 @@ class SKHNLPSequentialFTLearner(AutoLearner):
                 ).to(self.model.device)
 
                 # Forward pass on chunk
-                logits = self.model(**encodings).logits
+                logits = self._inference_model()(**encodings).logits
                 true_probs = torch.softmax(logits, dim=1)[:, 1]
                 all_true_probs.append(true_probs.cpu())  # Move to CPU to free GPU memory
 
@@ -688,7 +706,7 @@ class SKHNLPSequentialFTLearner(AutoLearner):
                     truncation=True,
                 ).to(self.model.device)
                 with torch.no_grad():
-                    logits = self.model(**enc).logits
+                    logits = self._inference_model()(**enc).logits
                     true_probs_by_prompt.append(torch.softmax(logits, dim=1)[:, 1])
 
             avg_true_prob = torch.stack(true_probs_by_prompt, dim=0).mean(0)
@@ -808,6 +826,7 @@ class SKHNLPSequentialFTLearner(AutoLearner):
                 eval_dataset=eval_ds,
             )
             trainer.train()
+        self._cpu_model = None
 
         self._last_train = train_df
         self._last_eval = eval_df
@@ -827,6 +846,9 @@ class SKHNLPZSLearner(AutoLearner):
         * "substring"   : snap to a label if either is a substring of the other
         * "levenshtein" : snap to the closest label by edit distance
         * "auto"        : substring, then Levenshtein if needed
+    - With `constrained=True`, generation is restricted to '#[label]#' for the labels
+      of `CLASS_LIST` (see `LabelTrie`): every prediction is a valid label, generation
+      stops after the closing '#', and no normalization is needed.
     - Saves raw and normalized predictions to CSV if `save_path` is provided.
 
     Inputs the learner accepts (via `_to_dataframe`):
@@ -861,6 +883,7 @@ class SKHNLPZSLearner(AutoLearner):
         verbose: bool = True,
         normalize_mode: str = "none",  # "none" | "substring" | "levenshtein" | "auto"
         random_state: int = 1403,
+        constrained: bool = False,
     ) -> None:
         """Configure the zero-shot learner.
 
@@ -873,9 +896,12 @@ class SKHNLPZSLearner(AutoLearner):
             normalize_mode: Post-processing for class names
                 ('none' | 'substring' | 'levenshtein' | 'auto').
             random_state: RNG seed for any sampling steps.
+            constrained: Restrict generation to the '#[label]#' answers of `CLASS_LIST`.
         """
         super().__init__()
         self.model_name = model_name
+        self.constrained = constrained
+        self._label_trie: Optional[LabelTrie] = None
         self.verbose = verbose
         self.max_new_tokens = max_new_tokens
         self.save_path = save_path
@@ -934,11 +960,15 @@ class SKHNLPZSLearner(AutoLearner):
         if self._tokenizer.pad_token_id is None and self._tokenizer.eos_token_id is not None:
             self._tokenizer.pad_token = self._tokenizer.eos_token
 
-        self._model = AutoModelForCausalLM.from_pretrained(
+        # shared with other learners loading the same model and settings
+        model = load_causal_lm(
             model_id,
+            owner=self,
             device_map=self._model_device_map,
             torch_dtype="auto",
         )
+        release_model(self._model, owner=self)
+        self._model = model
 
         self._pipeline = pipeline(
             task="text-generation",
@@ -1045,19 +1075,39 @@ class SKHNLPZSLearner(AutoLearner):
             add_generation_prompt=True,
         )
 
-        generation = self._pipeline(prompt,
-                                    max_new_tokens=self.max_new_tokens,
-                                    do_sample=False,
-                                    temperature=0.0,
-                                    top_p=1.0,
-                                    eos_token_id=self._tokenizer.eos_token_id,
-                                    pad_token_id=self._tokenizer.eos_token_id,
-                                    return_full_text=False)[0]["generated_text"]
+        if self.constrained:
+            trie = self._class_trie()
+            generation = cached_generate(
+                self._model, [prompt],
+                lambda prompts: [f"#[{labels[0]}]#" if labels else ""
+                                 for labels in trie.generate(self._model, self._tokenizer(
+                                     prompts, return_tensors="pt").to(self._model.device))],
+                {"backend": type(self).__name__, "constrained": self.CLASS_LIST})[0]
+            match = self._PREDICTION_PATTERN.search(generation)
+            return generation, match.group(1).strip() if match else "unknown"
+
+        generation = cached_generate(
+            self._pipeline.model, [prompt],
+            lambda prompts: [self._pipeline(text,
+                                            max_new_tokens=self.max_new_tokens,
+                                            do_sample=False,
+                                            temperature=0.0,
+                                            top_p=1.0,
+                                            eos_token_id=self._tokenizer.eos_token_id,
+                                            pad_token_id=self._tokenizer.eos_token_id,
+                                            return_full_text=False)[0]["generated_text"] for text in prompts],
+            {"backend": type(self).__name__, "max_new_tokens": self.max_new_tokens, "do_sample": False})[0]
 
         match = self._PREDICTION_PATTERN.search(generation)
         parsed = match.group(1).strip() if match else "unknown"
         return generation, parsed
 
+    def _class_trie(self) -> LabelTrie:
+        """Label trie over the '#[label]#' answers, built once per tokenizer."""
+        if self._label_trie is None or self._label_trie.tokenizer is not self._tokenizer:
+            self._label_trie = LabelTrie(self._tokenizer, self.CLASS_LIST, answer_format="#[{label}]#")
+        return self._label_trie
+
     def _normalize_substring_only(self, text: str) -> str:
         """
         Snap to a label if the string is equal to / contained in / contains a valid label (case-insensitive).
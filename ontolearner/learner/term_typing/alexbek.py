@@ -47,6 +47,8 @@ from transformers import AutoTokenizer, AutoModel, AutoModelForCausalLM
 from sentence_transformers import SentenceTransformer
 
 from ...base import AutoLearner, AutoRetriever
+from ...utils.constrained_decoding import LabelTrie
+from ...utils.model_pool import get_model_pool, load_sentence_transformer, pool_key, release_model
 
 
 class AlexbekRFLearner(AutoRetriever):
@@ -124,8 +126,12 @@ class AlexbekRFLearner(AutoRetriever):
         """
         self.model_name = model_id
         self.tokenizer = AutoTokenizer.from_pretrained(model_id)
-        self.embedding_model = AutoModel.from_pretrained(model_id)
-        self.embedding_model.eval().to(self.device)
+        # the encoder is only used for inference, so it is shared through the model pool
+        embedding_model = get_model_pool().acquire(pool_key(AutoModel.__name__, model_id, device=str(self.device)),
+                                                   lambda: AutoModel.from_pretrained(model_id).eval().to(self.device),
+                                                   owner=self)
+        release_model(self.embedding_model, owner=self)
+        self.embedding_model = embedding_model
 
     def fit(self, data: Any, task: str, ontologizer: bool = True, **_: Any) -> None:
         """Train the One-vs-Rest RandomForest on term embeddings (+ optional graph features).
@@ -702,6 +708,10 @@ class AlexbekRAGLearner(AutoLearner):
     Returns
     List[Dict[str, Any]]
         `{"term": str, "types": List[str], "id": Optional[str]}` rows.
+
+    With `constrained=True` the LLM does not write a JSON answer: its generation is
+    restricted to up to `max_types` comma-separated types seen during `fit`
+    (see `LabelTrie`), so nothing is parsed and no tokens are spent on reasoning.
     """
 
     def __init__(
@@ -714,6 +724,8 @@ class AlexbekRAGLearner(AutoLearner):
         max_new_tokens: int = 256,
         gen_batch_size: int = 4,  # generation batch size
         enc_batch_size: int = 64,  # embedding batch size
+        constrained: bool = False,
+        max_types: int = 3,
         **kwargs: Any,  # absorb extra pipeline-style args
     ) -> None:
         """Configure the RAG learner.
@@ -735,6 +747,10 @@ class AlexbekRAGLearner(AutoLearner):
             Number of prompts per generation batch.
         enc_batch_size:
             Number of texts per embedding batch.
+        constrained:
+            Restrict generation to types seen during `fit`.
+        max_types:
+            Maximum number of types per term with `constrained=True`.
         **kwargs:
             Extra configuration captured for downstream use.
         """
@@ -750,6 +766,8 @@ class AlexbekRAGLearner(AutoLearner):
             "max_new_tokens": int(max_new_tokens),
             "gen_batch_size": int(gen_batch_size),
             "enc_batch_size": int(enc_batch_size),
+            "constrained": bool(constrained),
+            "max_types": int(max_types),
         }
         self.extra_cfg: Dict[str, Any] = dict(kwargs)
 
@@ -765,6 +783,9 @@ class AlexbekRAGLearner(AutoLearner):
         # Training cache of (term, [types]) tuples
         self.train_term_types: List[Tuple[str, List[str]]] = []
 
+        # Constrained decoding over the training types (built on first use)
+        self._label_trie: Optional[LabelTrie] = None
+
         # Prompt templates
         self._system_prompt: str = (
             "You are an expert in ontologies and semantic term classification.\n"
@@ -829,25 +850,38 @@ class AlexbekRAGLearner(AutoLearner):
             self.tokenizer.pad_token = self.tokenizer.eos_token
 
         # LLM
-        self.generation_model = AutoModelForCausalLM.from_pretrained(
-            self.cfg["llm_model_id"],
-            device_map=device_map,
-            torch_dtype=torch_dtype,
-            token=self.cfg["token"],
-        )
+        def load_generation_model() -> Any:
+            model = AutoModelForCausalLM.from_pretrained(
+                self.cfg["llm_model_id"],
+                device_map=device_map,
+                torch_dtype=torch_dtype,
+                token=self.cfg["token"],
+            )
 
-        # Deterministic decoding defaults
-        generation_cfg = self.generation_model.generation_config
-        generation_cfg.do_sample = False
-        generation_cfg.temperature = None
-        generation_cfg.top_p = None
-        generation_cfg.top_k = None
-        generation_cfg.num_beams = 1
+            # Deterministic decoding defaults
+            generation_cfg = model.generation_config
+            generation_cfg.do_sample = False
+            generation_cfg.temperature = None
+            generation_cfg.top_p = None
+            generation_cfg.top_k = None
+            generation_cfg.num_beams = 1
+            return model
+
+        # models come from the model pool; the LLM is pooled with its greedy generation defaults
+        pool = get_model_pool()
+        generation_model = pool.acquire(pool_key(AutoModelForCausalLM.__name__, self.cfg["llm_model_id"],
+                                                 device_map=device_map, torch_dtype=torch_dtype,
+                                                 generation="greedy"),
+                                        load_generation_model, owner=self)
+        release_model(self.generation_model, owner=self)
+        self.generation_model = generation_model
 
         # Retriever
-        self.embedder = SentenceTransformer(
-            self.cfg["retriever_model_id"], trust_remote_code=True
+        embedder = load_sentence_transformer(
+            self.cfg["retriever_model_id"], owner=self, trust_remote_code=True
         )
+        release_model(self.embedder, owner=self)
+        self.embedder = embedder
 
     def fit(self, train_data: Any, task: str, ontologizer: bool = True) -> None:
         """Prepare the retrieval index from training examples.
@@ -1156,11 +1190,17 @@ class AlexbekRAGLearner(AutoLearner):
         user_block = self._user_prompt_template.format(
             examples=examples_block, term=term
         )
+        if self.cfg["constrained"]:
+            # the answer is generated as a type list right after this cue
+            return f"{self._system_prompt}\n\n{user_block}\nTYPES:"
         return f"{self._system_prompt}\n\n{user_block}\n"
 
     def _generate_and_parse(self, prompts: List[str]) -> List[List[str]]:
         """Run generation for a batch of prompts and parse the JSON `'types'` from outputs.
 
+        With `constrained=True`, generation is restricted to the training types and the
+        types are read from the label trie instead.
+
         Parameters
         prompts:
             Finalized prompts for the LLM.
@@ -1182,6 +1222,10 @@ class AlexbekRAGLearner(AutoLearner):
             ).to(model_device)
             input_token_length = encodings["input_ids"].shape[1]
 
+            if self.cfg["constrained"]:
+                all_predicted_types.extend(self._types_trie().generate(self.generation_model, encodings))
+                continue
+
             # Deterministic decoding (greedy)
             with torch.no_grad():
                 generated_tokens = self.generation_model.generate(
@@ -1209,6 +1253,16 @@ class AlexbekRAGLearner(AutoLearner):
 
         return all_predicted_types
 
+    def _types_trie(self) -> LabelTrie:
+        """Label trie over the training types, rebuilt when they or the tokenizer change."""
+        labels = sorted({t for _, types in self.train_term_types for t in types})
+        trie = self._label_trie
+        if trie is None or trie.tokenizer is not self.tokenizer or trie.labels != labels:
+            trie = LabelTrie(self.tokenizer, labels, context="TYPES:", answer_format=" {label}",
+                             separator=",", max_labels=int(self.cfg["max_types"]))
+            self._label_trie = trie
+        return trie
+
     def _parse_types(self, text: str) -> List[str]:
         """Extract a list of type strings from LLM output.
 
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import os
 import random
 from typing import Any, Callable, Dict, List, Optional, Tuple
@@ -37,6 +38,7 @@ import g4f
 from g4f.client import Client as _G4FClient
 
 from ...base import AutoLearner
+from ...utils.cpu_inference import CPUInferenceProfile
 
 
 
@@ -69,6 +71,7 @@ class RWTHDBISSFTLearner(AutoLearner):
         train_method: int = 2,
         context_json_path: Optional[str] = None,
         ontology_name: str = "Geonames",
+        cpu_profile: Optional[CPUInferenceProfile] = None,
     ) -> None:
         """Initialize the term-typing learner and configure training defaults.
 
@@ -90,6 +93,8 @@ class RWTHDBISSFTLearner(AutoLearner):
             bf16: Enable mixed precision (BF16) if supported.
             seed: Random seed for reproducibility.
             train_method: Training method selector (see _train_from_term_typings).
+            cpu_profile: CPU inference settings (int8 quantization, compilation/ONNX, threads)
+                applied to the model used for prediction when `device` is 'cpu'.
 
         Side Effects:
             Creates `output_dir` if it does not exist.
@@ -122,7 +127,9 @@ class RWTHDBISSFTLearner(AutoLearner):
         self.ontology_name = ontology_name
 
         self.device = device
+        self.cpu_profile = cpu_profile
         self.model: Optional[AutoModelForSequenceClassification] = None
+        self._cpu_model: Optional[Any] = None
         self.tokenizer: Optional[AutoTokenizer] = None
         self.id2label: Dict[int, str] = {}
         self.label2id: Dict[str, int] = {}
@@ -1034,6 +1041,7 @@ class RWTHDBISSFTLearner(AutoLearner):
         trainer.train()
         trainer.save_model(self.output_dir)
         self.tokenizer.save_pretrained(self.output_dir)
+        self._cpu_model = None
 
     def _ensure_loaded_for_inference(self) -> None:
         """Load model/tokenizer for inference if not already loaded.
@@ -1058,6 +1066,14 @@ class RWTHDBISSFTLearner(AutoLearner):
 
         self.model.to(self.device).eval()
 
+    def _inference_model(self) -> Any:
+        """Model used for prediction: `self.model`, or its CPU-optimized copy when a `cpu_profile` is set."""
+        if self.cpu_profile is None or str(self.device) != "cpu":
+            return self.model
+        if self._cpu_model is None:
+            self._cpu_model = self.cpu_profile.apply(copy.deepcopy(self.model), self.tokenizer)
+        return self._cpu_model
+
     #####################
     #  Model Inference ##
     #####################
@@ -1075,6 +1091,7 @@ class RWTHDBISSFTLearner(AutoLearner):
         """
         self._ensure_loaded_for_inference()
         model_device = next(self.model.parameters()).device
+        model = self._inference_model()
         predictions: List[int] = []
         for term_text in tqdm(
             terms, desc="Inference", bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt}"
@@ -1087,7 +1104,7 @@ class RWTHDBISSFTLearner(AutoLearner):
             )
             inputs = {name: tensor.to(model_device) for name, tensor in inputs.items()}
             with torch.no_grad():
-                logits = self.model(**inputs).logits
+                logits = model(**inputs).logits
                 predictions.append(int(torch.argmax(logits, dim=-1).item()))
         return predictions
 
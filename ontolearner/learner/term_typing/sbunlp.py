@@ -12,13 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 import re
 
 import torch
 from transformers import AutoModelForCausalLM, AutoTokenizer
 
 from ...base import AutoLearner
+from ...utils.checkpoint import PredictionCheckpoint
+from ...utils.constrained_decoding import LabelTrie
+from ...utils.model_pool import load_causal_lm, release_model
 
 
 class SBUNLPZSLearner(AutoLearner):
@@ -29,9 +32,15 @@ class SBUNLPZSLearner(AutoLearner):
       • `fit(...)` learns/records the allowed type inventory from the training payload.
       • `load(...)` explicitly loads the tokenizer/model (pass `model_id`/`token` here).
       • `predict(...)` prompts the model per term and returns normalized types limited
-        to the learned inventory.
+        to the learned inventory; `predict_stream(...)` yields them term by term.
+
+    With `constrained=True` the model does not write the JSON answer; its generation is
+    restricted to a comma-separated list of up to `max_types` labels of the inventory
+    (see `LabelTrie`), which needs no parsing and stops as soon as the list is complete.
     """
 
+    streaming_tasks = ("term-typing",)
+
     def __init__(
         self,
         device: str = "cpu",
@@ -39,6 +48,8 @@ class SBUNLPZSLearner(AutoLearner):
         temperature: float = 0.0,
         model_id: str = "Qwen/Qwen2.5-0.5B-Instruct",
         token: Optional[str] = None,
+        constrained: bool = False,
+        max_types: int = 3,
     ) -> None:
         """
         Configure runtime knobs. Model identity and auth are provided to `load(...)`.
@@ -49,6 +60,8 @@ class SBUNLPZSLearner(AutoLearner):
             temperature: Reserved for future sampling; generation is greedy here.
             model_id: Fallback model id/path used if `load()` is called without args.
             token: Fallback HF token used if `load()` is called without args.
+            constrained: Restrict generation to labels of the learned inventory.
+            max_types: Maximum number of types per term with `constrained=True`.
 
         Side Effects:
             Initializes runtime configuration, instance defaults for `load()`,
@@ -73,6 +86,11 @@ class SBUNLPZSLearner(AutoLearner):
         # Regex used to extract quoted strings from model output (e.g., "type")
         self._quoted_re = re.compile(r'"([^"]+)"')
 
+        # Constrained decoding over the inventory (built on first use)
+        self.constrained = constrained
+        self.max_types = max_types
+        self._label_trie: Optional[LabelTrie] = None
+
     def load(
         self,
         model_id: Optional[str] = None,
@@ -121,12 +139,16 @@ class SBUNLPZSLearner(AutoLearner):
 
         device_map = "auto" if self.device != "cpu" else "cpu"
 
-        self.model = AutoModelForCausalLM.from_pretrained(
+        # shared with other learners loading the same model and settings
+        model = load_causal_lm(
             resolved_model_id,
+            owner=self,
             device_map=device_map,
             torch_dtype=resolved_dtype,  # keep torch_dtype for broad Transformers compatibility
             token=resolved_token,
         )
+        release_model(self.model, owner=self)
+        self.model = model
         return self
 
     def fit(self, train_data: Any, task: str, ontologizer: bool = True):
@@ -226,10 +248,21 @@ class SBUNLPZSLearner(AutoLearner):
         Returns:
             A list of dictionaries:
                 `{"id": str, "term": str, "types": List[str]}`.
+
+        Use `predict_stream(...)` to receive the rows as terms complete, with an
+        optional resumable checkpoint.
+        """
+        return super().predict(eval_data, task, ontologizer=ontologizer)
+
+    def _format_eval_data(self, eval_data: Any, task: str, ontologizer: bool) -> Any:
+        """
+        Normalize term-typing evaluation payloads to `[{'id','term'}, ...]` (see `predict`).
+
+        Other tasks are formatted by the base class.
         """
         if task != "term-typing":
             # Delegate to base for other tasks (not implemented here)
-            return super().predict(eval_data, task, ontologizer=ontologizer)
+            return super()._format_eval_data(eval_data, task, ontologizer)
 
         def _extract_list_of_dicts_from_term_typings(
             obj,
@@ -290,7 +323,7 @@ class SBUNLPZSLearner(AutoLearner):
                         raise TypeError(
                             "With ontologizer=True, eval_data must be list[str] of terms."
                         )
-            return self._term_typing(eval_pack, test=True)
+            return eval_pack
 
         # Case B: ontologizer=False -> expect list[dict], but tolerate containers
         else:
@@ -331,7 +364,7 @@ class SBUNLPZSLearner(AutoLearner):
                         raise TypeError(
                             "With ontologizer=False, eval_data must be a list of dicts with keys {'id','term'}."
                         )
-            return self._term_typing(eval_pack, test=True)
+            return eval_pack
 
     def _term_typing(self, data: Any, test: bool = False) -> Optional[Any]:
         """
@@ -366,25 +399,42 @@ class SBUNLPZSLearner(AutoLearner):
             return None
 
         # Inference path
-        if not isinstance(data, list) or not all(isinstance(x, dict) for x in data):
+        return list(self._predict_stream(data, "term-typing"))
+
+    def _predict_stream(
+        self,
+        eval_data: List[Dict[str, str]],
+        task: str,
+        checkpoint: Optional[PredictionCheckpoint] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield `{"id","term","types"}` rows term by term.
+
+        With a checkpoint, the parsed types of every term are appended to it as soon as
+        they are generated (keyed by the prompt), and terms it already holds are not
+        generated again. Terms are processed one at a time, so `chunk_size` has no effect.
+        """
+        if not isinstance(eval_data, list) or not all(isinstance(x, dict) for x in eval_data):
             raise TypeError(
                 "At prediction time, expected a list of {'id','term'} dicts."
             )
-
         if self.model is None or self.tokenizer is None:
             raise RuntimeError(
                 "Model/tokenizer not loaded. Call .load() before predict()."
             )
-
-        results = []
-        for item in data:
+        for item in eval_data:
             term_id = item["id"]
             term_text = item["term"]
             prompt = self._build_blind_prompt(term_id, term_text, self.allowed_types)
-            types = self._generate_and_parse_types(prompt)
-            results.append({"id": term_id, "term": term_text, "types": types})
-
-        return results
+            key = PredictionCheckpoint.key("sbunlp-term-typing", prompt)
+            if checkpoint is not None and key in checkpoint:
+                types = checkpoint.get(key)
+            else:
+                types = self._generate_and_parse_types(prompt)
+                if checkpoint is not None:
+                    checkpoint.put_many({key: types})
+            yield {"id": term_id, "term": term_text, "types": types}
 
     def _format_types_inline(self, allowed: List[str]) -> str:
         """
@@ -421,6 +471,15 @@ class SBUNLPZSLearner(AutoLearner):
             The full prompt string to feed to the LLM.
         """
         allowed_str = self._format_types_inline(allowed_types)
+        if self.constrained:
+            return (
+                "Identify the type(s) of the term.\n"
+                "A term can have more than one type.\n"
+                "Types must be selected only from the types list.\n\n"
+                f"Types list: {allowed_str}\n\n"
+                f'{{ "id": "{term_id}", "term": "{term}" }}\n'
+                "Types:"
+            )
         return (
             "Identify the type(s) of the term in a second JSON file.\n"
             "A term can have more than one type.\n"
@@ -446,6 +505,8 @@ class SBUNLPZSLearner(AutoLearner):
           2) Decode and extract quoted substrings via regex (e.g., `"type"`).
           3) Keep only those candidates that exist in `self.allowed_types`.
           4) Return a unique, sorted list (stable across runs).
+          With `constrained=True`, steps 1-3 are a single generation restricted to the
+          inventory, whose labels are read back from the label trie.
 
         Args:
             prompt: Fully formatted prompt string.
@@ -461,6 +522,9 @@ class SBUNLPZSLearner(AutoLearner):
         # Tokenize prompt and move tensors to model device to avoid device mismatch
         inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
 
+        if self.constrained:
+            return sorted(set(self._types_trie().generate(self.model, inputs)[0]))
+
         with torch.no_grad():
             outputs = self.model.generate(
                 **inputs,
@@ -476,3 +540,12 @@ class SBUNLPZSLearner(AutoLearner):
         # Filter candidates to the allowed inventory and stabilize order.
         filtered = [c for c in candidates if c in self.allowed_types]
         return sorted(set(filtered))
+
+    def _types_trie(self) -> LabelTrie:
+        """Label trie over the allowed types, rebuilt when the inventory or tokenizer changes."""
+        trie = self._label_trie
+        if trie is None or trie.tokenizer is not self.tokenizer or trie.labels != self.allowed_types:
+            trie = LabelTrie(self.tokenizer, self.allowed_types, context="Types:", answer_format=" {label}",
+                             separator=",", max_labels=self.max_types)
+            self._label_trie = trie
+        return trie
@@ -18,9 +18,12 @@ from typing import Any, Dict, List, Optional
 from collections import defaultdict
 
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoTokenizer, AutoModelForCausalLM, StoppingCriteriaList
 
 from ...base import AutoLearner, AutoRetriever
+from ...utils.completion_cache import cached_generate
+from ...utils.model_pool import get_model_pool, pool_key
+from ...utils.structured_output import JsonStoppingCriteria, parse_json_value
 
 class AlexbekRAGFewShotLearner(AutoLearner):
     """
@@ -108,6 +111,7 @@ class AlexbekRAGFewShotLearner(AutoLearner):
         restrict_to_known_types: bool = True,
         hf_token: str = "",
         local_files_only: bool = False,
+        llm: Optional[Any] = None,
         **kwargs: Any,
     ):
         """
@@ -136,6 +140,9 @@ class AlexbekRAGFewShotLearner(AutoLearner):
             HuggingFace token for gated models (optional).
         local_files_only:
             If True, Transformers will not try to reach the internet (requires local cache / local path).
+        llm:
+            Optional served LLM (e.g. ServerLLM) completing the prompts instead of an in-process model;
+            only the tokenizer (for the chat template) is loaded locally.
         """
         super().__init__(**kwargs)
 
@@ -150,6 +157,7 @@ class AlexbekRAGFewShotLearner(AutoLearner):
         self.restrict_to_known_types: bool = bool(restrict_to_known_types)
         self.hf_token: str = hf_token or ""
         self.local_files_only: bool = bool(local_files_only)
+        self.llm = llm
 
         self.model: Optional[AutoModelForCausalLM] = None
         self.tokenizer: Optional[AutoTokenizer] = None
@@ -229,29 +237,36 @@ class AlexbekRAGFewShotLearner(AutoLearner):
         if self.tokenizer.pad_token is None:
             self.tokenizer.pad_token = self.tokenizer.eos_token
 
+        if self.llm is not None:
+            self.llm.load(self.llm_model_id)
+            self.doc_retriever.load(self.retriever_model_id)
+            self.term_retriever.load(self.retriever_model_id)
+            self._loaded = True
+            return
 
         model_kwargs: Dict[str, Any] = {"local_files_only": self.local_files_only}
         if self.hf_token:
             model_kwargs["token"] = self.hf_token
 
+        # the model is shared through the model pool, so it is moved to the device before pooling
+        key = pool_key(AutoModelForCausalLM.__name__, self.llm_model_id, dtype=dtype, device=dev)
         try:
-            self.model = AutoModelForCausalLM.from_pretrained(
+            self.model = get_model_pool().acquire(key, lambda: AutoModelForCausalLM.from_pretrained(
                 self.llm_model_id,
                 dtype=dtype,
                 **model_kwargs,
-            )
+            ).to(dev), owner=self)
         except TypeError:
             model_kwargs.pop("token", None)
             if self.hf_token:
                 model_kwargs["use_auth_token"] = self.hf_token
-            self.model = AutoModelForCausalLM.from_pretrained(
+            self.model = get_model_pool().acquire(key, lambda: AutoModelForCausalLM.from_pretrained(
                 self.llm_model_id,
                 torch_dtype=dtype,
                 **model_kwargs,
-            )
-
-        self.model = self.model.to(dev)
+            ).to(dev), owner=self)
 
+        # the retrievers share one embedding model
         self.doc_retriever.load(self.retriever_model_id)
         self.term_retriever.load(self.retriever_model_id)
 
@@ -285,29 +300,9 @@ class AlexbekRAGFewShotLearner(AutoLearner):
 
     def _extract_first_json_obj(self, text: str) -> Optional[dict]:
         """
-        Extract the first valid JSON object from generated text by scanning balanced {...}.
-        """
-        starts = [i for i, ch in enumerate(text) if ch == "{"]
-
-        for s in starts:
-            depth = 0
-            for e in range(s, len(text)):
-                if text[e] == "{":
-                    depth += 1
-                elif text[e] == "}":
-                    depth -= 1
-                    if depth == 0:
-                        candidate = text[s : e + 1].strip().replace("\n", " ")
-                        try:
-                            return json.loads(candidate)
-                        except Exception:
-                            try:
-                                candidate2 = re.sub(r"'", '"', candidate)
-                                return json.loads(candidate2)
-                            except Exception:
-                                pass
-                        break
-        return None
+        Extract the first valid JSON object (or Python dict literal) from generated text.
+        """
+        return parse_json_value(text, types=(dict,))
 
     def _dedup_clean(self, items: List[str]) -> List[str]:
         """
@@ -386,10 +381,20 @@ class AlexbekRAGFewShotLearner(AutoLearner):
 
     def _generate(self, prompt: str) -> str:
         """
-        Deterministic single-prompt generation (no sampling).
-        Returns decoded completion only.
+        Deterministic single-prompt generation (no sampling), stopped once a JSON object is complete.
+        Returns decoded completion only; completions are served from the completion cache when enabled.
         """
+        if self.llm is not None:
+            return self.llm.complete([prompt], max_new_tokens=self.max_new_tokens, temperature=0.0)[0]
         assert self.model is not None and self.tokenizer is not None
+        generation_kwargs = {"backend": type(self).__name__, "max_input_length": self.max_input_length,
+                             "max_new_tokens": self.max_new_tokens, "do_sample": False, "stop": "json"}
+        return cached_generate(self.model, [prompt],
+                               lambda prompts: [self._generate_uncached(text) for text in prompts],
+                               generation_kwargs)[0]
+
+    def _generate_uncached(self, prompt: str) -> str:
+        """Run :meth:`_generate` without the completion cache."""
 
         enc = self.tokenizer(
             prompt,
@@ -406,6 +411,8 @@ class AlexbekRAGFewShotLearner(AutoLearner):
                 do_sample=False,
                 num_beams=1,
                 pad_token_id=self.tokenizer.eos_token_id,
+                stopping_criteria=StoppingCriteriaList(
+                    [JsonStoppingCriteria(self.tokenizer, enc["input_ids"].shape[1], types=(dict,))]),
             )
 
         gen_tokens = out[0][enc["input_ids"].shape[1] :]
@@ -583,6 +590,8 @@ class AlexbekRAGFewShotLearner(AutoLearner):
             doc2terms_pred[did] = self._doc_to_terms(d)
 
         unique_terms = sorted({t for ts in doc2terms_pred.values() for t in ts})
+        # encode all terms in one batch; the per-term few-shot lookups below are then cache hits
+        self.term_retriever.retrieve(unique_terms, top_k=self.top_k)
         term2types_pred: Dict[str, List[str]] = {t: self._term_to_types(t) for t in unique_terms}
 
         doc2types_pred: Dict[str, List[str]] = {}
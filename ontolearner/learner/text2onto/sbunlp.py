@@ -20,9 +20,11 @@ from collections import defaultdict
 from typing import Any, DefaultDict, Dict, List, Optional, Set
 
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig, StoppingCriteriaList
 
 from ...base import AutoLearner
+from ...utils.model_pool import load_causal_lm, release_model
+from ...utils.structured_output import JsonStoppingCriteria, parse_json_value
 
 class SBUNLPFewShotLearner(AutoLearner):
     """
@@ -124,8 +126,10 @@ class SBUNLPFewShotLearner(AutoLearner):
 
         device_map = "auto" if (self.device != "cpu") else {"": "cpu"}
 
-        model = AutoModelForCausalLM.from_pretrained(
+        # shared with other learners loading the same model and settings
+        model = load_causal_lm(
             resolved_model_id,
+            owner=self,
             device_map=device_map,
             torch_dtype=torch_dtype,
             quantization_config=quantization_config,
@@ -135,6 +139,7 @@ class SBUNLPFewShotLearner(AutoLearner):
         if self.device == "cpu":
             model.to("cpu")
 
+        release_model(self.model, owner=self)
         self.model = model
         self._is_loaded = True
         self._loaded_model_id = resolved_model_id
@@ -423,7 +428,7 @@ class SBUNLPFewShotLearner(AutoLearner):
 
         This parser is intentionally tolerant:
           1) Try literal_eval on the full string
-          2) Else extract the first [...] block and literal_eval it
+          2) Else parse the first complete [...] value (JSON or Python literal)
           3) Else fallback to extracting quoted strings
 
         Args:
@@ -443,14 +448,9 @@ class SBUNLPFewShotLearner(AutoLearner):
         except Exception:
             pass
 
-        match = re.search(r"\[[\s\S]*?\]", stripped)
-        if match:
-            try:
-                parsed = ast.literal_eval(match.group(0))
-                if isinstance(parsed, list):
-                    return [item for item in parsed if isinstance(item, str)]
-            except Exception:
-                pass
+        parsed = parse_json_value(stripped, types=(list,))
+        if parsed is not None:
+            return [item for item in parsed if isinstance(item, str)]
 
         quoted = re.findall(r"'([^']+)'|\"([^\"]+)\"", stripped)
         return [a or b for a, b in quoted]
@@ -459,6 +459,9 @@ class SBUNLPFewShotLearner(AutoLearner):
         """
         Generate a completion for a single prompt (deterministic decoding).
 
+        Generation stops as soon as the model has closed a list, since the answer is parsed
+        from the first one.
+
         Args:
             prompt_text: Full prompt to send to the model.
 
@@ -485,6 +488,8 @@ class SBUNLPFewShotLearner(AutoLearner):
                 temperature=0.0,
                 top_p=1.0,
                 pad_token_id=self.tokenizer.eos_token_id,
+                stopping_criteria=StoppingCriteriaList(
+                    [JsonStoppingCriteria(self.tokenizer, input_ids.shape[1], types=(list,))]),
             )[0]
 
         decoded_full = self.tokenizer.decode(output_ids, skip_special_tokens=True)
@@ -20,9 +20,12 @@ from typing import Any, Dict, List, Optional
 
 import torch
 from tqdm import tqdm
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoTokenizer, StoppingCriteriaList
 
 from ..data_structure import Document, PseudoSentence, SyntheticText2OntoData
+from ..utils.completion_cache import cached_generate
+from ..utils.model_pool import load_causal_lm, release_model
+from ..utils.structured_output import JsonStoppingCriteria, parse_json_value
 from .batchifier import TaxonomyBatchifier
 
 
@@ -57,6 +60,7 @@ class SyntheticGenerator(ABC):
             openai_model: str = "gpt-4o-mini",
             is_chat_model: bool = True,
             min_pseudo_sentences: int = 5,
+            llm: Optional[Any] = None,
     ):
         if verbalizer is not None:
             import warnings
@@ -85,6 +89,8 @@ class SyntheticGenerator(ABC):
         self.openai_model = openai_model
         self.is_chat_model = is_chat_model
         self.min_pseudo_sentences = min_pseudo_sentences
+        # optional served LLM (e.g. ServerLLM); only the tokenizer is loaded locally
+        self.llm = llm
 
         self.tokenizer = None
         self.model = None
@@ -109,6 +115,9 @@ class SyntheticGenerator(ABC):
             else:
                 raise ValueError(
                     "Tokenizer must define either an eos_token or unk_token so a pad token can be assigned.")
+        if self.llm is not None:
+            self.llm.load(resolved_model_id)
+            return
 
         model_kwargs: Dict[str, Any] = {"trust_remote_code": True}
         if self.token:
@@ -117,8 +126,11 @@ class SyntheticGenerator(ABC):
         use_cuda = self.device != "cpu" and torch.cuda.is_available()
         model_kwargs["dtype"] = torch.float16 if use_cuda else torch.float32
         model_kwargs["device_map"] = "auto" if use_cuda and torch.cuda.is_available() else "cpu"
-        self.model = AutoModelForCausalLM.from_pretrained(resolved_model_id, **model_kwargs)
-        self.model.eval()
+        # shared with learners loading the same model and settings
+        model = load_causal_lm(resolved_model_id, owner=self, **model_kwargs)
+        model.eval()
+        release_model(self.model, owner=self)
+        self.model = model
 
     def generate_pseudo_sentences(self, parent_to_child: Dict[str, List]) -> List[PseudoSentence]:
         taxonomy_batcher = TaxonomyBatchifier(parent_to_child=parent_to_child, batch_size=self.batch_size)
@@ -239,20 +251,8 @@ class SyntheticGenerator(ABC):
         if not text:
             return None
 
-        candidate = text
-        if candidate.startswith("```"):
-            candidate = re.sub(r"^```(?:json)?\s*", "", candidate, flags=re.IGNORECASE)
-            candidate = re.sub(r"\s*```$", "", candidate)
-
-        start = candidate.find("{")
-        end = candidate.rfind("}")
-        if start == -1 or end == -1 or end <= start:
-            return None
-
-        try:
-            return json.loads(candidate[start: end + 1])
-        except Exception:
-            return None
+        # First complete object, ignoring Markdown fences and any text around it
+        return parse_json_value(text, types=(dict,))
 
     def _validate_document(self, data: Dict[str, Any], row: Dict[str, Any], topic: str) -> SyntheticDocumentResponse:
         title = str(data.get("title", "")).strip()
@@ -296,10 +296,28 @@ class SyntheticGenerator(ABC):
         return repair_prompt
 
     def _generate_texts(self, prompts: List[str]) -> List[str]:
-        # Route to the correct backend and return its outputs
+        # Route to the correct backend and return its outputs; the chat backend samples, so it bypasses the cache
+        if self.llm is not None:
+            return self._generate_texts_server_llm(prompts=prompts)
         if self.is_chat_model:
-            return self._generate_texts_chat_llm(prompts=prompts)
-        return self._generate_texts_causal_llm(prompts=prompts)
+            return cached_generate(self.model, prompts, lambda batch: self._generate_texts_chat_llm(prompts=batch),
+                                   {"backend": "chat", "do_sample": True})
+        return cached_generate(self.model, prompts, lambda batch: self._generate_texts_causal_llm(prompts=batch),
+                               {"backend": "causal", "max_input_length": self.max_input_length,
+                                "max_new_tokens": self.max_new_tokens, "stop": "json"})
+
+    def _generate_texts_server_llm(self, prompts: List[str]) -> List[str]:
+        # Same prompt formatting and decoding settings as the in-process backends, completed by the server
+        if self.tokenizer is None:
+            raise RuntimeError("SyntheticGenerator model must be loaded before generation.")
+        if not self.is_chat_model:
+            return self.llm.complete(prompts, max_new_tokens=self.max_new_tokens, temperature=0.0)
+        formatted_prompts = [
+            self.tokenizer.apply_chat_template([{"role": "user", "content": p}], tokenize=False,
+                                               add_generation_prompt=True)
+            for p in prompts
+        ]
+        return self.llm.complete(formatted_prompts, max_new_tokens=self.max_new_tokens, temperature=0.7, top_p=0.8)
 
     def _generate_texts_causal_llm(self, prompts: List[str]) -> List[str]:
         if self.model is None or self.tokenizer is None:
@@ -325,6 +343,9 @@ class SyntheticGenerator(ABC):
         # else:
         # generation_kwargs["do_sample"] = False
 
+        # Each prompt stops once its JSON object is complete instead of running to max_new_tokens
+        generation_kwargs["stopping_criteria"] = StoppingCriteriaList(
+            [JsonStoppingCriteria(self.tokenizer, encoded["input_ids"].shape[1], types=(dict,))])
         outputs = self.model.generate(**encoded, **generation_kwargs)
 
         input_length = encoded["input_ids"].shape[1]
@@ -366,6 +387,9 @@ class SyntheticGenerator(ABC):
             # important for speed
             "use_cache": True,
         }
+        # Each prompt stops once its JSON object is complete instead of running to max_new_tokens
+        generation_kwargs["stopping_criteria"] = StoppingCriteriaList(
+            [JsonStoppingCriteria(self.tokenizer, encoded["input_ids"].shape[1], types=(dict,))])
         outputs = self.model.generate(**encoded, **generation_kwargs)
         decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
         responses = []
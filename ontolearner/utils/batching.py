@@ -0,0 +1,75 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Iterator, List, Optional
+
+from torch.utils.data import Sampler
+
+
+class TokenBudgetBatchSampler(Sampler[List[int]]):
+    """
+    Batch sampler grouping items of similar token length.
+
+    Items are sorted by length (longest first, so that memory problems show up on
+    the first batch) and packed greedily: a batch grows until adding the next item
+    would exceed ``max_batch_size`` items or ``max_batch_tokens`` padded tokens
+    (``len(batch) * longest item``). Batches hold dataset indices, so callers can
+    scatter the outputs back into the original order.
+
+    Example:
+        >>> sampler = TokenBudgetBatchSampler(lengths=[5, 120, 7, 118], max_batch_size=2)
+        >>> list(sampler)
+        [[1, 3], [2, 0]]
+        >>> loader = DataLoader(dataset, batch_sampler=sampler)
+    """
+
+    def __init__(self, lengths: List[int], max_batch_size: int = 10, max_batch_tokens: Optional[int] = None) -> None:
+        """
+        Args:
+            lengths: Token length of every item.
+            max_batch_size: Maximum number of items per batch; ``-1`` means no limit.
+            max_batch_tokens: Maximum padded tokens per batch. ``None`` keeps fixed-size
+                batches (still length-sorted). An item longer than the budget gets a batch of its own.
+        """
+        self.lengths = list(lengths)
+        self.max_batch_size = max_batch_size if max_batch_size > 0 else max(len(self.lengths), 1)
+        self.max_batch_tokens = max_batch_tokens
+        self._batches = self._build()
+
+    def _build(self) -> List[List[int]]:
+        order = sorted(range(len(self.lengths)), key=lambda i: self.lengths[i], reverse=True)
+        batches, batch = [], []
+        for index in order:
+            if batch:
+                longest = self.lengths[batch[0]]
+                too_many = len(batch) >= self.max_batch_size
+                too_large = self.max_batch_tokens is not None and (len(batch) + 1) * longest > self.max_batch_tokens
+                if too_many or too_large:
+                    batches.append(batch)
+                    batch = []
+            batch.append(index)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return iter(self._batches)
+
+    def __len__(self) -> int:
+        return len(self._batches)
+
+    def padding_ratio(self) -> float:
+        """Fraction of padded tokens over all batches."""
+        padded = sum(len(batch) * self.lengths[batch[0]] for batch in self._batches)
+        return 1.0 - sum(self.lengths) / padded if padded else 0.0
@@ -0,0 +1,111 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import time
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def benchmark_llm(llm: Any, prompts: List[str], batch_size: int = 8, mode: str = "score",
+                  max_new_tokens: int = 1, warmup_batches: int = 1) -> Dict[str, float]:
+    """
+    Measure the prompt throughput of a loaded :class:`AutoLLM`.
+
+    Args:
+        llm: Loaded LLM with a Hugging Face tokenizer.
+        prompts: Prompts to process.
+        batch_size: Number of prompts per call.
+        mode: ``"score"`` (one forward pass, see ``AutoLLM.score``) or ``"generate"``.
+        max_new_tokens: Tokens generated per prompt in ``"generate"`` mode.
+        warmup_batches: Untimed batches run first (allocations, lazy initialization).
+
+    Returns:
+        Dict with ``prompt_tokens`` (full prompt length, whether or not a prefix is
+        reused), ``seconds`` and ``tokens_per_second``.
+    """
+    if mode not in ("score", "generate"):
+        raise ValueError(f"Unknown mode '{mode}'. Choose 'score' or 'generate'.")
+    batches = [prompts[i:i + batch_size] for i in range(0, len(prompts), batch_size)]
+
+    def run(batch: List[str]) -> None:
+        if mode == "score":
+            llm.score(batch)
+        else:
+            llm.generate(batch, max_new_tokens=max_new_tokens)
+
+    for batch in batches[:warmup_batches]:
+        run(batch)
+    prompt_tokens = sum(len(ids) for ids in llm.tokenizer(prompts)["input_ids"])
+    start = time.perf_counter()
+    for batch in batches:
+        run(batch)
+    seconds = time.perf_counter() - start
+    return {"prompt_tokens": prompt_tokens, "seconds": seconds, "tokens_per_second": prompt_tokens / seconds}
+
+
+def benchmark_prefix_caching(llm: Any, prompts: List[str], **kwargs: Any) -> Dict[str, Dict[str, float]]:
+    """
+    Compare prompt throughput with and without prefix KV caching.
+
+    Args:
+        llm: Loaded LLM whose ``prefix_caching`` flag is toggled (and restored afterwards).
+        prompts: Prompts sharing a static prefix, e.g. formatted from one template.
+        **kwargs: Passed to :func:`benchmark_llm`.
+
+    Returns:
+        Dict with the :func:`benchmark_llm` results under ``"no_cache"`` and
+        ``"prefix_cache"``, and the ``"speedup"`` in tokens per second.
+    """
+    original = llm.prefix_caching
+    try:
+        llm.prefix_caching = False
+        no_cache = benchmark_llm(llm, prompts, **kwargs)
+        llm.prefix_caching = True
+        prefix_cache = benchmark_llm(llm, prompts, **kwargs)
+    finally:
+        llm.prefix_caching = original
+    speedup = prefix_cache["tokens_per_second"] / no_cache["tokens_per_second"]
+    logger.info(f"No cache: {no_cache['tokens_per_second']:.1f} tok/s, "
+                f"prefix cache: {prefix_cache['tokens_per_second']:.1f} tok/s ({speedup:.2f}x)")
+    return {"no_cache": no_cache, "prefix_cache": prefix_cache, "speedup": {"tokens_per_second": speedup}}
+
+
+def benchmark_cpu_profiles(load_llm: Callable[[Any], Any], prompts: List[str], profiles: Dict[str, Any],
+                           **kwargs: Any) -> Dict[str, Dict[str, float]]:
+    """
+    Compare prompt throughput across CPU inference profiles.
+
+    Every profile gets a freshly loaded model, since quantization and compilation change it in place.
+
+    Args:
+        load_llm: Creates an LLM with the given :class:`CPUInferenceProfile` (e.g.
+            ``AutoLLM(..., cpu_profile=profile)``), loads and returns it.
+        prompts: Prompts to process.
+        profiles: Name -> profile to benchmark.
+        **kwargs: Passed to :func:`benchmark_llm`.
+
+    Returns:
+        Dict with the :func:`benchmark_llm` results of every profile and its ``speedup``
+        in tokens per second over the first profile.
+    """
+    report: Dict[str, Dict[str, float]] = {}
+    for name, profile in profiles.items():
+        report[name] = benchmark_llm(load_llm(profile), prompts, **kwargs)
+    baseline = next(iter(report.values()), None)
+    for name, result in report.items():
+        result["speedup"] = result["tokens_per_second"] / baseline["tokens_per_second"]
+        logger.info(f"{name}: {result['tokens_per_second']:.1f} tok/s ({result['speedup']:.2f}x)")
+    return report
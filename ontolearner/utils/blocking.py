@@ -0,0 +1,188 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+
+from .model_pool import load_sentence_transformer
+
+logger = logging.getLogger(__name__)
+
+
+class CandidateBlocker:
+    """
+    Candidate pair generation for pairwise tasks (taxonomy discovery, non-taxonomic relations).
+
+    Instead of all ``n * (n - 1) / 2`` pairs of types, only pairs that are likely to be
+    related are kept:
+
+    * **Embedding kNN**: every type is paired with its ``top_k`` nearest neighbours by
+      cosine similarity of its embedding; the pair score is the similarity.
+    * **Lexical heads**: a multi-word type is paired with every type equal to one of its
+      word suffixes (``"red wine"`` -> ``"wine"``), with the suffix as parent. These pairs
+      get ``head_bonus`` added to their score, so they are kept first.
+
+    The pairs are ranked by score and cut to ``budget``. Embedding pairs follow the input
+    order (the earlier type is the parent, like the exhaustive pairing); with
+    ``both_directions`` both orientations are kept.
+
+    Example:
+        >>> blocker = CandidateBlocker(model_id="sentence-transformers/all-MiniLM-L6-v2", top_k=20, budget=5000)
+        >>> blocker.load()
+        >>> pairs = blocker.candidates(types)
+        >>> blocker.recall_report(types, gold_pairs, budgets=[1000, 5000, 20000])
+    """
+
+    def __init__(self,
+                 model_id: Optional[str] = None,
+                 top_k: int = 10,
+                 budget: Optional[int] = None,
+                 lexical_heads: bool = True,
+                 both_directions: bool = False,
+                 head_bonus: float = 1.0,
+                 batch_size: int = 64,
+                 encoder: Optional[Callable[[List[str]], torch.Tensor]] = None) -> None:
+        """
+        Args:
+            model_id (str, optional): SentenceTransformer model used by :meth:`load`.
+            top_k (int): Nearest neighbours per type.
+            budget (int, optional): Maximum number of pairs returned; ``None`` keeps all candidates.
+            lexical_heads (bool): Add the lexical-head pairs.
+            both_directions (bool): Keep both orientations of every embedding pair.
+            head_bonus (float): Score added to lexical-head pairs.
+            batch_size (int): Encoding batch size and similarity chunk size.
+            encoder (callable, optional): Function mapping texts to an embedding matrix,
+                used instead of a SentenceTransformer model.
+        """
+        self.model_id = model_id
+        self.top_k = top_k
+        self.budget = budget
+        self.lexical_heads = lexical_heads
+        self.both_directions = both_directions
+        self.head_bonus = head_bonus
+        self.batch_size = batch_size
+        self.encoder = encoder
+
+    def load(self, model_id: Optional[str] = None) -> None:
+        """Load the SentenceTransformer encoder (not needed if an ``encoder`` function was given) from the model pool."""
+        self.model_id = model_id or self.model_id
+        if self.model_id is None:
+            raise ValueError("No model_id given for the candidate blocker.")
+        model = load_sentence_transformer(self.model_id, owner=self, trust_remote_code=True)
+        self.encoder = lambda texts: model.encode(texts, batch_size=self.batch_size, convert_to_tensor=True,
+                                                  show_progress_bar=False)
+
+    def encode(self, texts: List[str]) -> torch.Tensor:
+        """L2-normalized embeddings of ``texts``."""
+        if self.encoder is None:
+            raise RuntimeError("The candidate blocker has no encoder; call load() first.")
+        return F.normalize(torch.as_tensor(self.encoder(texts)).float(), p=2, dim=1)
+
+    def _knn_scores(self, terms: List[str]) -> Dict[Tuple[int, int], float]:
+        """Cosine similarity of each (unordered) kNN pair, keyed by ``(i, j)`` with ``i < j``."""
+        scores: Dict[Tuple[int, int], float] = {}
+        k = min(self.top_k + 1, len(terms))
+        if k < 2:
+            return scores
+        embeddings = self.encode(terms)
+        for start in range(0, len(terms), self.batch_size):
+            similarities = embeddings[start:start + self.batch_size] @ embeddings.T
+            values, indices = similarities.topk(k, dim=1)
+            for row, (row_values, row_indices) in enumerate(zip(values.tolist(), indices.tolist())):
+                i = start + row
+                for score, j in zip(row_values, row_indices):
+                    if i != j:
+                        scores[(min(i, j), max(i, j))] = score
+        return scores
+
+    @staticmethod
+    def _head_pairs(terms: List[str]) -> List[Tuple[int, int]]:
+        """``(parent, child)`` index pairs where the parent is a word suffix of the child."""
+        index = {}
+        for i, term in enumerate(terms):
+            index.setdefault(" ".join(term.lower().split()), i)
+        pairs = []
+        for j, term in enumerate(terms):
+            words = term.lower().split()
+            for start in range(1, len(words)):
+                i = index.get(" ".join(words[start:]))
+                if i is not None and i != j:
+                    pairs.append((i, j))
+        return pairs
+
+    def scored_candidates(self, terms: List[str]) -> List[Tuple[str, str, float]]:
+        """
+        All candidate pairs with their scores, best first.
+
+        Returns:
+            List[Tuple[str, str, float]]: ``(parent, child, score)`` triples.
+        """
+        scores: Dict[Tuple[int, int], float] = {}
+        for (i, j), score in self._knn_scores(terms).items():
+            scores[(i, j)] = score
+            if self.both_directions:
+                scores[(j, i)] = score
+        if self.lexical_heads:
+            for i, j in self._head_pairs(terms):
+                base = scores.get((i, j), scores.get((j, i), 0.0))
+                scores[(i, j)] = max(scores.get((i, j), 0.0), base + self.head_bonus)
+                if not self.both_directions:
+                    scores.pop((j, i), None)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(terms[i], terms[j], score) for (i, j), score in ranked]
+
+    def candidates(self, terms: List[str], budget: Optional[int] = None) -> List[Tuple[str, str]]:
+        """
+        The ``budget`` best candidate pairs.
+
+        Args:
+            terms (List[str]): Types to pair.
+            budget (int, optional): Overrides the blocker's ``budget``.
+
+        Returns:
+            List[Tuple[str, str]]: ``(parent, child)`` pairs, best first.
+        """
+        budget = self.budget if budget is None else budget
+        pairs = [(parent, child) for parent, child, _ in self.scored_candidates(terms)]
+        if budget is not None:
+            pairs = pairs[:budget]
+        logger.info(f"Candidate blocking kept {len(pairs)} of {len(terms) * (len(terms) - 1) // 2} type pairs.")
+        return pairs
+
+    def recall_report(self, terms: List[str], gold_pairs: Iterable[Tuple[str, str]],
+                      budgets: Iterable[int]) -> List[Dict[str, float]]:
+        """
+        Recall of gold pairs retained at each budget.
+
+        Args:
+            terms (List[str]): Types to pair.
+            gold_pairs (Iterable[Tuple[str, str]]): Gold ``(parent, child)`` (or ``(head, tail)``) pairs,
+                compared case-insensitively and with their orientation.
+            budgets (Iterable[int]): Budgets to evaluate.
+
+        Returns:
+            List[Dict[str, float]]: One row per budget with ``budget``, ``pairs`` (pairs kept),
+            ``retained`` (gold pairs kept) and ``recall``.
+        """
+        gold = {(parent.lower(), child.lower()) for parent, child in gold_pairs}
+        ranked = [(parent.lower(), child.lower()) for parent, child, _ in self.scored_candidates(terms)]
+        report = []
+        for budget in sorted(budgets):
+            retained = len(gold.intersection(ranked[:budget]))
+            report.append({"budget": budget, "pairs": min(budget, len(ranked)), "retained": retained,
+                           "recall": retained / len(gold) if gold else 0.0})
+        return report
@@ -0,0 +1,92 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Union
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCheckpoint:
+    """
+    Append-only JSONL file of intermediate prediction results, keyed by a hash of their input.
+
+    Every line is ``{"key": ..., "value": ...}``. Results are appended (and flushed to disk)
+    as batches complete, so a crashed run loses at most the batch in flight; reopening the
+    file restores all complete lines and a run skips the inputs it already has. A truncated
+    last line (the crash happened while writing it) is ignored.
+
+    A checkpoint belongs to one learner configuration: the key covers the input, not the
+    model or its settings.
+
+    Example:
+        >>> checkpoint = PredictionCheckpoint("predictions.ckpt.jsonl")
+        >>> key = checkpoint.key("_accept_items", item)
+        >>> if key not in checkpoint:
+        ...     checkpoint.put_many({key: accept(item)})
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """
+        Args:
+            path (str | Path): JSONL file; created if missing, resumed if present.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._values: Dict[str, Any] = {}
+        partial_line = False
+        if self.path.exists():
+            with open(self.path, encoding="utf8") as file:
+                for line in file:
+                    partial_line = not line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._values[entry["key"]] = entry["value"]
+            logger.info(f"Resuming from {len(self._values)} checkpointed results in {self.path}.")
+        self._file = open(self.path, "a", encoding="utf8")
+        if partial_line:
+            # a crash left a partial line; start the next entry on a fresh one
+            self._file.write("\n")
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Content hash of JSON-serializable parts (e.g. a stage name and an input item)."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf8")).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def put_many(self, entries: Dict[str, Any]) -> None:
+        """Append ``key -> value`` entries and flush them to disk."""
+        if not entries:
+            return
+        self._file.write("".join(json.dumps({"key": key, "value": value}) + "\n" for key, value in entries.items()))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._values.update(entries)
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,239 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+#: Environment variable naming a cache file that is opened on first use.
+CACHE_ENV_VAR = "ONTOLEARNER_COMPLETION_CACHE"
+
+
+class CompletionCache:
+    """
+    Persistent, content-addressed cache of prompt -> completion pairs in SQLite.
+
+    Entries are keyed by a hash of the model id, model revision, generation
+    arguments and prompt, so a cached completion is only reused for an identical
+    request. Sampled generations are never cached.
+
+    Example:
+        >>> cache = CompletionCache("completions.sqlite")
+        >>> cache.generate(prompts, generate_fn, model_id="Qwen/Qwen2.5-0.5B-Instruct",
+        ...                generation_kwargs={"max_new_tokens": 32})
+        >>> cache.info()
+        {'entries': 120, 'hits': 100, 'misses': 20, 'bypassed': 0, 'hit_rate': 0.83}
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """
+        Args:
+            path (str | Path): SQLite database file; created if missing.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS completions "
+                                 "(key TEXT PRIMARY KEY, model_id TEXT, completion TEXT, created REAL)")
+        self._connection.commit()
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0}
+
+    @staticmethod
+    def key(model_id: str, revision: Optional[str], generation_kwargs: Dict[str, Any], prompt: str) -> str:
+        """Content hash identifying a generation request."""
+        payload = json.dumps({"model_id": model_id, "revision": revision, "kwargs": generation_kwargs},
+                             sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode("utf8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf8"))
+        return digest.hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Cached completions of the given keys (missing keys are left out)."""
+        found: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, completion FROM completions WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                found.update(rows.fetchall())
+        return found
+
+    def put_many(self, entries: Dict[str, str], model_id: str = "") -> None:
+        """Store ``key -> completion`` entries."""
+        now = time.time()
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?)",
+                                         [(key, model_id, completion, now) for key, completion in entries.items()])
+            self._connection.commit()
+
+    def generate(self,
+                 prompts: List[str],
+                 generate_fn: Callable[[List[str]], List[str]],
+                 model_id: str,
+                 revision: Optional[str] = None,
+                 generation_kwargs: Optional[Dict[str, Any]] = None,
+                 sampling: bool = False) -> List[str]:
+        """
+        Completions of ``prompts``, generating only the ones that are not cached.
+
+        Args:
+            prompts (List[str]): Prompts to complete.
+            generate_fn (callable): Generates the completions of a list of prompts.
+            model_id (str): Model identifier.
+            revision (str, optional): Model revision (commit hash, dtype, ...).
+            generation_kwargs (dict, optional): Arguments that change the completion.
+            sampling (bool): The generation samples; the cache is bypassed.
+
+        Returns:
+            List[str]: One completion per prompt.
+        """
+        if sampling:
+            self.stats["bypassed"] += len(prompts)
+            return generate_fn(prompts)
+        generation_kwargs = generation_kwargs or {}
+        keys = [self.key(model_id, revision, generation_kwargs, prompt) for prompt in prompts]
+        found = self.get_many(list(dict.fromkeys(keys)))
+        missing = {}
+        for key, prompt in zip(keys, prompts):
+            if key not in found:
+                missing.setdefault(key, prompt)
+        self.stats["hits"] += len(prompts) - sum(key in missing for key in keys)
+        self.stats["misses"] += sum(key in missing for key in keys)
+        if missing:
+            completions = generate_fn(list(missing.values()))
+            generated = dict(zip(missing, completions))
+            self.put_many(generated, model_id=model_id)
+            found.update(generated)
+        return [found[key] for key in keys]
+
+    def info(self) -> Dict[str, Any]:
+        """Number of entries and hit/miss statistics of this process."""
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        looked_up = self.stats["hits"] + self.stats["misses"]
+        return {"entries": entries, **self.stats,
+                "hit_rate": self.stats["hits"] / looked_up if looked_up else 0.0}
+
+    def clear(self) -> None:
+        """Delete all entries and reset the statistics."""
+        with self._lock:
+            self._connection.execute("DELETE FROM completions")
+            self._connection.commit()
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_active_cache: Optional[CompletionCache] = None
+
+
+def enable_completion_cache(path: Union[str, Path]) -> CompletionCache:
+    """
+    Make every deterministic generation path consult a completion cache at ``path``.
+
+    Args:
+        path (str | Path): SQLite database file.
+
+    Returns:
+        CompletionCache: The active cache, e.g. to read its statistics.
+    """
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.close()
+    _active_cache = CompletionCache(path)
+    logger.info(f"Completion cache enabled at {path}.")
+    return _active_cache
+
+
+def disable_completion_cache() -> None:
+    """Stop using the active completion cache."""
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.close()
+    _active_cache = None
+
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """The active cache; opened from ``$ONTOLEARNER_COMPLETION_CACHE`` if set and none is active."""
+    if _active_cache is None and os.environ.get(CACHE_ENV_VAR):
+        enable_completion_cache(os.environ[CACHE_ENV_VAR])
+    return _active_cache
+
+
+def model_fingerprint(model: Any) -> Tuple[str, str]:
+    """
+    Model id and revision of a Hugging Face model.
+
+    The revision holds the commit hash, the dtype and, for models optimized by a
+    :class:`~ontolearner.utils.cpu_inference.CPUInferenceProfile`, the profile's
+    quantization and backend, since an int8 or compiled model keeps a ``float32`` dtype.
+    """
+    config = getattr(model, "config", None)
+    model_id = getattr(config, "_name_or_path", None) or getattr(model, "name_or_path", None) or type(model).__name__
+    revision = f"{getattr(config, '_commit_hash', None)}:{getattr(model, 'dtype', None)}"
+    cpu_profile = getattr(model, "cpu_profile_fingerprint", None)
+    if cpu_profile is not None:
+        revision = f"{revision}:{cpu_profile}"
+    return str(model_id), revision
+
+
+def is_sampling(model: Any, generation_kwargs: Dict[str, Any]) -> bool:
+    """Whether ``model.generate(**generation_kwargs)`` samples, taking the model's generation config into account."""
+    if "do_sample" in generation_kwargs:
+        return bool(generation_kwargs["do_sample"])
+    return bool(getattr(getattr(model, "generation_config", None), "do_sample", False))
+
+
+def cached_generate(model: Any, prompts: List[str], generate_fn: Callable[[List[str]], List[str]],
+                    generation_kwargs: Dict[str, Any], model_id: Optional[str] = None,
+                    sampling: Optional[bool] = None) -> List[str]:
+    """
+    Run ``generate_fn`` through the active completion cache, if any.
+
+    Args:
+        model: The generating model, used for the cache key and to detect sampling.
+        prompts (List[str]): Prompts to complete.
+        generate_fn (callable): Generates the completions of a list of prompts.
+        generation_kwargs (dict): Everything besides the model and prompt that changes the completion.
+        model_id (str, optional): Model identifier for models that are not in-process
+            Hugging Face models (e.g. served ones); replaces the fingerprint of ``model``.
+        sampling (bool, optional): Whether the generation samples; detected from ``model``
+            and ``generation_kwargs`` if not given.
+
+    Returns:
+        List[str]: One completion per prompt.
+    """
+    cache = get_completion_cache()
+    if cache is None:
+        return generate_fn(prompts)
+    revision = None
+    if model_id is None:
+        model_id, revision = model_fingerprint(model)
+    if sampling is None:
+        sampling = is_sampling(model, generation_kwargs)
+    return cache.generate(prompts, generate_fn, model_id=model_id, revision=revision,
+                          generation_kwargs=generation_kwargs, sampling=sampling)
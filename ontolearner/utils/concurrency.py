@@ -0,0 +1,85 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    Tokens are refilled continuously at ``rate`` per second up to ``capacity``;
+    every call to :meth:`acquire` takes one token and blocks until one is available.
+
+    Example:
+        >>> bucket = TokenBucket(rate=500 / 60, capacity=10)  # 500 requests per minute, bursts of 10
+        >>> bucket.acquire()
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        """
+        Args:
+            rate (float): Refill rate in tokens per second.
+            capacity (float, optional): Maximum burst size. Defaults to ``max(rate, 1)``.
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token (possibly going into debt) and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block until a token is available and take it."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait (without blocking the event loop) until a token is available and take it."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, maximum: float = 60.0, jitter: bool = True) -> float:
+    """
+    Exponential backoff delay for a retry.
+
+    Args:
+        attempt (int): Zero-based number of the failed attempt.
+        base (float): Delay after the first failure, in seconds.
+        maximum (float): Upper bound of the delay.
+        jitter (bool): Draw the delay uniformly from ``[0.5, 1] * delay`` so that
+            concurrent workers do not retry in lockstep.
+
+    Returns:
+        float: Delay in seconds.
+    """
+    delay = min(maximum, base * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0) if jitter else delay
@@ -0,0 +1,183 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+#: Key of a trie node marking that the path to it spells a complete answer.
+_END = -1
+
+
+class LabelTrie:
+    """
+    Token trie over a fixed set of answers, used to restrict generation to valid labels.
+
+    Every label is tokenized as it follows the end of the prompt (``context``), formatted
+    by ``answer_format``. During generation, :meth:`allowed_tokens` lets the model only
+    continue a label, end it with EOS or, for multi-label answers, start the next label
+    after ``separator``. A label that no other label extends can only be followed by EOS
+    (or the separator), so generation stops as soon as the answer is complete.
+
+    The generated ids are read back by walking the trie (:meth:`parse`), so the output
+    needs no parsing or snapping onto the label inventory.
+
+    Example:
+        >>> trie = LabelTrie(tokenizer, ["animal", "plant"], context="Types:", answer_format=" {label}",
+        ...                  separator=",", max_labels=2)
+        >>> outputs = model.generate(**encoded, max_new_tokens=trie.max_new_tokens,
+        ...                          prefix_allowed_tokens_fn=trie.prefix_allowed_tokens_fn(prompt_length),
+        ...                          eos_token_id=trie.eos_token_id)
+        >>> trie.parse(outputs[0, prompt_length:].tolist())
+        ['animal']
+    """
+
+    def __init__(self,
+                 tokenizer: Any,
+                 labels: Sequence[str],
+                 context: str = "",
+                 answer_format: str = "{label}",
+                 separator: Optional[str] = None,
+                 max_labels: int = 1) -> None:
+        """
+        Args:
+            tokenizer: Hugging Face tokenizer of the model.
+            labels: Allowed labels.
+            context: End of the prompt the answer follows (e.g. ``"Types:"``); labels are
+                tokenized as they continue it. Empty if the answer starts a new text (e.g.
+                after a chat template's generation prompt).
+            answer_format: How a label is written in the answer, e.g. ``" {label}"`` or ``"#[{label}]#"``.
+            separator: Text between the labels of a multi-label answer, e.g. ``","``.
+            max_labels: Maximum number of labels per answer.
+
+        Raises:
+            ValueError: If there are no labels, or several labels but no separator.
+        """
+        labels = list(dict.fromkeys(label for label in labels if label))
+        if not labels:
+            raise ValueError("LabelTrie needs at least one label.")
+        if max_labels > 1 and not separator:
+            raise ValueError("A separator is required for more than one label per answer.")
+        self.tokenizer = tokenizer
+        self.labels = labels
+        self.max_labels = max_labels
+        self.eos_token_id = tokenizer.eos_token_id
+        self.separator_ids = self._encode(separator, context) if separator else []
+        self.root: Dict[int, Any] = {}
+        depth = 0
+        for label in labels:
+            ids = self._encode(answer_format.format(label=label), context)
+            node = self.root
+            for token_id in ids:
+                node = node.setdefault(token_id, {})
+            if _END in node:
+                logger.warning(f"Labels '{node[_END]}' and '{label}' have the same tokens; keeping '{node[_END]}'.")
+                continue
+            node[_END] = label
+            depth = max(depth, len(ids))
+        #: Generation budget of the longest valid answer, including the final EOS.
+        self.max_new_tokens = depth * max_labels + len(self.separator_ids) * (max_labels - 1) + 1
+
+    def _encode(self, text: str, context: str) -> List[int]:
+        """Token ids of ``text`` as it follows ``context``."""
+        if not context:
+            return self.tokenizer.encode(text, add_special_tokens=False)
+        anchor = self.tokenizer.encode(context, add_special_tokens=False)
+        ids = self.tokenizer.encode(context + text, add_special_tokens=False)
+        if ids[:len(anchor)] == anchor:
+            return ids[len(anchor):]
+        return self.tokenizer.encode(text, add_special_tokens=False)
+
+    def _walk(self, generated: Sequence[int]) -> Tuple[Dict[int, Any], List[str], int, bool]:
+        """
+        Follow the generated ids through the trie.
+
+        Returns:
+            The current node, the completed labels, the position inside the separator
+            (0 if not in a separator) and whether the answer ended.
+        """
+        node, labels, in_separator = self.root, [], 0
+        for token_id in generated:
+            if in_separator:
+                in_separator += 1
+                if in_separator == len(self.separator_ids):
+                    node, in_separator = self.root, 0
+            elif token_id in node and token_id != _END:
+                node = node[token_id]
+            elif _END in node and self.separator_ids and token_id == self.separator_ids[0] \
+                    and len(labels) + 1 < self.max_labels:
+                labels.append(node[_END])
+                if len(self.separator_ids) == 1:
+                    node = self.root
+                else:
+                    in_separator = 1
+            else:
+                # EOS (or a token outside the trie, e.g. padding after EOS)
+                if _END in node:
+                    labels.append(node[_END])
+                return node, labels, 0, True
+        return node, labels, in_separator, False
+
+    def allowed_tokens(self, generated: Sequence[int]) -> List[int]:
+        """Token ids that may follow the ``generated`` ids of an answer."""
+        node, labels, in_separator, ended = self._walk(generated)
+        if ended:
+            return [self.eos_token_id]
+        if in_separator:
+            return [self.separator_ids[in_separator]]
+        allowed = [token_id for token_id in node if token_id != _END]
+        if _END in node:
+            allowed.append(self.eos_token_id)
+            if self.separator_ids and len(labels) + 1 < self.max_labels:
+                allowed.append(self.separator_ids[0])
+        return allowed or [self.eos_token_id]
+
+    def prefix_allowed_tokens_fn(self, prompt_length: int) -> Callable[[int, torch.Tensor], List[int]]:
+        """``prefix_allowed_tokens_fn`` for ``model.generate`` on prompts padded to ``prompt_length`` tokens."""
+        return lambda batch_id, input_ids: self.allowed_tokens(input_ids[prompt_length:].tolist())
+
+    def parse(self, generated: Sequence[int]) -> List[str]:
+        """Labels spelled by the generated ids; an answer cut off inside a label drops that label."""
+        node, labels, _, ended = self._walk(generated)
+        if not ended and _END in node:
+            labels.append(node[_END])
+        return labels
+
+    @torch.no_grad()
+    def generate(self, model: Any, encoded: Dict[str, torch.Tensor], **kwargs: Any) -> List[List[str]]:
+        """
+        Greedy constrained generation for a batch of encoded prompts.
+
+        Args:
+            model: Causal LM.
+            encoded: Tokenizer output (``input_ids`` and ``attention_mask``) on the model's device,
+                padded on the left.
+            **kwargs: Further ``generate`` arguments.
+
+        Returns:
+            The labels of every prompt.
+        """
+        prompt_length = encoded["input_ids"].shape[1]
+        outputs = model.generate(**encoded,
+                                 max_new_tokens=self.max_new_tokens,
+                                 do_sample=False,
+                                 prefix_allowed_tokens_fn=self.prefix_allowed_tokens_fn(prompt_length),
+                                 eos_token_id=self.eos_token_id,
+                                 pad_token_id=self.tokenizer.pad_token_id if self.tokenizer.pad_token_id is not None
+                                 else self.eos_token_id,
+                                 **kwargs)
+        return [self.parse(sequence) for sequence in outputs[:, prompt_length:].tolist()]
@@ -0,0 +1,192 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import tempfile
+import warnings
+from pathlib import Path
+from typing import Any, List, Optional
+
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+#: Sentences of different lengths run by the warm-up, so that dynamic shapes are traced once.
+WARMUP_TEXTS = ["Is a cat an animal?",
+                "Is the following statement true? A river is a kind of body of water that flows into the sea."]
+
+
+class CPUInferenceProfile:
+    """
+    Settings for running a Hugging Face model on CPU-only nodes.
+
+    * ``dtype``: weight dtype; ``"float32"`` is the fast choice on CPUs without native
+      bf16 support (most x86 CPUs before Sapphire Rapids).
+    * ``quantize``: int8 dynamic quantization of all ``nn.Linear`` layers (weights are
+      stored as int8, activations are quantized on the fly).
+    * ``backend``: ``"eager"`` (plain PyTorch), ``"compile"`` (``torch.compile`` of the
+      forward pass) or ``"onnx"`` (ONNX Runtime export of an encoder classifier, needs
+      ``optimum[onnxruntime]``).
+    * ``num_threads`` / ``num_interop_threads``: intra-op and inter-op thread pools.
+    * ``warmup``: run the model on a few sentences after loading, so that lazy
+      initialization and graph compilation do not hit the first real batch.
+
+    Example:
+        >>> profile = CPUInferenceProfile(quantize=True, num_threads=16)
+        >>> llm = AutoLLM(label_mapper=LabelMapper(), device="cpu", cpu_profile=profile)
+        >>> llm.load("Qwen/Qwen2.5-0.5B-Instruct")
+    """
+
+    backends = ("eager", "compile", "onnx")
+
+    def __init__(self,
+                 dtype: str = "float32",
+                 quantize: bool = False,
+                 backend: str = "eager",
+                 compile_backend: str = "inductor",
+                 num_threads: Optional[int] = None,
+                 num_interop_threads: Optional[int] = None,
+                 warmup: bool = True,
+                 onnx_dir: Optional[str] = None) -> None:
+        """
+        Args:
+            dtype (str): ``"float32"`` or ``"bfloat16"``.
+            quantize (bool): Apply int8 dynamic quantization (requires ``float32``).
+            backend (str): ``"eager"``, ``"compile"`` or ``"onnx"``.
+            compile_backend (str): ``torch.compile`` backend used with ``backend="compile"``.
+            num_threads (int, optional): Intra-op threads (``torch.set_num_threads``).
+            num_interop_threads (int, optional): Inter-op threads; only settable before
+                PyTorch runs its first parallel operation.
+            warmup (bool): Run a warm-up forward pass after optimizing the model.
+            onnx_dir (str, optional): Where the ONNX export is written; a temporary directory by default.
+        """
+        if dtype not in ("float32", "bfloat16"):
+            raise ValueError(f"Unknown dtype '{dtype}'. Choose 'float32' or 'bfloat16'.")
+        if backend not in self.backends:
+            raise ValueError(f"Unknown backend '{backend}'. Choose from {list(self.backends)}.")
+        if quantize and dtype != "float32" and backend != "onnx":
+            raise ValueError("Dynamic int8 quantization requires dtype='float32'.")
+        self.dtype = dtype
+        self.quantize = quantize
+        self.backend = backend
+        self.compile_backend = compile_backend
+        self.num_threads = num_threads
+        self.num_interop_threads = num_interop_threads
+        self.warmup = warmup
+        self.onnx_dir = onnx_dir
+
+    def __repr__(self) -> str:
+        return (f"CPUInferenceProfile(dtype={self.dtype!r}, quantize={self.quantize}, backend={self.backend!r}, "
+                f"num_threads={self.num_threads}, num_interop_threads={self.num_interop_threads})")
+
+    @property
+    def fingerprint(self) -> str:
+        """Settings that change the model outputs (thread counts do not), e.g. for cache keys."""
+        return f"{self.dtype}:{'int8' if self.quantize else 'noquant'}:{self.backend}"
+
+    @property
+    def torch_dtype(self) -> torch.dtype:
+        """Weight dtype to pass to ``from_pretrained``."""
+        return torch.float32 if self.dtype == "float32" else torch.bfloat16
+
+    def set_threads(self) -> None:
+        """Apply the intra-op and inter-op thread settings to this process."""
+        if self.num_threads is not None:
+            torch.set_num_threads(self.num_threads)
+        if self.num_interop_threads is not None and torch.get_num_interop_threads() != self.num_interop_threads:
+            try:
+                torch.set_num_interop_threads(self.num_interop_threads)
+            except RuntimeError as error:
+                logger.warning(f"Inter-op threads not changed ({error}); set them before any model runs.")
+
+    def apply(self, model: Any, tokenizer: Any = None) -> Any:
+        """
+        Optimize a loaded model for CPU inference.
+
+        Args:
+            model: Hugging Face model on CPU, in evaluation mode after this call.
+            tokenizer: Its tokenizer, used for the warm-up (skipped without one).
+
+        Returns:
+            The optimized model. Eager and compiled models are changed in place and
+            returned; the ONNX backend returns an ONNX Runtime model with the same call interface.
+            Its ``cpu_profile_fingerprint`` attribute records :attr:`fingerprint`.
+        """
+        self.set_threads()
+        if self.backend == "onnx":
+            model = self._to_onnx(model)
+        else:
+            model = model.to(dtype=self.torch_dtype).eval()
+            if self.quantize:
+                model = quantize_dynamic_int8(model)
+            if self.backend == "compile":
+                # compiling the bound forward keeps the model object (generate, config, device) intact
+                model.forward = torch.compile(model.forward, backend=self.compile_backend, dynamic=True)
+        model.cpu_profile_fingerprint = self.fingerprint
+        if self.warmup and tokenizer is not None:
+            warm_up(model, tokenizer)
+        logger.info(f"Model prepared for CPU inference with {self}.")
+        return model
+
+    def _to_onnx(self, model: Any) -> Any:
+        """Export an encoder classifier to ONNX Runtime, quantizing it if requested."""
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        except ImportError as error:
+            raise ImportError("The 'onnx' backend needs optimum with ONNX Runtime: "
+                              "pip install 'optimum[onnxruntime]'") from error
+        if not getattr(model.config, "architectures", None) or \
+                not any(name.endswith("ForSequenceClassification") for name in model.config.architectures):
+            raise ValueError("The 'onnx' backend supports sequence classification models only.")
+        options = onnxruntime.SessionOptions()
+        if self.num_threads is not None:
+            options.intra_op_num_threads = self.num_threads
+        if self.num_interop_threads is not None:
+            options.inter_op_num_threads = self.num_interop_threads
+        export_dir = Path(self.onnx_dir or tempfile.mkdtemp(prefix="ontolearner-onnx-"))
+        model.float().save_pretrained(export_dir / "torch")
+        onnx_model = ORTModelForSequenceClassification.from_pretrained(export_dir / "torch", export=True)
+        onnx_model.save_pretrained(export_dir)
+        file_name = "model.onnx"
+        if self.quantize:
+            quantizer = ORTQuantizer.from_pretrained(onnx_model)
+            quantizer.quantize(save_dir=export_dir,
+                               quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False))
+            file_name = "model_quantized.onnx"
+        return ORTModelForSequenceClassification.from_pretrained(export_dir, file_name=file_name,
+                                                                 session_options=options,
+                                                                 provider="CPUExecutionProvider")
+
+
+def quantize_dynamic_int8(model: nn.Module) -> nn.Module:
+    """Replace every ``nn.Linear`` of ``model`` by an int8 dynamically quantized one, in place."""
+    from torch.ao.quantization import quantize_dynamic
+
+    with warnings.catch_warnings():
+        # torch.ao.quantization is deprecated in favour of torchao, but still the dependency-free option
+        warnings.simplefilter("ignore", DeprecationWarning)
+        warnings.simplefilter("ignore", FutureWarning)
+        warnings.simplefilter("ignore", UserWarning)
+        return quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+@torch.no_grad()
+def warm_up(model: Any, tokenizer: Any, texts: Optional[List[str]] = None) -> None:
+    """Run forward passes on sentences of different lengths (lazy initialization, graph compilation)."""
+    for text in texts or WARMUP_TEXTS:
+        encoded = tokenizer([text], return_tensors="pt", padding=True, truncation=True)
+        model(**{key: value for key, value in encoded.items() if key in ("input_ids", "attention_mask")})
@@ -0,0 +1,186 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import os
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, List, Tuple, Union
+
+import numpy as np
+import torch
+
+from .quantization import QuantizedEmbeddings
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS_FILE = "documents.bin"
+OFFSETS_FILE = "offsets.bin"
+VECTORS_FILE = "vectors.bin"
+SCALES_FILE = "scales.bin"
+META_FILE = "index.json"
+
+_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def _memmap(path: Path, dtype: Any, shape: Tuple[int, ...]) -> np.ndarray:
+    """Open a raw file copy-on-write, falling back to an empty array for empty files."""
+    if int(np.prod(shape)) == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="c", shape=shape)
+
+
+class DiskStringList(Sequence):
+    """
+    Read-only list of strings stored in a single UTF-8 file.
+
+    ``documents.bin`` holds the concatenated encoded strings and ``offsets.bin``
+    holds ``len + 1`` ``int64`` byte offsets, so item ``i`` is the byte range
+    ``offsets[i]:offsets[i + 1]``. Both files are memory-mapped; only the
+    requested items are decoded.
+    """
+
+    def __init__(self, path: Union[str, Path], size: int) -> None:
+        path = Path(path)
+        self._offsets = _memmap(path / OFFSETS_FILE, np.int64, (size + 1,))
+        num_bytes = int(self._offsets[-1]) if size else 0
+        self._data = _memmap(path / DOCUMENTS_FILE, np.uint8, (num_bytes,))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: Any) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("DiskStringList index out of range")
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return self._data[start:end].tobytes().decode("utf8")
+
+
+class DiskIndexWriter:
+    """
+    Append-only writer for an on-disk retrieval index.
+
+    Documents and their (quantized) embeddings are appended chunk by chunk to
+    raw files, so the index can grow beyond memory. The metadata file is written
+    last on :meth:`close`, and only when the ``with`` block exits without an
+    error, which makes a directory without it an incomplete index.
+
+    Example:
+        >>> with DiskIndexWriter("index_dir", precision="float16") as writer:
+        ...     writer.append(["doc a", "doc b"], QuantizedEmbeddings.quantize(vectors, "float16"))
+        >>> documents, embeddings = load_disk_index("index_dir")
+    """
+
+    def __init__(self, path: Union[str, Path], precision: str = "float32") -> None:
+        if precision not in _DTYPES:
+            raise ValueError(f"Unsupported precision '{precision}'. Choose from {list(_DTYPES)}.")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        if (self.path / META_FILE).exists():
+            os.remove(self.path / META_FILE)
+        self.precision = precision
+        self.size, self.dim, self._offset = 0, None, 0
+        self._documents = open(self.path / DOCUMENTS_FILE, "wb")
+        self._offsets = open(self.path / OFFSETS_FILE, "wb")
+        self._vectors = open(self.path / VECTORS_FILE, "wb")
+        self._scales = open(self.path / SCALES_FILE, "wb") if precision == "int8" else None
+        self._offsets.write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def append(self, documents: List[str], embeddings: QuantizedEmbeddings) -> None:
+        """
+        Append a chunk of documents and their embeddings.
+
+        Args:
+            documents (List[str]): Documents of the chunk.
+            embeddings (QuantizedEmbeddings): Normalized embeddings of ``documents``
+                in the writer's precision.
+        """
+        if len(documents) != len(embeddings):
+            raise ValueError(f"Got {len(documents)} documents but {len(embeddings)} embeddings.")
+        if embeddings.precision != self.precision:
+            raise ValueError(f"Expected {self.precision} embeddings, got {embeddings.precision}.")
+        if self.dim is None:
+            self.dim = int(embeddings.shape[1])
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Expected embeddings of dimension {self.dim}, got {embeddings.shape[1]}.")
+        offsets = []
+        for document in documents:
+            encoded = document.encode("utf8")
+            self._documents.write(encoded)
+            self._offset += len(encoded)
+            offsets.append(self._offset)
+        self._offsets.write(np.asarray(offsets, dtype=np.int64).tobytes())
+        self._vectors.write(embeddings.values.detach().cpu().numpy().tobytes())
+        if self._scales is not None:
+            self._scales.write(embeddings.scales.detach().cpu().numpy().astype(np.float32).tobytes())
+        self.size += len(documents)
+
+    def close(self, complete: bool = True) -> None:
+        """
+        Flush all files and, if ``complete``, write the index metadata.
+
+        Args:
+            complete (bool): Whether all documents were appended. An aborted index
+                gets no metadata, so :func:`load_disk_index` rejects it.
+        """
+        for f in (self._documents, self._offsets, self._vectors, self._scales):
+            if f is not None:
+                f.close()
+        if not complete:
+            logger.warning(f"On-disk index at {self.path} is incomplete; its metadata was not written.")
+            return
+        temporary = self.path / (META_FILE + ".tmp")
+        with open(temporary, "w", encoding="utf8") as f:
+            json.dump({"size": self.size, "dim": self.dim or 0, "precision": self.precision}, f)
+        os.replace(temporary, self.path / META_FILE)
+        logger.info(f"Wrote on-disk index with {self.size} documents to {self.path}.")
+
+    def __enter__(self) -> "DiskIndexWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        self.close(complete=exc_type is None)
+
+
+def load_disk_index(path: Union[str, Path]) -> Tuple[DiskStringList, QuantizedEmbeddings]:
+    """
+    Open an index written by :class:`DiskIndexWriter`.
+
+    Args:
+        path (str | Path): Index directory.
+
+    Returns:
+        Tuple[DiskStringList, QuantizedEmbeddings]: The documents and their
+        memory-mapped embeddings.
+
+    Raises:
+        FileNotFoundError: If ``path`` holds no complete index.
+    """
+    path = Path(path)
+    if not (path / META_FILE).is_file():
+        raise FileNotFoundError(f"No complete on-disk index found at {path}")
+    with open(path / META_FILE, "r", encoding="utf8") as f:
+        meta = json.load(f)
+    size, dim, precision = meta["size"], meta["dim"], meta["precision"]
+    values = torch.from_numpy(_memmap(path / VECTORS_FILE, _DTYPES[precision], (size, dim)))
+    scales = None
+    if precision == "int8":
+        scales = torch.from_numpy(_memmap(path / SCALES_FILE, np.float32, (size,)))
+    return DiskStringList(path, size), QuantizedEmbeddings(values, scales)
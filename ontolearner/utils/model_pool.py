@@ -0,0 +1,283 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+#: Environment variable with the memory budget (in GB) for models that no learner uses any more.
+POOL_BUDGET_ENV_VAR = "ONTOLEARNER_MODEL_POOL_GB"
+#: Loading arguments that do not change the loaded weights and are left out of the pool key.
+_UNKEYED_OPTIONS = {"token", "cache_dir", "cache_folder", "local_files_only", "use_auth_token"}
+
+
+def _key_part(value: Any) -> Hashable:
+    """Hashable, deterministic stand-in for a loading argument."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, torch.dtype):
+        return str(value)
+    if hasattr(value, "to_dict"):  # e.g. BitsAndBytesConfig
+        return f"{type(value).__name__}:{json.dumps(value.to_dict(), sort_keys=True, default=str)}"
+    if isinstance(value, dict):
+        return tuple(sorted((str(name), _key_part(item)) for name, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_part(item) for item in value)
+    return repr(value)
+
+
+def pool_key(kind: str, model_id: str, **options: Any) -> Tuple[Hashable, ...]:
+    """
+    Pool key of a model: its kind, id and every loading argument that changes the weights.
+
+    Args:
+        kind (str): Model class, e.g. ``"causal-lm"`` or ``"sentence-transformer"``.
+        model_id (str): Hugging Face id or local path.
+        **options: Loading arguments (dtype, device, quantization config, ...). Credentials
+            and cache locations are ignored.
+    """
+    parts = tuple(sorted((name, _key_part(value)) for name, value in options.items()
+                         if name not in _UNKEYED_OPTIONS))
+    return (kind, str(model_id)) + parts
+
+
+def model_memory(model: Any) -> int:
+    """Bytes taken by the parameters and buffers (or word vectors) of a model (0 if unknown)."""
+    if hasattr(model, "get_memory_footprint"):
+        try:
+            return int(model.get_memory_footprint())
+        except Exception:
+            pass
+    if isinstance(model, torch.nn.Module):
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+    vectors = getattr(model, "vectors", None)  # e.g. gensim KeyedVectors
+    return int(vectors.nbytes) if isinstance(vectors, np.ndarray) else 0
+
+
+class _PoolEntry:
+    """A pooled model with its reference count."""
+
+    def __init__(self, model: Any, memory: int) -> None:
+        self.model = model
+        self.memory = memory
+        self.refs = 0
+
+
+class ModelPool:
+    """
+    Process-wide pool of loaded models, shared by every learner that asks for the same model.
+
+    Models are keyed by :func:`pool_key` (model id, dtype, device, quantization, ...), so two
+    learners loading the same checkpoint with the same settings get the same instance
+    instead of a second copy of the weights. Every :meth:`acquire` holds a reference that
+    is dropped by :meth:`release` or, when an ``owner`` is given, automatically once the owner
+    is garbage-collected.
+
+    Models without references are idle. They are kept for a later :meth:`acquire` as long
+    as the memory of all pooled models stays within ``max_memory`` (least recently used idle
+    models are evicted first); models in use are never evicted.
+
+    Example:
+        >>> pool = ModelPool(max_memory=8 * 1024 ** 3)
+        >>> model = pool.acquire(pool_key("causal-lm", model_id, torch_dtype=torch.bfloat16),
+        ...                      lambda: AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.bfloat16),
+        ...                      owner=learner)
+        >>> pool.info()
+        {'models': 1, 'in_use': 1, 'memory': 988065792, 'loads': 1, 'hits': 0, 'evictions': 0}
+    """
+
+    def __init__(self, max_memory: Optional[int] = 0) -> None:
+        """
+        Args:
+            max_memory (int, optional): Memory budget in bytes above which idle models are
+                evicted. ``0`` frees a model as soon as it is released, ``None`` keeps all
+                idle models.
+        """
+        self.max_memory = max_memory
+        self._entries: "OrderedDict[Hashable, _PoolEntry]" = OrderedDict()
+        self._keys: Dict[int, Hashable] = {}
+        self._holds: Dict[Tuple[int, Hashable], List[weakref.finalize]] = {}
+        self._lock = threading.RLock()
+        self.stats = {"loads": 0, "hits": 0, "evictions": 0}
+
+    def acquire(self, key: Hashable, loader: Callable[[], Any], owner: Any = None) -> Any:
+        """
+        Shared model for ``key``, loaded with ``loader`` if it is not pooled yet.
+
+        Args:
+            key: Pool key, usually from :func:`pool_key`.
+            loader (callable): Loads the model; called at most once per key while pooled.
+            owner: Object holding the reference (e.g. the learner); the reference is
+                released when it is garbage-collected.
+
+        Returns:
+            The pooled model.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                model = loader()
+                entry = _PoolEntry(model, model_memory(model))
+                self._entries[key] = entry
+                self._keys[id(model)] = key
+                self.stats["loads"] += 1
+                logger.info(f"Model pool loaded {key[:2]} ({entry.memory / 1024 ** 2:.0f} MiB).")
+            else:
+                self.stats["hits"] += 1
+                logger.info(f"Model pool shares {key[:2]}.")
+            self._entries.move_to_end(key)
+            entry.refs += 1
+            if owner is not None:
+                hold = weakref.finalize(owner, self._drop_hold, (id(owner), key))
+                hold.atexit = False
+                self._holds.setdefault((id(owner), key), []).append(hold)
+            self._evict()
+            return entry.model
+
+    def release(self, model: Any, owner: Any = None) -> None:
+        """
+        Drop one reference to a pooled model.
+
+        Args:
+            model: Model returned by :meth:`acquire`; other objects (e.g. ``None`` or a model
+                loaded outside the pool) are ignored.
+            owner: The owner it was acquired for, if any.
+        """
+        with self._lock:
+            key = self._keys.get(id(model))
+            if key is None or self._entries[key].model is not model:
+                return
+            holds = self._holds.get((id(owner), key), []) if owner is not None else []
+            if holds:
+                holds[-1]()  # runs _drop_hold and detaches the hold from the owner
+            else:
+                self._decref(key)
+
+    def _drop_hold(self, hold_key: Tuple[int, Hashable]) -> None:
+        """Forget a finished hold of an owner and drop its reference."""
+        with self._lock:
+            holds = [hold for hold in self._holds.pop(hold_key, []) if hold.alive]
+            if holds:
+                self._holds[hold_key] = holds
+            self._decref(hold_key[1])
+
+    def _decref(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs = max(entry.refs - 1, 0)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Evict least recently used idle models until the pool fits ``max_memory``."""
+        if self.max_memory is None:
+            return
+        for key in [key for key, entry in self._entries.items() if entry.refs == 0]:
+            if self.memory <= self.max_memory:
+                break
+            self._drop(key)
+            self.stats["evictions"] += 1
+            logger.info(f"Model pool evicted {key[:2]}.")
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._keys.pop(id(entry.model), None)
+        for hold_key in [hold_key for hold_key in self._holds if hold_key[1] == key]:
+            for hold in self._holds.pop(hold_key):
+                hold.detach()
+
+    @property
+    def memory(self) -> int:
+        """Bytes taken by all pooled models."""
+        return sum(entry.memory for entry in self._entries.values())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def clear(self) -> None:
+        """Forget all pooled models; learners still using one keep their instance."""
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def info(self) -> Dict[str, int]:
+        """Number of pooled and in-use models, their memory and the load/hit/eviction counts."""
+        with self._lock:
+            return {"models": len(self._entries),
+                    "in_use": sum(entry.refs > 0 for entry in self._entries.values()),
+                    "memory": self.memory, **self.stats}
+
+
+_model_pool: Optional[ModelPool] = None
+
+
+def get_model_pool() -> ModelPool:
+    """The process-wide pool; its budget for idle models is read from ``$ONTOLEARNER_MODEL_POOL_GB`` (default 0)."""
+    global _model_pool
+    if _model_pool is None:
+        budget = os.environ.get(POOL_BUDGET_ENV_VAR)
+        _model_pool = ModelPool(max_memory=int(float(budget) * 1024 ** 3) if budget else 0)
+    return _model_pool
+
+
+def load_causal_lm(model_id: str, owner: Any = None, model_class: Any = None, **kwargs: Any) -> Any:
+    """
+    Pooled ``AutoModelForCausalLM.from_pretrained(model_id, **kwargs)``.
+
+    Args:
+        model_id (str): Hugging Face id or local path.
+        owner: Object holding the reference, see :meth:`ModelPool.acquire`.
+        model_class: Model class to load with instead of ``AutoModelForCausalLM``.
+        **kwargs: ``from_pretrained`` arguments.
+    """
+    if model_class is None:
+        from transformers import AutoModelForCausalLM
+
+        model_class = AutoModelForCausalLM
+    key = pool_key(model_class.__name__, model_id, **kwargs)
+    return get_model_pool().acquire(key, lambda: model_class.from_pretrained(model_id, **kwargs), owner=owner)
+
+
+def load_sentence_transformer(model_id: str, owner: Any = None, **kwargs: Any) -> Any:
+    """Pooled ``SentenceTransformer(model_id, **kwargs)``; see :func:`load_causal_lm`."""
+    from sentence_transformers import SentenceTransformer
+
+    key = pool_key("SentenceTransformer", model_id, **kwargs)
+    return get_model_pool().acquire(key, lambda: SentenceTransformer(model_id, **kwargs), owner=owner)
+
+
+def load_cross_encoder(model_id: str, owner: Any = None, **kwargs: Any) -> Any:
+    """Pooled ``CrossEncoder(model_id, **kwargs)``; see :func:`load_causal_lm`."""
+    from sentence_transformers import CrossEncoder
+
+    key = pool_key("CrossEncoder", model_id, **kwargs)
+    return get_model_pool().acquire(key, lambda: CrossEncoder(model_id, **kwargs), owner=owner)
+
+
+def release_model(model: Any, owner: Any = None) -> None:
+    """Release a model obtained from the process-wide pool (no-op for other objects)."""
+    get_model_pool().release(model, owner=owner)
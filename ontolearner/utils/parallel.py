@@ -0,0 +1,135 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+#: Object served by the current worker process (set by :func:`_init_worker`).
+_worker_target: Any = None
+
+
+def available_cores() -> List[int]:
+    """CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def core_subsets(num_workers: int, cores_per_worker: Optional[int] = None) -> List[List[int]]:
+    """
+    Disjoint core subsets, one per worker (subsets wrap around when there are fewer cores than requested).
+
+    Args:
+        num_workers (int): Number of workers.
+        cores_per_worker (int, optional): Cores per worker; the available cores are split evenly by default.
+
+    Returns:
+        List[List[int]]: Core ids of every worker.
+    """
+    cores = available_cores()
+    per_worker = cores_per_worker or max(1, len(cores) // num_workers)
+    return [[cores[(worker * per_worker + offset) % len(cores)] for offset in range(per_worker)]
+            for worker in range(num_workers)]
+
+
+def _init_worker(target: Any, setup: str, setup_args: Sequence[Any], cores: "multiprocessing.Queue",
+                 completion_cache_path: Optional[str]) -> None:
+    """Pin the worker to its cores, then run ``target.setup(*setup_args)`` once (e.g. load the model)."""
+    global _worker_target
+    worker_cores = cores.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, worker_cores)
+    torch.set_num_threads(len(worker_cores))
+    if completion_cache_path is not None:
+        from .completion_cache import enable_completion_cache
+        enable_completion_cache(completion_cache_path)
+    _worker_target = target
+    getattr(_worker_target, setup)(*setup_args)
+
+
+def _call_worker(method: str, args: Sequence[Any]) -> Any:
+    return getattr(_worker_target, method)(*args)
+
+
+class DataParallelPool:
+    """
+    Pool of worker processes that each hold a copy of one object (e.g. a learner with its model).
+
+    The object is pickled once per worker, which then pins itself to a subset of the CPU
+    cores, sets its intra-op thread count to the size of the subset and calls the ``setup``
+    method once, typically to load the model. Workers are started with ``spawn``, so no
+    OpenMP state is inherited; ``safetensors`` checkpoints are memory-mapped, so the weight
+    files are read through the shared page cache.
+
+    Method calls are then sent by name: :meth:`map` runs a method on many argument batches
+    across the workers and yields the results in submission order.
+
+    Example:
+        >>> pool = DataParallelPool(learner_copy, setup="_load_worker", setup_args=("Qwen/Qwen2.5-0.5B",),
+        ...                         num_workers=8)
+        >>> for result in pool.map("_accept_items", batches):
+        ...     ...
+        >>> pool.close()
+    """
+
+    def __init__(self,
+                 target: Any,
+                 setup: str,
+                 setup_args: Sequence[Any] = (),
+                 num_workers: int = 2,
+                 cores_per_worker: Optional[int] = None,
+                 completion_cache_path: Optional[str] = None) -> None:
+        """
+        Args:
+            target: Picklable object copied into every worker.
+            setup (str): Method of ``target`` called once in every worker.
+            setup_args: Arguments of the setup method.
+            num_workers (int): Number of worker processes.
+            cores_per_worker (int, optional): Cores each worker is pinned to; the available
+                cores are split evenly by default.
+            completion_cache_path (str, optional): Completion cache the workers open
+                (see :func:`enable_completion_cache`).
+        """
+        self.num_workers = num_workers
+        context = multiprocessing.get_context("spawn")
+        cores = context.Queue()
+        for subset in core_subsets(num_workers, cores_per_worker):
+            cores.put(subset)
+        self._executor = ProcessPoolExecutor(max_workers=num_workers, mp_context=context, initializer=_init_worker,
+                                             initargs=(target, setup, tuple(setup_args), cores,
+                                                       completion_cache_path))
+        # start every worker now, so that the models are loaded once, before the first batch
+        for future in [self._executor.submit(os.getpid) for _ in range(num_workers)]:
+            future.result()
+        logger.info(f"Started {num_workers} data-parallel workers.")
+
+    def call(self, method: str, *args: Any) -> Any:
+        """Run ``method(*args)`` in one worker."""
+        return self._executor.submit(_call_worker, method, args).result()
+
+    def map(self, method: str, batches: Iterable[Any]) -> Iterator[Any]:
+        """Run ``method(batch)`` for every batch across the workers; results are yielded in order."""
+        return self._executor.map(_call_worker, itertools.repeat(method), ((batch,) for batch in batches))
+
+    def close(self) -> None:
+        """Stop the workers."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,224 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import re
+import string
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import torch
+from transformers import BatchEncoding
+
+logger = logging.getLogger(__name__)
+
+#: Text put in front of a segment that does not start the prompt, so that the tokenizer
+#: does not treat the segment as the beginning of a text (e.g. SentencePiece's dummy prefix).
+_ANCHOR = "§"
+#: Templates are given up if this many verifications fail before the first one succeeds.
+_MAX_FAILED_VERIFICATIONS = 32
+
+
+class CompiledTemplate:
+    """
+    A prompt template split into pre-tokenized static segments and slots.
+
+    The static segments are tokenized once. For a formatted prompt, the slot values are
+    recovered by matching the template, tokenized once per distinct value and concatenated
+    with the static token ids. A space in front of a slot is tokenized with the slot value,
+    where word-level tokenizers attach it.
+
+    Tokenizing segments separately can differ from tokenizing the whole prompt at segment
+    boundaries, so the first prompt with a new slot value is also tokenized as a whole: if
+    the ids differ, the value is marked unsafe and prompts containing it fall back to the
+    tokenizer. Compiled prompts are therefore always tokenized exactly like the tokenizer does.
+    """
+
+    def __init__(self, template: str, tokenizer: Any, max_cached_values: int = 100000) -> None:
+        """
+        Args:
+            template (str): ``str.format`` template with named fields, e.g. ``"Term: {term}"``.
+            tokenizer: Hugging Face tokenizer (anything with ``encode(text, add_special_tokens)``).
+            max_cached_values (int): Number of tokenized slot values kept.
+
+        Raises:
+            ValueError: If the template has positional, formatted or adjacent fields, which
+                cannot be recovered from a formatted prompt.
+        """
+        self.template = template
+        self.tokenizer = tokenizer
+        self.max_cached_values = max_cached_values
+        self.failed = False
+        self._verified = 0
+        self._rejected = 0
+        self._segments: List[Tuple[str, Any, bool]] = []  # (kind, ids or slot prefix, starts the prompt)
+        pattern, groups = [], set()
+        for literal, field, format_spec, conversion in string.Formatter().parse(template):
+            lead = ""
+            if field is not None and literal.endswith(" "):
+                literal, lead = literal[:-1], " "
+            if literal:
+                self._segments.append(("static", self._encode_piece(literal, not self._segments), False))
+                pattern.append(re.escape(literal))
+            if field is None:
+                continue
+            if not field.isidentifier() or format_spec or conversion:
+                raise ValueError(f"Cannot compile field '{{{field}}}' of the prompt template.")
+            if self._segments and self._segments[-1][0] == "slot" and not lead:
+                raise ValueError("Cannot compile a prompt template with adjacent fields.")
+            self._segments.append(("slot", (lead, field), not self._segments))
+            pattern.append(re.escape(lead) + (f"(?P={field})" if field in groups else f"(?P<{field}>.*?)"))
+            groups.add(field)
+        self._pattern = re.compile("".join(pattern), re.DOTALL)
+        self._special = self._special_tokens()
+        self._values: "OrderedDict[Tuple[str, bool], Optional[List[int]]]" = OrderedDict()
+
+    def _encode_piece(self, text: str, starts_prompt: bool) -> List[int]:
+        """Token ids of ``text`` as it appears in the prompt, without special tokens."""
+        if starts_prompt:
+            return self.tokenizer.encode(text, add_special_tokens=False)
+        anchor = self.tokenizer.encode(_ANCHOR, add_special_tokens=False)
+        ids = self.tokenizer.encode(_ANCHOR + text, add_special_tokens=False)
+        if anchor and ids[:len(anchor)] == anchor:
+            return ids[len(anchor):]
+        return self.tokenizer.encode(text, add_special_tokens=False)
+
+    def _special_tokens(self) -> Tuple[List[int], List[int]]:
+        """Special token ids the tokenizer puts before and after a text (e.g. BOS)."""
+        bare = self.tokenizer.encode(_ANCHOR, add_special_tokens=False)
+        full = self.tokenizer.encode(_ANCHOR, add_special_tokens=True)
+        for start in range(len(full) - len(bare) + 1):
+            if full[start:start + len(bare)] == bare:
+                return full[:start], full[start + len(bare):]
+        return [], []
+
+    def encode(self, text: str) -> Optional[List[int]]:
+        """
+        Token ids of a prompt formatted from this template, with special tokens.
+
+        Returns:
+            ``None`` if the prompt does not match the template or contains an unsafe value.
+        """
+        match = None if self.failed else self._pattern.fullmatch(text)
+        if match is None:
+            return None
+        ids, new_keys = list(self._special[0]), {}
+        for kind, value, starts_prompt in self._segments:
+            if kind == "static":
+                ids.extend(value)
+                continue
+            lead, field = value
+            key = (lead + match.group(field), starts_prompt)
+            if key in self._values:
+                self._values.move_to_end(key)
+                piece = self._values[key]
+            else:
+                piece = new_keys[key] if key in new_keys else self._encode_piece(key[0], starts_prompt)
+                new_keys[key] = piece
+            if piece is None:
+                return None
+            ids.extend(piece)
+        ids.extend(self._special[1])
+        if new_keys and not self._verify(text, ids, new_keys):
+            return None
+        return ids
+
+    def _verify(self, text: str, ids: List[int], new_keys: Dict[Tuple[str, bool], List[int]]) -> bool:
+        """Compare ``ids`` with the tokenization of the whole prompt and remember the new values."""
+        safe = self.tokenizer.encode(text, add_special_tokens=True) == ids
+        if safe:
+            self._verified += 1
+        else:
+            self._rejected += 1
+            if not self._verified and self._rejected >= _MAX_FAILED_VERIFICATIONS:
+                logger.warning("Segment-wise tokenization of the prompt template never matches the tokenizer; "
+                               "prompts of this template are tokenized as a whole.")
+                self.failed = True
+        for key, piece in new_keys.items():
+            self._values[key] = piece if safe else None
+        while len(self._values) > self.max_cached_values:
+            self._values.popitem(last=False)
+        return safe
+
+
+class PromptCompiler:
+    """
+    Tokenizer front-end that encodes prompts of known templates from pre-tokenized segments.
+
+    It is called like the tokenizer it wraps. Prompts formatted from one of the templates are
+    assembled from cached token ids (see :class:`CompiledTemplate`); other prompts are passed
+    to the tokenizer. Both give identical ids, so the compiler only changes the tokenization
+    cost: the instruction text of a template is tokenized once instead of once per prompt.
+
+    Example:
+        >>> compiler = PromptCompiler(tokenizer, [StandardizedPrompting(task="term-typing").prompt_template])
+        >>> encoded = compiler(prompts, return_tensors="pt", padding=True, max_length=512, truncation=True)
+        >>> compiler.stats
+        {'compiled': 9998, 'tokenized': 2}
+    """
+
+    def __init__(self, tokenizer: Any, templates: Sequence[str], max_cached_values: int = 100000) -> None:
+        """
+        Args:
+            tokenizer: Hugging Face tokenizer.
+            templates: Prompt templates (e.g. ``AutoPrompt.prompt_template``).
+            max_cached_values (int): Number of tokenized slot values kept per template.
+        """
+        self.tokenizer = tokenizer
+        self.templates = list(templates)
+        self._compiled: List[CompiledTemplate] = []
+        for template in self.templates:
+            try:
+                self._compiled.append(CompiledTemplate(template, tokenizer, max_cached_values))
+            except ValueError as error:
+                logger.warning(f"Prompt template is tokenized as a whole: {error}")
+        self.stats = {"compiled": 0, "tokenized": 0}
+
+    def encode(self, text: str) -> List[int]:
+        """Token ids of ``text`` with special tokens."""
+        for template in self._compiled:
+            ids = template.encode(text)
+            if ids is not None:
+                self.stats["compiled"] += 1
+                return ids
+        self.stats["tokenized"] += 1
+        return self.tokenizer.encode(text, add_special_tokens=True)
+
+    def __call__(self, inputs: Any, return_tensors: Optional[str] = None, max_length: Optional[int] = None,
+                 truncation: bool = False, padding: bool = False, add_special_tokens: bool = True) -> BatchEncoding:
+        """
+        Encode prompts like the wrapped tokenizer, honouring its padding and truncation sides.
+
+        Returns:
+            ``input_ids`` and ``attention_mask``, as lists or (with ``return_tensors="pt"``) tensors.
+        """
+        if not add_special_tokens:
+            return self.tokenizer(inputs, return_tensors=return_tensors, max_length=max_length,
+                                  truncation=truncation, padding=padding, add_special_tokens=False)
+        encoded = [self.encode(text) for text in ([inputs] if isinstance(inputs, str) else inputs)]
+        if truncation and max_length is not None:
+            right = getattr(self.tokenizer, "truncation_side", "right") == "right"
+            encoded = [ids[:max_length] if right else ids[-max_length:] for ids in encoded]
+        masks = [[1] * len(ids) for ids in encoded]
+        if padding or return_tensors is not None:
+            width = max((len(ids) for ids in encoded), default=0)
+            pad_id = self.tokenizer.pad_token_id if self.tokenizer.pad_token_id is not None else 0
+            left = getattr(self.tokenizer, "padding_side", "right") == "left"
+            pads = [width - len(ids) for ids in encoded]
+            encoded = [[pad_id] * pad + ids if left else ids + [pad_id] * pad for ids, pad in zip(encoded, pads)]
+            masks = [[0] * pad + mask if left else mask + [0] * pad for mask, pad in zip(masks, pads)]
+        if return_tensors == "pt":
+            return BatchEncoding({"input_ids": torch.tensor(encoded, dtype=torch.long),
+                                  "attention_mask": torch.tensor(masks, dtype=torch.long)})
+        return BatchEncoding({"input_ids": encoded, "attention_mask": masks})
@@ -0,0 +1,288 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("float32", "float16", "int8")
+
+
+class QuantizedEmbeddings:
+    """
+    Precision-tagged storage for L2-normalized embedding matrices.
+
+    - ``float32``: values are kept as they are (used for memory-mapped indexes).
+    - ``float16``: values are stored as half precision floats.
+    - ``int8``: each row is scaled by its own factor ``max(|row|) / 127`` and
+      rounded to ``int8``; the per-row scales are kept in ``float32``.
+
+    Scoring (:meth:`scores`) quantizes the query the same way and computes the
+    dot products chunk by chunk over the documents. PyTorch has no fast integer
+    GEMM on CPU, so each chunk is upcast to ``float32`` right before the product;
+    the integer products are exact, and only one chunk is ever held in full precision.
+
+    Attributes:
+        values (torch.Tensor): Quantized matrix of shape ``[num_docs, dim]``.
+        scales (torch.Tensor | None): Per-row ``int8`` scales, ``None`` for float precisions.
+    """
+
+    def __init__(self, values: torch.Tensor, scales: Optional[torch.Tensor] = None) -> None:
+        self.values = values
+        self.scales = scales
+
+    @classmethod
+    def quantize(cls, embeddings: torch.Tensor, precision: str) -> "QuantizedEmbeddings":
+        """
+        Quantize a float embedding matrix.
+
+        Args:
+            embeddings (torch.Tensor): Matrix of shape ``[num_docs, dim]``.
+            precision (str): ``"float32"``, ``"float16"`` or ``"int8"``.
+
+        Returns:
+            QuantizedEmbeddings: The quantized matrix.
+        """
+        embeddings = torch.as_tensor(embeddings).float()
+        if precision == "float32":
+            return cls(embeddings)
+        if precision == "float16":
+            return cls(embeddings.half())
+        if precision == "int8":
+            scales = embeddings.abs().amax(dim=1).clamp(min=1e-12) / 127.0
+            values = torch.round(embeddings / scales[:, None]).clamp(-127, 127).to(torch.int8)
+            return cls(values, scales)
+        raise ValueError(f"Unsupported precision '{precision}'. Choose from {list(PRECISIONS)}.")
+
+    @property
+    def precision(self) -> str:
+        return {torch.int8: "int8", torch.float16: "float16"}.get(self.values.dtype, "float32")
+
+    @property
+    def shape(self) -> torch.Size:
+        return self.values.shape
+
+    @property
+    def device(self) -> torch.device:
+        return self.values.device
+
+    @property
+    def nbytes(self) -> int:
+        scales = 0 if self.scales is None else self.scales.numel() * self.scales.element_size()
+        return self.values.numel() * self.values.element_size() + scales
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def __getitem__(self, rows: Any) -> "QuantizedEmbeddings":
+        return QuantizedEmbeddings(self.values[rows], None if self.scales is None else self.scales[rows])
+
+    def cat(self, *others: "QuantizedEmbeddings") -> "QuantizedEmbeddings":
+        """Return a new matrix with the rows of ``others`` appended."""
+        values = torch.cat([self.values] + [other.values.to(self.device) for other in others], dim=0)
+        if self.scales is None:
+            return QuantizedEmbeddings(values)
+        scales = torch.cat([self.scales] + [other.scales.to(self.device) for other in others], dim=0)
+        return QuantizedEmbeddings(values, scales)
+
+    def set_rows(self, rows: List[int], other: "QuantizedEmbeddings") -> "QuantizedEmbeddings":
+        """Return a copy with ``rows`` replaced by the rows of ``other``."""
+        index = torch.tensor(rows, dtype=torch.long, device=self.device)
+        values = self.values.clone()
+        values[index] = other.values.to(self.device)
+        if self.scales is None:
+            return QuantizedEmbeddings(values)
+        scales = self.scales.clone()
+        scales[index] = other.scales.to(self.device)
+        return QuantizedEmbeddings(values, scales)
+
+    def dequantize(self, rows: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """
+        Return (a subset of) the matrix in ``float32``.
+
+        Args:
+            rows (torch.Tensor, optional): Row indices of any shape; the result
+                then has shape ``[*rows.shape, dim]``.
+        """
+        values = self.values if rows is None else self.values[rows]
+        if self.scales is None:
+            return values.float()
+        scales = self.scales if rows is None else self.scales[rows]
+        return values.float() * scales.unsqueeze(-1)
+
+    def scores(self, query: torch.Tensor, chunk_size: int = 65536) -> torch.Tensor:
+        """
+        Approximate dot products between float queries and all stored rows.
+
+        Args:
+            query (torch.Tensor): Query matrix of shape ``[num_queries, dim]``.
+            chunk_size (int): Number of stored rows upcast at once.
+
+        Returns:
+            torch.Tensor: ``float32`` score matrix of shape ``[num_queries, num_docs]``.
+        """
+        query_q, query_scales = self._quantize_query(query)
+        chunks = [chunk_scores for _, chunk_scores in self._chunk_scores(query_q, chunk_size)]
+        scores = torch.cat(chunks, dim=1) if chunks else query_q.new_zeros((query_q.shape[0], 0))
+        if query_scales is not None:
+            scores = scores * query_scales[:, None]
+        return scores
+
+    def topk(self, query: torch.Tensor, k: int, chunk_size: int = 65536) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Top-k of :meth:`scores` without materializing the full score matrix.
+
+        A running top-k is merged with the top-k of every chunk of stored rows, so
+        memory stays ``O(num_queries * (k + chunk_size))`` however many rows are
+        stored (e.g. a memory-mapped on-disk index).
+
+        Args:
+            query (torch.Tensor): Query matrix of shape ``[num_queries, dim]``.
+            k (int): Number of results per query (at most the number of stored rows).
+            chunk_size (int): Number of stored rows upcast at once.
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: ``(scores, indices)`` of shape ``[num_queries, k]``.
+        """
+        query_q, query_scales = self._quantize_query(query)
+        k = min(k, len(self))
+        best_scores = query_q.new_empty((query_q.shape[0], 0))
+        best_indices = torch.empty((query_q.shape[0], 0), dtype=torch.long, device=query_q.device)
+        for start, chunk_scores in self._chunk_scores(query_q, chunk_size):
+            chunk_best, chunk_indices = torch.topk(chunk_scores, k=min(k, chunk_scores.shape[1]), dim=1)
+            merged_scores = torch.cat([best_scores, chunk_best], dim=1)
+            merged_indices = torch.cat([best_indices, chunk_indices + start], dim=1)
+            best_scores, order = torch.topk(merged_scores, k=min(k, merged_scores.shape[1]), dim=1)
+            best_indices = torch.gather(merged_indices, 1, order)
+        if query_scales is not None:  # positive per-query factors do not change the ranking
+            best_scores = best_scores * query_scales[:, None]
+        return best_scores, best_indices
+
+    def _quantize_query(self, query: torch.Tensor) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+        """Round a float query to the stored precision; returns the values and, for ``int8``, the scales."""
+        query = query.float().to(self.device)
+        if self.precision == "float32":
+            return query, None
+        if self.precision == "float16":
+            return query.half().float(), None
+        quantized = QuantizedEmbeddings.quantize(query, "int8")
+        return quantized.values.float(), quantized.scales
+
+    def _chunk_scores(self, query_q: torch.Tensor, chunk_size: int) -> Iterator[Tuple[int, torch.Tensor]]:
+        """Yield ``(start, scores)`` for every chunk of stored rows, without the query scales."""
+        for start in range(0, len(self), chunk_size):
+            block = self.values[start:start + chunk_size].float()
+            chunk_scores = torch.matmul(query_q, block.T)
+            if self.scales is not None:
+                chunk_scores = chunk_scores * self.scales[start:start + chunk_size][None, :]
+            yield start, chunk_scores
+
+
+def quantized_search(query: torch.Tensor,
+                     embeddings: QuantizedEmbeddings,
+                     top_k: int,
+                     rescore_multiplier: int = 4) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Top-k search over quantized embeddings with ``float32`` re-scoring.
+
+    The quantized scores select ``top_k * rescore_multiplier`` candidates per
+    query (keeping a running top-k over chunks of documents, see
+    :meth:`QuantizedEmbeddings.topk`), which are re-scored with the ``float32`` query against their
+    dequantized rows before the final top-k is taken.
+
+    Args:
+        query (torch.Tensor): Normalized query matrix of shape ``[num_queries, dim]``.
+        embeddings (QuantizedEmbeddings): Normalized, quantized document matrix.
+        top_k (int): Number of results per query.
+        rescore_multiplier (int): Candidate pool size relative to ``top_k``.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor]: ``(scores, indices)`` of shape ``[num_queries, top_k]``.
+    """
+    top_k = min(top_k, len(embeddings))
+    query = query.float().to(embeddings.device)
+    if embeddings.precision == "float32":
+        return embeddings.topk(query, k=top_k)
+    num_candidates = min(top_k * max(rescore_multiplier, 1), len(embeddings))
+    _, candidates = embeddings.topk(query, k=num_candidates)
+    rescored = torch.einsum("qd,qkd->qk", query, embeddings.dequantize(candidates))
+    scores, order = torch.topk(rescored, k=top_k, dim=1)
+    return scores, torch.gather(candidates, 1, order)
+
+
+def recall_at_k(reference: List[List[Any]], candidates: List[List[Any]], k: int) -> float:
+    """
+    Mean fraction of the reference top-k found in the candidate top-k.
+
+    Args:
+        reference (List[List[Any]]): Per-query reference rankings (e.g. ``float32`` results).
+        candidates (List[List[Any]]): Per-query rankings to evaluate.
+        k (int): Cutoff.
+
+    Returns:
+        float: Recall@k in ``[0, 1]``.
+    """
+    recalls = []
+    for ref, cand in zip(reference, candidates):
+        ref_k = set(ref[:k])
+        if ref_k:
+            recalls.append(len(ref_k & set(cand[:k])) / len(ref_k))
+    return float(np.mean(recalls)) if recalls else 1.0
+
+
+def quantization_report(document_embeddings: Any,
+                        query_embeddings: Any,
+                        ks: Tuple[int, ...] = (1, 5, 10),
+                        precisions: Tuple[str, ...] = ("float16", "int8"),
+                        rescore_multiplier: int = 4) -> Dict[str, Dict[str, float]]:
+    """
+    Compare reduced-precision retrieval against the ``float32`` baseline.
+
+    For each precision the report gives recall@k of the quantized search
+    (with and without ``float32`` re-scoring) against the exact ``float32``
+    top-k, together with the index size.
+
+    Args:
+        document_embeddings: Document embedding matrix ``[num_docs, dim]``.
+        query_embeddings: Query embedding matrix ``[num_queries, dim]``.
+        ks (Tuple[int, ...]): Cutoffs to report.
+        precisions (Tuple[str, ...]): Precisions to evaluate.
+        rescore_multiplier (int): Candidate pool size relative to ``k`` for re-scoring.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per-precision metrics, e.g.
+        ``{"int8": {"recall@5": 0.99, "recall@5_no_rescore": 0.97, "index_mb": 12.3, ...}}``.
+    """
+    docs = F.normalize(torch.as_tensor(document_embeddings).float(), p=2, dim=1)
+    queries = F.normalize(torch.as_tensor(query_embeddings).float(), p=2, dim=1)
+    max_k = min(max(ks), docs.shape[0])
+    baseline = torch.topk(queries @ docs.T, k=max_k, dim=1).indices.tolist()
+    report = {"float32": {"index_mb": docs.numel() * docs.element_size() / 2 ** 20,
+                          **{f"recall@{k}": 1.0 for k in ks}}}
+    for precision in precisions:
+        quantized = QuantizedEmbeddings.quantize(docs, precision)
+        plain = torch.topk(quantized.scores(queries), k=max_k, dim=1).indices.tolist()
+        metrics = {"index_mb": quantized.nbytes / 2 ** 20}
+        for k in ks:
+            _, rescored = quantized_search(queries, quantized, top_k=k, rescore_multiplier=rescore_multiplier)
+            metrics[f"recall@{k}"] = recall_at_k(baseline, rescored.tolist(), k)
+            metrics[f"recall@{k}_no_rescore"] = recall_at_k(baseline, plain, k)
+        report[precision] = metrics
+        logger.info(f"{precision}: {metrics}")
+    return report
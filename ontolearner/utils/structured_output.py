@@ -0,0 +1,189 @@
+# Copyright (c) 2025 SciKnowOrg
+#
+# Licensed under the MIT License (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import ast
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+import torch
+from transformers import StoppingCriteria
+
+_OPENERS = {"[": list, "{": dict}
+_CLOSERS = {"]": "[", "}": "{"}
+_QUOTES = ("\"", "'")
+
+
+def _parse_value(text: str) -> Tuple[bool, Any]:
+    """Parse ``text`` as JSON (allowing raw newlines in strings) or as a Python literal (e.g. ``['a', 'b']``)."""
+    try:
+        return True, json.loads(text, strict=False)
+    except ValueError:
+        pass
+    try:
+        return True, ast.literal_eval(text)
+    except Exception:
+        return False, None
+
+
+class JsonScanner:
+    """
+    Incremental parser for the first JSON value (or Python list/dict literal) in a text.
+
+    Text is fed in pieces, e.g. as it is generated. The scanner tracks the bracket and quote
+    state from the first ``[`` or ``{`` on; when the matching bracket closes the top-level
+    value, the value is parsed. If it parses to one of the accepted ``types`` the scanner is
+    done, otherwise scanning resumes after its opening bracket (so ``"[PAIR] ['a']"`` yields
+    ``['a']``). Text around the value, such as a preamble or a Markdown fence, is ignored.
+
+    Example:
+        >>> scanner = JsonScanner(types=(list,))
+        >>> scanner.feed('Answer: ["cat", "d')
+        False
+        >>> scanner.feed('og"] and more')
+        True
+        >>> scanner.value, scanner.text[scanner.span[0]:scanner.span[1]]
+        (['cat', 'dog'], '["cat", "dog"]')
+    """
+
+    def __init__(self, types: Sequence[type] = (dict, list)) -> None:
+        """
+        Args:
+            types: Accepted types of the top-level value, ``dict`` and/or ``list``.
+        """
+        self.types = tuple(types)
+        self.text = ""
+        self.done = False
+        self.value: Any = None
+        #: Start and end offsets of the value in :attr:`text` once done.
+        self.span: Optional[Tuple[int, int]] = None
+        self._position = 0
+        self._start: Optional[int] = None
+        self._stack: List[str] = []
+        self._quote: Optional[str] = None
+        self._escape = False
+
+    def feed(self, text: str) -> bool:
+        """Scan the next piece of text; returns whether a complete value has been read."""
+        if self.done:
+            return True
+        self.text += text
+        while self._position < len(self.text):
+            char = self.text[self._position]
+            self._position += 1
+            if self._start is None:
+                if char in _OPENERS and _OPENERS[char] in self.types:
+                    self._start, self._stack = self._position - 1, [char]
+            elif self._quote is not None:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == self._quote:
+                    self._quote = None
+            elif char in _QUOTES:
+                self._quote = char
+            elif char in _OPENERS:
+                self._stack.append(char)
+            elif char in _CLOSERS:
+                if self._stack.pop() != _CLOSERS[char]:
+                    self._restart()
+                elif not self._stack and self._close():
+                    return True
+        return False
+
+    def _close(self) -> bool:
+        """Parse the value that just closed; on failure, resume scanning after its opening bracket."""
+        parsed, value = _parse_value(self.text[self._start:self._position])
+        if parsed and isinstance(value, self.types):
+            self.done, self.value, self.span = True, value, (self._start, self._position)
+            return True
+        self._restart()
+        return False
+
+    def _restart(self) -> None:
+        self._position, self._start, self._stack = self._start + 1, None, []
+        self._quote, self._escape = None, False
+
+
+def parse_json_value(text: str, types: Sequence[type] = (dict, list)) -> Any:
+    """
+    Parse the first JSON value (or Python literal) of an accepted type in ``text``.
+
+    Args:
+        text (str): Model output, possibly with text around the value.
+        types: Accepted types of the value, ``dict`` and/or ``list``.
+
+    Returns:
+        The parsed value, or ``None`` if the text contains no complete value of those types.
+    """
+    scanner = JsonScanner(types)
+    scanner.feed(text or "")
+    return scanner.value
+
+
+class JsonStoppingCriteria(StoppingCriteria):
+    """
+    Stops each sequence of a batch once it has generated a complete JSON value.
+
+    The generated tokens of every sequence are detokenized incrementally and fed to a
+    :class:`JsonScanner`; a sequence is finished as soon as its first value of the accepted
+    types closes, so the model does not spend the rest of ``max_new_tokens`` on text after
+    the answer. Other sequences of the batch keep generating.
+
+    Example:
+        >>> criteria = JsonStoppingCriteria(tokenizer, encoded["input_ids"].shape[1], types=(list,))
+        >>> outputs = model.generate(**encoded, max_new_tokens=256,
+        ...                          stopping_criteria=StoppingCriteriaList([criteria]))
+    """
+
+    def __init__(self, tokenizer: Any, prompt_length: int, types: Sequence[type] = (dict, list)) -> None:
+        """
+        Args:
+            tokenizer: Hugging Face tokenizer of the model.
+            prompt_length (int): Length of the (padded) prompts; later tokens are generated.
+            types: Accepted types of the top-level value, ``dict`` and/or ``list``.
+        """
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.types = tuple(types)
+        self.scanners: List[JsonScanner] = []
+        self._offsets: List[Tuple[int, int]] = []
+
+    def __call__(self, input_ids: torch.LongTensor, scores: Any, **kwargs: Any) -> torch.BoolTensor:
+        while len(self.scanners) < input_ids.shape[0]:
+            self.scanners.append(JsonScanner(self.types))
+            self._offsets.append((self.prompt_length, self.prompt_length))
+        finished = []
+        for row, ids in enumerate(input_ids.tolist()):
+            scanner = self.scanners[row]
+            if not scanner.done:
+                scanner.feed(self._new_text(row, ids))
+            finished.append(scanner.done)
+        return torch.tensor(finished, dtype=torch.bool, device=input_ids.device)
+
+    def _new_text(self, row: int, ids: List[int]) -> str:
+        """
+        Text of the tokens of ``row`` not yet fed to its scanner.
+
+        Tokens are decoded together with the previous ones, so that word boundaries and
+        multi-byte characters split across tokens come out right; an incomplete character
+        is held back until its last token arrives.
+        """
+        prefix_offset, read_offset = self._offsets[row]
+        prefix = self.tokenizer.decode(ids[prefix_offset:read_offset], skip_special_tokens=True)
+        text = self.tokenizer.decode(ids[prefix_offset:], skip_special_tokens=True)
+        if len(text) <= len(prefix) or text.endswith("\ufffd"):
+            return ""
+        self._offsets[row] = (read_offset, len(ids))
+        return text[len(prefix):]
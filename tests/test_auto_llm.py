@@ -0,0 +1,267 @@
+import pytest
+import torch
+from transformers import BatchEncoding, LlamaConfig, LlamaForCausalLM
+from types import SimpleNamespace
+
+from ontolearner.base import AutoLLM
+from ontolearner.learner import AutoLLMLearner, LabelMapper
+from ontolearner.learner.prompt import StandardizedPrompting
+from ontolearner.utils.batching import TokenBudgetBatchSampler
+from ontolearner.utils.benchmark import benchmark_prefix_caching
+from ontolearner.utils.blocking import CandidateBlocker
+
+
+class WordTokenizer:
+    """Whitespace tokenizer with a growing vocabulary and left padding."""
+
+    pad_token_id = 0
+    bos_token_id = 1
+    eos_token_id = 2
+
+    def __init__(self):
+        self.vocab = {"<pad>": 0, "<s>": 1, "</s>": 2}
+
+    def encode(self, text, add_special_tokens=False):
+        ids = [self.vocab.setdefault(word, len(self.vocab)) for word in text.split()]
+        return [self.bos_token_id] + ids if add_special_tokens else ids
+
+    def decode(self, ids, skip_special_tokens=True):
+        words = {i: w for w, i in self.vocab.items()}
+        return " ".join(words.get(int(i), "?") for i in ids)
+
+    def __call__(self, inputs, return_tensors=None, max_length=None, truncation=True, padding=True,
+                 add_special_tokens=True):
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        encoded = [self.encode(text, add_special_tokens=add_special_tokens)[-(max_length or 10 ** 6):]
+                   for text in inputs]
+        width = max(len(ids) for ids in encoded)
+        input_ids = [[self.pad_token_id] * (width - len(ids)) + ids for ids in encoded]
+        attention_mask = [[0] * (width - len(ids)) + [1] * len(ids) for ids in encoded]
+        return BatchEncoding({"input_ids": torch.tensor(input_ids), "attention_mask": torch.tensor(attention_mask)})
+
+
+class KeywordModel(torch.nn.Module):
+    """Causal LM stand-in answering "yes" after prompts that contain a positive keyword."""
+
+    def __init__(self, tokenizer, positive=("cat",), strength=3.0):
+        super().__init__()
+        self.tokenizer = tokenizer
+        self.positive = positive
+        self.strength = strength
+        self.calls = 0
+
+    @property
+    def device(self):
+        return torch.device("cpu")
+
+    def forward(self, input_ids, attention_mask):
+        self.calls += 1
+        vocab_size = 64
+        logits = torch.zeros(input_ids.shape[0], input_ids.shape[1], vocab_size)
+        yes, no = self.tokenizer.vocab["yes"], self.tokenizer.vocab["no"]
+        positive_ids = {self.tokenizer.vocab.get(word) for word in self.positive}
+        for row, ids in enumerate(input_ids.tolist()):
+            hit = any(i in positive_ids for i in ids)
+            logits[row, -1, yes if hit else no] = self.strength
+        return SimpleNamespace(logits=logits)
+
+
+@pytest.fixture
+def llm():
+    model = AutoLLM(label_mapper=LabelMapper())
+    model.tokenizer = WordTokenizer()
+    model.scoring_token_ids()
+    model.model = KeywordModel(model.tokenizer)
+    return model
+
+
+def test_score_reads_label_probabilities_in_one_pass(llm):
+    scores = llm.score(["is cat an animal ? Answer:", "is car an animal ? Answer:"])
+    assert llm.model.calls == 1
+    assert scores[0] > 0.8 > 0.2 > scores[1]
+    labels, probs = llm.label_probabilities(["is cat an animal ? Answer:"])
+    assert labels == ["yes", "no"]
+    assert probs.sum().item() == pytest.approx(1.0)
+
+
+def test_scoring_token_ids_include_variants_and_drop_shared_ids(llm):
+    ids = llm.scoring_token_ids()
+    assert set(ids) == {"yes", "no"}
+    assert len(ids["yes"]) >= 4
+    assert not set(ids["yes"]) & set(ids["no"])
+
+
+def test_calibrate_fits_platt_scaling(llm):
+    prompts = ["cat one", "cat two", "car one", "car two", "cat three", "car three"]
+    targets = [True, False, False, False, True, False]
+    slope, intercept = llm.calibrate(prompts, targets)
+    assert llm.calibration == (slope, intercept)
+    calibrated = llm.score(prompts)
+    assert all(0.0 < p < 1.0 for p in calibrated)
+    assert calibrated[0] > calibrated[2]
+
+
+def test_learner_thresholds_logit_scores(llm):
+    learner = AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(),
+                             scoring="logits", threshold=0.5, batch_size=4)
+    learner.llm = llm
+    learner._term_typing(["animal", "vehicle"])
+    predictions = learner._term_typing(["cat", "car"], test=True)
+    assert predictions == [{"term": "cat", "types": ["animal", "vehicle"]}, {"term": "car", "types": []}]
+
+    learner.threshold = 0.999
+    assert learner._term_typing(["cat"], test=True) == [{"term": "cat", "types": []}]
+
+
+def test_learner_rejects_unknown_scoring():
+    with pytest.raises(ValueError):
+        AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(), scoring="beam")
+
+
+@pytest.fixture
+def tiny_llm():
+    torch.manual_seed(0)
+    config = LlamaConfig(vocab_size=256, hidden_size=32, num_hidden_layers=2, num_attention_heads=4,
+                         num_key_value_heads=4, intermediate_size=64, pad_token_id=0, bos_token_id=1, eos_token_id=2)
+    model = AutoLLM(label_mapper=LabelMapper(), min_prefix_tokens=4)
+    model.tokenizer = WordTokenizer()
+    model.model = LlamaForCausalLM(config).eval()
+    model.label_mapper.predict = lambda outputs: outputs
+    return model
+
+
+def term_typing_prompts(terms, types=("animal", "plant")):
+    prompting = StandardizedPrompting(task="term-typing")
+    return [prompting.format(term=term, type=type) for term in terms for type in types]
+
+
+def test_prefix_caching_matches_full_prompts(tiny_llm):
+    prompts = term_typing_prompts(["cat", "oak tree", "a big red car"])
+    _, expected = tiny_llm.label_probabilities(prompts)
+    expected_text = tiny_llm.generate(prompts, max_new_tokens=3)
+
+    tiny_llm.prefix_caching = True
+    _, cached = tiny_llm.label_probabilities(prompts)
+    assert torch.allclose(cached, expected, atol=1e-5)
+    assert tiny_llm.generate(prompts, max_new_tokens=3) == expected_text
+    # the detected prefix is reused for a later single-prompt batch
+    assert len(tiny_llm._prefix_kv) == 1
+    _, single = tiny_llm.label_probabilities(prompts[-1:])
+    assert torch.allclose(single, expected[-1:], atol=1e-5)
+    assert len(tiny_llm._prefix_kv) == 1
+
+
+def test_static_prefix_is_detected_prefix():
+    prompting = StandardizedPrompting(task="term-typing")
+    prefix = prompting.static_prefix()
+    assert prefix.endswith("\n") and "{" not in prefix
+    assert all(prompt.startswith(prefix) for prompt in term_typing_prompts(["cat", "dog"]))
+
+
+def test_benchmark_prefix_caching(tiny_llm):
+    report = benchmark_prefix_caching(tiny_llm, term_typing_prompts(["cat", "dog", "oak"]), batch_size=2)
+    assert report["no_cache"]["prompt_tokens"] == report["prefix_cache"]["prompt_tokens"] > 0
+    assert report["speedup"]["tokens_per_second"] > 0
+    assert tiny_llm.prefix_caching is False
+
+
+def test_token_budget_sampler_groups_by_length():
+    lengths = [5, 120, 7, 118, 6, 60]
+    sampler = TokenBudgetBatchSampler(lengths, max_batch_size=3, max_batch_tokens=240)
+    batches = list(sampler)
+    assert batches == [[1, 3], [5, 2, 4], [0]]
+    assert all(len(batch) * lengths[batch[0]] <= 240 for batch in batches)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+
+    fixed_padding = 1 - sum(lengths) / (3 * 120 + 3 * 60)
+    assert sampler.padding_ratio() < fixed_padding
+    assert list(TokenBudgetBatchSampler(lengths, max_batch_size=-1)) == [[1, 3, 5, 2, 4, 0]]
+
+
+def test_learner_batches_by_length_and_keeps_order(llm):
+    learner = AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(),
+                             scoring="logits", batch_size=8, max_batch_tokens=200)
+    learner.llm = llm
+    seen = []
+    score = llm.score
+    llm.score = lambda prompts: seen.append(len(prompts)) or score(prompts)
+    dataset = [{"parent": parent, "child": child, "prompt": f"{parent} {child} " + "pad " * (3 if parent == "cat" else 40)}
+               for parent, child in [("car", "a"), ("cat", "b"), ("car", "c"), ("cat", "d"), ("cat", "e")]]
+    predictions = learner._taxonomy_discovery_predict(dataset)
+    assert predictions == [{"parent": "cat", "child": "b"}, {"parent": "cat", "child": "d"},
+                           {"parent": "cat", "child": "e"}]
+    assert seen == [4, 1]
+
+
+def bag_of_words_encoder(texts):
+    vocab = sorted({word for text in texts for word in text.lower().split()})
+    return torch.tensor([[float(word in text.lower().split()) for word in vocab] for text in texts])
+
+
+def test_candidate_blocker_ranks_heads_and_neighbours():
+    types = ["wine", "red wine", "car", "sports car", "white wine", "engine"]
+    blocker = CandidateBlocker(top_k=1, encoder=bag_of_words_encoder)
+    pairs = blocker.candidates(types)
+    # lexical-head pairs come first, with the head as parent
+    assert set(pairs[:3]) == {("wine", "red wine"), ("car", "sports car"), ("wine", "white wine")}
+    assert ("red wine", "wine") not in pairs
+    assert len(pairs) < len(types) * (len(types) - 1) // 2
+    assert blocker.candidates(types, budget=2) == pairs[:2]
+
+    both = CandidateBlocker(top_k=1, encoder=bag_of_words_encoder, both_directions=True, lexical_heads=False)
+    both_pairs = both.candidates(types)
+    assert all((child, parent) in both_pairs for parent, child in both_pairs)
+
+    report = blocker.recall_report(types, [("wine", "red wine"), ("Car", "sports car"), ("engine", "car")],
+                                   budgets=[1, 3, 100])
+    assert [row["retained"] for row in report] == [1, 2, 2]
+    assert report[-1]["recall"] == pytest.approx(2 / 3)
+
+
+def test_learner_asks_only_blocked_pairs(llm):
+    blocker = CandidateBlocker(top_k=1, budget=2, encoder=bag_of_words_encoder)
+    learner = AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(), scoring="logits",
+                             candidate_blocker=blocker)
+    learner.llm = llm
+    asked = []
+    learner._accept_dataset = lambda dataset: asked.extend((item["parent"], item["child"]) for item in dataset) or \
+        [True] * len(dataset)
+    learner._taxonomy_discovery(["cat", "wild cat", "car", "race car"], test=True)
+    assert sorted(asked) == [("car", "race car"), ("cat", "wild cat")]
+
+
+def test_continuation_log_likelihoods_match_full_sequences(tiny_llm):
+    prompts = ["is a cat related to a dog ? Relation:", "oak Relation:"]
+    relations = [["part of", "eats", "lives in the same house as"], ["eats"]]
+    scores = tiny_llm.continuation_log_likelihoods(prompts, relations, normalize=False)
+    for prompt, labels, label_scores in zip(prompts, relations, scores):
+        for label, score in zip(labels, label_scores):
+            prompt_ids = tiny_llm.tokenizer.encode(prompt, add_special_tokens=True)
+            label_ids = tiny_llm.tokenizer.encode(label)
+            ids = torch.tensor([prompt_ids + label_ids])
+            log_probs = torch.log_softmax(tiny_llm.model(input_ids=ids).logits[0].float(), dim=-1)
+            expected = sum(log_probs[len(prompt_ids) - 1 + t, token].item() for t, token in enumerate(label_ids))
+            assert score == pytest.approx(expected, abs=1e-4)
+
+
+def test_learner_classifies_relations_in_one_prompt_per_pair(tiny_llm):
+    learner = AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(),
+                             relation_scoring="classify", relation_threshold=0.0, max_relations=2)
+    learner.llm = tiny_llm
+    calls = []
+    likelihoods = tiny_llm.continuation_log_likelihoods
+    tiny_llm.continuation_log_likelihoods = lambda prompts, options: calls.append(len(prompts)) or \
+        likelihoods(prompts, options)
+    dataset = learner._relation_classification_dataset([("cat", "mouse"), ("oak", "forest")],
+                                                       [["eats", "part of", "chases"]] * 2)
+    assert "- part of" in dataset[0]["prompt"]
+    predictions = learner._non_taxonomic_re_classify(dataset)
+    assert calls == [2]
+    assert [(p["head"], p["tail"]) for p in predictions] == [("cat", "mouse")] * 2 + [("oak", "forest")] * 2
+    assert all(p["relation"] in ("eats", "part of", "chases") for p in predictions)
+
+    learner.relation_threshold = 1.0
+    assert learner._non_taxonomic_re_classify(dataset) == []
+    with pytest.raises(ValueError):
+        AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(), relation_scoring="joint")
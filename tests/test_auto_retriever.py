@@ -0,0 +1,290 @@
+import numpy as np
+import torch
+import pytest
+
+from ontolearner.base import AutoRetriever
+from ontolearner.learner import AutoRetrieverLearner
+from ontolearner.learner.retriever import LLMAugmentedRetriever, NgramRetriever
+from ontolearner.utils.disk_index import load_disk_index
+from ontolearner.utils.quantization import QuantizedEmbeddings, quantization_report, recall_at_k
+
+
+class CountingEncoder:
+    """Deterministic stand-in for a SentenceTransformer that records what it encodes."""
+
+    def __init__(self, dim: int = 8):
+        self.dim = dim
+        self.encoded = []
+
+    def encode(self, inputs, convert_to_tensor=True, **kwargs):
+        self.encoded.extend(inputs)
+        rows = []
+        for text in inputs:
+            rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+            rows.append(rng.standard_normal(self.dim))
+        return torch.tensor(np.array(rows), dtype=torch.float32).reshape(len(inputs), self.dim)
+
+
+@pytest.fixture
+def retriever():
+    r = AutoRetriever()
+    r.embedding_model = CountingEncoder()
+    return r
+
+
+def test_add_encodes_only_new_documents(retriever):
+    retriever.index(["cat", "dog"])
+    retriever.embedding_model.encoded.clear()
+
+    added = retriever.add(["dog", "bird", "bird"])
+    assert added == [AutoRetriever.doc_id("bird")]
+    assert retriever.embedding_model.encoded == ["bird"]
+    assert retriever.documents == ["cat", "dog", "bird"]
+    assert retriever.embeddings.shape[0] == 3
+    assert retriever.retrieve(["bird"], top_k=1) == [["bird"]]
+
+
+def test_incremental_updates_hash_only_their_inputs(retriever, monkeypatch):
+    retriever.index([f"doc {i}" for i in range(100)])
+    retriever.add(["warm up"])
+    hashed = []
+    doc_id = AutoRetriever.doc_id
+    monkeypatch.setattr(AutoRetriever, "doc_id", staticmethod(lambda doc: hashed.append(doc) or doc_id(doc)))
+
+    retriever.add(["new", "doc 3"])
+    retriever.upsert(["doc 5"])
+    retriever.remove([doc_id("doc 7")])
+    assert hashed == ["new", "doc 3", "doc 5", "doc 5"]
+    assert retriever.documents[-2:] == ["warm up", "new"] and "doc 7" not in retriever.documents
+    assert retriever.add(["doc 8", "doc 7"]) == [doc_id("doc 7")]
+    assert retriever.retrieve(["doc 7"], top_k=1) == [["doc 7"]]
+
+
+def test_remove_keeps_remaining_vectors(retriever):
+    retriever.index(["cat", "dog", "bird"])
+    before = retriever.embeddings.clone()
+    retriever.embedding_model.encoded.clear()
+
+    retriever.remove([AutoRetriever.doc_id("dog")])
+    assert retriever.documents == ["cat", "bird"]
+    assert torch.equal(retriever.embeddings, before[[0, 2]])
+    assert retriever.embedding_model.encoded == []
+
+
+def test_upsert_reencodes_existing_and_adds_missing(retriever):
+    retriever.index(["cat", "dog"])
+    retriever.embedding_model.encoded.clear()
+
+    retriever.upsert(["dog", "fish"])
+    assert retriever.embedding_model.encoded == ["dog", "fish"]
+    assert retriever.documents == ["cat", "dog", "fish"]
+
+
+def test_update_index_skips_unchanged_inputs(retriever):
+    retriever.update_index(["cat", "dog"])
+    retriever.embedding_model.encoded.clear()
+
+    retriever.update_index(["dog", "cat"])
+    assert retriever.embedding_model.encoded == []
+
+    retriever.update_index(["dog", "cow"])
+    assert retriever.embedding_model.encoded == ["cow"]
+    assert sorted(retriever.documents) == ["cow", "dog"]
+
+
+def test_learner_reuses_type_and_relation_indexes(retriever):
+    learner = AutoRetrieverLearner(base_retriever=retriever, top_k=1)
+    data = {"types": ["cat", "dog", "animal"], "relations": ["eats", "chases"]}
+
+    first = learner._non_taxonomic_re(data, test=True)
+    encoded = len(retriever.embedding_model.encoded)
+    second = learner._non_taxonomic_re(data, test=True)
+
+    assert first == second
+    # only the pair queries are encoded again, the type and relation indexes are reused
+    assert all(text.startswith("Head:") or text in data["types"]
+               for text in retriever.embedding_model.encoded[encoded:])
+
+
+def test_ngram_index_states_do_not_share_vectorizer():
+    r = NgramRetriever()
+    r.load("tfidf")
+    r.index(["red apple", "green pear"])
+    state = r.get_index_state()
+
+    r.reset_index()
+    r.index(["blue sky"])
+    r.set_index_state(state)
+    assert r.retrieve(["apple"], top_k=1) == [["red apple"]]
+
+
+@pytest.mark.parametrize("composition", ["mean", "difference", "concat-projection"])
+def test_pair_composition_skips_pair_text_encoding(retriever, composition):
+    projection = torch.randn(16, 8) if composition == "concat-projection" else None
+    learner = AutoRetrieverLearner(base_retriever=retriever, top_k=1, pair_composition=composition,
+                                   pair_projection=projection)
+    data = {"types": ["cat", "dog", "animal"], "relations": ["eats", "chases"]}
+
+    predictions = learner._non_taxonomic_re(data, test=True)
+
+    assert predictions and all(p["relation"] in data["relations"] for p in predictions)
+    assert not any(text.startswith("Head:") for text in retriever.embedding_model.encoded)
+
+
+def test_invalid_pair_composition(retriever):
+    with pytest.raises(ValueError):
+        AutoRetrieverLearner(base_retriever=AutoRetriever(), pair_composition="sum")
+    with pytest.raises(ValueError, match="pair_projection"):
+        AutoRetrieverLearner(base_retriever=AutoRetriever(), pair_composition="concat-projection")
+
+    learner = AutoRetrieverLearner(base_retriever=retriever, pair_composition="mean")
+    learner._retriever_fit(["cat", "dog"])
+    with pytest.raises(ValueError, match="'bird'"):
+        learner._compose_pair_embeddings([("cat", "bird")])
+    ngram = NgramRetriever()
+    ngram.load("tfidf")
+    learner = AutoRetrieverLearner(base_retriever=ngram, pair_composition="mean")
+    learner._retriever_fit(["cat", "dog"])
+    with pytest.raises(ValueError, match="sparse"):
+        learner._compose_pair_embeddings([("cat", "dog")])
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_quantized_index_matches_float32(precision):
+    docs = [f"doc {i}" for i in range(200)]
+    queries = [f"doc {i}" for i in range(0, 200, 7)]
+
+    baseline = AutoRetriever()
+    baseline.embedding_model = CountingEncoder(dim=32)
+    baseline.index(docs)
+
+    quantized = AutoRetriever(precision=precision)
+    quantized.embedding_model = CountingEncoder(dim=32)
+    quantized.index(docs)
+
+    assert isinstance(quantized.embeddings, QuantizedEmbeddings)
+    assert quantized.embeddings.nbytes < baseline.embeddings.numel() * 4
+    expected = baseline.retrieve(queries, top_k=5)
+    assert recall_at_k(expected, quantized.retrieve(queries, top_k=5), k=5) >= 0.95
+    assert [row[0] for row in quantized.retrieve(queries, top_k=1, batch_size=4)] == queries
+
+
+def test_quantized_index_supports_incremental_updates():
+    r = AutoRetriever(precision="int8")
+    r.embedding_model = CountingEncoder()
+    r.index(["cat", "dog"])
+    r.add(["bird"])
+    r.remove([AutoRetriever.doc_id("cat")])
+    r.upsert(["dog"])
+    assert r.documents == ["dog", "bird"]
+    assert len(r.embeddings) == 2
+    assert r.retrieve(["bird"], top_k=1) == [["bird"]]
+
+
+@pytest.mark.parametrize("precision", ["float32", "int8"])
+def test_chunked_topk_matches_full_scores(precision):
+    generator = torch.Generator().manual_seed(0)
+    embeddings = QuantizedEmbeddings.quantize(torch.randn(103, 16, generator=generator), precision)
+    queries = torch.randn(5, 16, generator=generator)
+    expected_scores, expected_indices = torch.topk(embeddings.scores(queries), k=7, dim=1)
+    scores, indices = embeddings.topk(queries, k=7, chunk_size=10)
+    assert torch.equal(indices, expected_indices)
+    assert torch.allclose(scores, expected_scores)
+    assert embeddings.topk(queries, k=500, chunk_size=10)[1].shape == (5, 103)
+
+
+def test_quantization_report():
+    rng = np.random.default_rng(0)
+    report = quantization_report(rng.standard_normal((500, 64)), rng.standard_normal((20, 64)), ks=(1, 10))
+    assert set(report) == {"float32", "float16", "int8"}
+    assert report["int8"]["index_mb"] < report["float16"]["index_mb"] < report["float32"]["index_mb"]
+    assert report["int8"]["recall@10"] >= report["int8"]["recall@10_no_rescore"] - 1e-9
+    assert report["float16"]["recall@1"] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("precision", ["float32", "int8"])
+def test_index_stream_matches_in_memory_index(tmp_path, precision):
+    docs = [f"doc {i} é" for i in range(50)]
+    queries = docs[::9]
+
+    in_memory = AutoRetriever(precision=precision)
+    in_memory.embedding_model = CountingEncoder()
+    in_memory.index(docs)
+
+    streamed = AutoRetriever(precision=precision)
+    streamed.embedding_model = CountingEncoder()
+    streamed.index_stream((doc for doc in docs), path=tmp_path / "index", chunk_size=7)
+
+    assert len(streamed.documents) == 50
+    assert list(streamed.documents) == docs
+    assert streamed.embeddings.precision == precision
+    assert streamed.retrieve(queries, top_k=3) == in_memory.retrieve(queries, top_k=3)
+
+    reopened = AutoRetriever(precision=precision)
+    reopened.embedding_model = CountingEncoder()
+    reopened.load_index(tmp_path / "index")
+    assert reopened.retrieve(queries, top_k=3, batch_size=2) == in_memory.retrieve(queries, top_k=3)
+    reopened.add(["extra"])
+    assert reopened.retrieve(["extra"], top_k=1) == [["extra"]]
+
+
+def test_index_stream_failure_leaves_no_loadable_index(tmp_path):
+    def documents():
+        yield from (f"doc {i}" for i in range(10))
+        raise OSError("source went away")
+
+    r = AutoRetriever()
+    r.embedding_model = CountingEncoder()
+    with pytest.raises(OSError):
+        r.index_stream(documents(), path=tmp_path / "index", chunk_size=4)
+    with pytest.raises(FileNotFoundError):
+        load_disk_index(tmp_path / "index")
+
+
+def test_index_stream_requires_incremental_retriever(tmp_path):
+    with pytest.raises(NotImplementedError):
+        NgramRetriever().index_stream(["a b"], path=tmp_path)
+
+
+def test_retrieve_deduplicates_and_caches_queries(retriever):
+    retriever.index(["cat", "dog", "bird"])
+    retriever.embedding_model.encoded.clear()
+
+    first = retriever.retrieve(["cat", "dog", "cat"], top_k=2)
+    assert retriever.embedding_model.encoded == ["cat", "dog"]
+    assert first[0] == first[2]
+
+    assert retriever.retrieve(["dog", "cat"], top_k=2) == [first[1], first[0]]
+    assert retriever.embedding_model.encoded == ["cat", "dog"]
+    info = retriever.query_cache_info()
+    assert (info["hits"], info["duplicates"], info["misses"]) == (2, 1, 2)
+    assert info["hit_rate"] == pytest.approx(0.6)
+
+    retriever.retrieve(["cat"], top_k=1)
+    assert retriever.embedding_model.encoded == ["cat", "dog", "cat"]
+    retriever.add(["fish"])
+    retriever.embedding_model.encoded.clear()
+    assert retriever.retrieve(["fish"], top_k=1) == [["fish"]]
+    assert retriever.embedding_model.encoded == ["fish"]
+
+
+def test_query_cache_is_bounded(retriever):
+    retriever.query_cache_size = 2
+    retriever.index(["cat", "dog", "bird"])
+    retriever.retrieve(["cat", "dog", "bird"], top_k=1)
+    assert retriever.query_cache_info()["size"] == 2
+    retriever.clear_query_cache()
+    assert retriever.query_cache_info()["size"] == 0
+
+
+def test_augmented_retrieve_encodes_shared_variants_once():
+    r = LLMAugmentedRetriever()
+    r.embedding_model = CountingEncoder()
+    r.set_augmenter({"taxonomy-discovery": {"oak": ["tree", "plant"], "pine": ["tree", "conifer"]}})
+    r.index(["tree", "plant", "conifer"])
+    r.embedding_model.encoded.clear()
+
+    results = r.retrieve(["oak", "pine", "oak"], top_k=1, task="taxonomy-discovery")
+    assert sorted(r.embedding_model.encoded) == ["conifer", "plant", "tree"]
+    assert results[0] == results[2]
+    assert set(results[0]) == {"tree", "plant"}
@@ -0,0 +1,86 @@
+import pytest
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from ontolearner.base import AutoLLM
+from ontolearner.learner import LabelMapper
+from ontolearner.utils import completion_cache
+from ontolearner.utils.completion_cache import CompletionCache, disable_completion_cache, enable_completion_cache
+
+from test_auto_llm import WordTokenizer
+
+
+class CountingGenerator:
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, prompts):
+        self.prompts += prompts
+        return [prompt.upper() for prompt in prompts]
+
+
+def test_cache_hits_misses_and_persists(tmp_path):
+    path = tmp_path / "completions.sqlite"
+    generator = CountingGenerator()
+    cache = CompletionCache(path)
+    kwargs = {"max_new_tokens": 8}
+    assert cache.generate(["a", "b", "a"], generator, model_id="m", generation_kwargs=kwargs) == ["A", "B", "A"]
+    assert generator.prompts == ["a", "b"]
+    assert cache.generate(["b", "c"], generator, model_id="m", generation_kwargs=kwargs) == ["B", "C"]
+    assert generator.prompts == ["a", "b", "c"]
+    assert cache.info() == {"entries": 3, "hits": 1, "misses": 4, "bypassed": 0, "hit_rate": pytest.approx(1 / 5)}
+    cache.close()
+
+    reopened = CompletionCache(path)
+    reopened.generate(["a", "b", "c"], generator, model_id="m", generation_kwargs=kwargs)
+    assert generator.prompts == ["a", "b", "c"]
+    # a different model, revision or generation config is a different request
+    reopened.generate(["a"], generator, model_id="m", revision="v2", generation_kwargs=kwargs)
+    reopened.generate(["a"], generator, model_id="m", generation_kwargs={"max_new_tokens": 16})
+    assert generator.prompts == ["a", "b", "c", "a", "a"]
+
+
+def test_sampling_bypasses_cache(tmp_path):
+    generator = CountingGenerator()
+    cache = CompletionCache(tmp_path / "completions.sqlite")
+    for _ in range(2):
+        cache.generate(["a"], generator, model_id="m", sampling=True)
+    assert generator.prompts == ["a", "a"]
+    assert cache.info()["bypassed"] == 2 and cache.info()["entries"] == 0
+
+
+@pytest.fixture
+def active_cache(tmp_path):
+    yield enable_completion_cache(tmp_path / "completions.sqlite")
+    disable_completion_cache()
+
+
+def test_auto_llm_generate_uses_active_cache(active_cache):
+    torch.manual_seed(0)
+    config = LlamaConfig(vocab_size=64, hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+                         num_key_value_heads=2, intermediate_size=32, pad_token_id=0, bos_token_id=1, eos_token_id=2)
+    llm = AutoLLM(label_mapper=LabelMapper())
+    llm.tokenizer = WordTokenizer()
+    llm.model = LlamaForCausalLM(config).eval()
+    llm.label_mapper.predict = lambda outputs: outputs
+    calls = []
+    generate = llm.model.generate
+    llm.model.generate = lambda **kwargs: calls.append(1) or generate(**kwargs)
+
+    prompts = ["is a cat an animal ?", "is a car an animal ?"]
+    first = llm.generate(prompts, max_new_tokens=3)
+    assert llm.generate(prompts, max_new_tokens=3) == first
+    assert len(calls) == 1
+    assert active_cache.info()["hits"] == 2
+
+    llm.model.generation_config.do_sample = True
+    llm.generate(prompts, max_new_tokens=3)
+    assert len(calls) == 2 and active_cache.info()["bypassed"] == 2
+
+
+def test_cache_is_opened_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv(completion_cache.CACHE_ENV_VAR, str(tmp_path / "env.sqlite"))
+    try:
+        assert completion_cache.get_completion_cache().path == tmp_path / "env.sqlite"
+    finally:
+        disable_completion_cache()
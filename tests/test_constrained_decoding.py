@@ -0,0 +1,54 @@
+import pytest
+import torch
+from tokenizers import pre_tokenizers
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from ontolearner.utils.constrained_decoding import LabelTrie
+
+from test_auto_llm import WordTokenizer
+from test_prompt_compiler import bpe_tokenizer
+
+TYPES = ["animal", "wild animal", "plant", "city, village"]
+
+
+def test_trie_allows_only_label_continuations():
+    tokenizer = WordTokenizer()
+    trie = LabelTrie(tokenizer, TYPES, context="Types:", answer_format=" {label}", separator=";", max_labels=2)
+    vocab = tokenizer.vocab
+    assert set(trie.allowed_tokens([])) == {vocab["animal"], vocab["wild"], vocab["plant"], vocab["city,"]}
+    assert trie.allowed_tokens([vocab["wild"]]) == [vocab["animal"]]
+    # a complete label may end the answer or be followed by a second label
+    assert set(trie.allowed_tokens([vocab["plant"]])) == {tokenizer.eos_token_id, vocab[";"]}
+    # ... but not by a third one
+    assert trie.allowed_tokens([vocab["plant"], vocab[";"], vocab["animal"]]) == [tokenizer.eos_token_id]
+    assert trie.parse([vocab["plant"], vocab[";"], vocab["wild"], vocab["animal"], tokenizer.eos_token_id]) == \
+        ["plant", "wild animal"]
+    assert trie.parse([vocab["city,"]]) == []  # cut off inside a label
+    assert trie.max_new_tokens == 2 * 2 + 1 + 1
+    with pytest.raises(ValueError):
+        LabelTrie(tokenizer, TYPES, max_labels=2)
+
+
+@pytest.mark.parametrize("pre_tokenizer", [pre_tokenizers.ByteLevel(add_prefix_space=False), pre_tokenizers.Metaspace()])
+def test_constrained_generation_returns_valid_labels(pre_tokenizer):
+    tokenizer = bpe_tokenizer(pre_tokenizer)
+    torch.manual_seed(0)
+    config = LlamaConfig(vocab_size=len(tokenizer), hidden_size=32, num_hidden_layers=2, num_attention_heads=4,
+                         num_key_value_heads=4, intermediate_size=64, pad_token_id=tokenizer.pad_token_id,
+                         bos_token_id=tokenizer.bos_token_id, eos_token_id=tokenizer.eos_token_id)
+    model = LlamaForCausalLM(config).eval()
+    trie = LabelTrie(tokenizer, TYPES, context="Types:", answer_format=" {label}", separator=",", max_labels=2)
+    prompts = [f"Term: {term}\nTypes:" for term in ("cat", "oak tree", "Paris")]
+    encoded = tokenizer(prompts, return_tensors="pt", padding=True)
+    predictions = trie.generate(model, encoded)
+    assert len(predictions) == len(prompts)
+    assert all(1 <= len(labels) <= 2 and set(labels) <= set(TYPES) for labels in predictions)
+
+    single = LabelTrie(tokenizer, TYPES, answer_format="#[{label}]#")
+    outputs = model.generate(**encoded, max_new_tokens=single.max_new_tokens, do_sample=False,
+                             prefix_allowed_tokens_fn=single.prefix_allowed_tokens_fn(encoded["input_ids"].shape[1]),
+                             eos_token_id=single.eos_token_id, pad_token_id=tokenizer.pad_token_id)
+    generated = outputs[:, encoded["input_ids"].shape[1]:].tolist()
+    assert all(len(single.parse(ids)) == 1 for ids in generated)
+    # every answer ends with EOS right after its label
+    assert all(tokenizer.eos_token_id in ids for ids in generated)
@@ -0,0 +1,77 @@
+import copy
+
+import pytest
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from ontolearner.base import AutoLLM
+from ontolearner.learner import LabelMapper
+from ontolearner.utils.benchmark import benchmark_cpu_profiles
+from ontolearner.utils.completion_cache import model_fingerprint
+from ontolearner.utils.cpu_inference import CPUInferenceProfile
+
+from test_auto_llm import WordTokenizer, term_typing_prompts
+
+
+def tiny_model():
+    torch.manual_seed(0)
+    config = LlamaConfig(vocab_size=256, hidden_size=32, num_hidden_layers=2, num_attention_heads=4,
+                         num_key_value_heads=4, intermediate_size=64, pad_token_id=0, bos_token_id=1, eos_token_id=2)
+    return LlamaForCausalLM(config).eval()
+
+
+def tiny_llm(model, profile=None, tokenizer=None):
+    llm = AutoLLM(label_mapper=LabelMapper(), cpu_profile=profile)
+    # the vocabulary grows with every new word, so compared models share their tokenizer
+    llm.tokenizer = tokenizer or WordTokenizer()
+    llm.model = model if profile is None else profile.apply(model, llm.tokenizer)
+    llm.label_mapper.predict = lambda outputs: outputs
+    return llm
+
+
+def test_int8_profile_quantizes_linear_layers_and_keeps_scores():
+    prompts = term_typing_prompts(["cat", "oak tree"])
+    threads = torch.get_num_threads()
+    try:
+        quantized = tiny_llm(tiny_model(), CPUInferenceProfile(quantize=True, num_threads=1))
+        assert torch.get_num_threads() == 1
+    finally:
+        torch.set_num_threads(threads)
+    _, expected = tiny_llm(tiny_model(), tokenizer=quantized.tokenizer).label_probabilities(prompts)
+    assert not any(isinstance(module, torch.nn.Linear) for module in quantized.model.modules())
+    _, scores = quantized.label_probabilities(prompts)
+    assert torch.allclose(scores, expected, atol=0.05)
+    assert len(quantized.generate(prompts, max_new_tokens=2)) == len(prompts)
+
+
+def test_compiled_profile_matches_eager_generation():
+    prompts = term_typing_prompts(["cat", "a big red car"])
+    compiled = tiny_llm(tiny_model(), CPUInferenceProfile(backend="compile", compile_backend="eager"))
+    expected = tiny_llm(tiny_model(), tokenizer=compiled.tokenizer).generate(prompts, max_new_tokens=3)
+    assert compiled.model.dtype == torch.float32
+    assert compiled.generate(prompts, max_new_tokens=3) == expected
+
+
+def test_profiled_models_have_their_own_completion_cache_revision():
+    plain = model_fingerprint(tiny_model())
+    int8 = model_fingerprint(CPUInferenceProfile(quantize=True, warmup=False).apply(tiny_model()))
+    compiled = model_fingerprint(CPUInferenceProfile(backend="compile", warmup=False).apply(tiny_model()))
+    assert plain[0] == int8[0] == compiled[0]
+    assert len({plain[1], int8[1], compiled[1]}) == 3
+
+
+def test_profile_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        CPUInferenceProfile(backend="tensorrt")
+    with pytest.raises(ValueError):
+        CPUInferenceProfile(dtype="bfloat16", quantize=True)
+
+
+def test_benchmark_cpu_profiles():
+    model = tiny_model()
+    profiles = {"fp32": CPUInferenceProfile(), "int8": CPUInferenceProfile(quantize=True)}
+    report = benchmark_cpu_profiles(lambda profile: tiny_llm(copy.deepcopy(model), profile),
+                                    term_typing_prompts(["cat", "dog", "oak"]), profiles, batch_size=2)
+    assert list(report) == ["fp32", "int8"]
+    assert report["fp32"]["speedup"] == 1.0
+    assert report["int8"]["prompt_tokens"] == report["fp32"]["prompt_tokens"] > 0
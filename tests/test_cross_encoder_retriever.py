@@ -66,3 +66,66 @@ def test_retrieve(mock_models):
     # Should return top 1 reranked doc → "doc1"
     assert len(result) == 1
     assert result[0] == ["doc1"]
+
+
+def test_retrieve_batches_pairs_across_queries_and_caches(mock_models):
+    _, MockCE, mock_search = mock_models
+    mock_search.return_value = [
+        [{"corpus_id": 0}, {"corpus_id": 1}],
+        [{"corpus_id": 1}, {"corpus_id": 0}],
+    ]
+    mock_cross = MockCE.return_value
+    # score = 1.0 when the query names the document, else 0.0
+    mock_cross.predict.side_effect = lambda pairs, **kwargs: np.array(
+        [1.0 if q.endswith(d[-1]) else 0.0 for q, d in pairs]
+    )
+
+    retriever = CrossEncoderRetriever()
+    retriever.load("test-model")
+    retriever.index(["doc1", "doc2"])
+
+    result = retriever.retrieve(["q1", "q2"], top_k=1)
+    assert result == [["doc1"], ["doc2"]]
+    # all four pairs go through a single CrossEncoder call
+    assert mock_cross.predict.call_count == 1
+    assert len(mock_cross.predict.call_args[0][0]) == 4
+
+    # the same queries are answered from the score cache
+    assert retriever.retrieve(["q1", "q2"], top_k=1) == [["doc1"], ["doc2"]]
+    assert mock_cross.predict.call_count == 1
+
+
+def test_retrieve_early_termination(mock_models):
+    _, MockCE, mock_search = mock_models
+    mock_search.return_value = [[{"corpus_id": i} for i in range(4)]]
+    mock_cross = MockCE.return_value
+    doc_scores = {"doc0": 5.0, "doc1": 4.0, "doc2": 0.0, "doc3": 3.0}
+    mock_cross.predict.side_effect = lambda pairs, **kwargs: np.array([doc_scores[d] for _, d in pairs])
+
+    retriever = CrossEncoderRetriever(cache_size=0)
+    retriever.load("test-model")
+    retriever.index(["doc0", "doc1", "doc2", "doc3"])
+
+    result = retriever.retrieve(["q"], top_k=1, rerank_step=1, score_margin=2.0)
+    # doc0 scored, then doc1 (margin 1.0 < 2.0), then doc2 (margin 5.0) -> stop before doc3
+    assert result == [["doc0"]]
+    assert mock_cross.predict.call_count == 3
+
+
+def test_loading_another_cross_encoder_drops_cached_scores(mock_models):
+    _, MockCE, _ = mock_models
+    rankers = {"prefers-doc1": np.array([0.9, 0.1]), "prefers-doc2": np.array([0.1, 0.9])}
+
+    def cross_encoder(model_id):
+        model = MagicMock()
+        model.predict.side_effect = lambda pairs, **kwargs: rankers[model_id][[int(d[-1]) - 1 for _, d in pairs]]
+        return model
+
+    MockCE.side_effect = cross_encoder
+    retriever = CrossEncoderRetriever(bi_encoder_model_id="bi-encoder")
+    retriever.load("prefers-doc1")
+    retriever.index(["doc1", "doc2"])
+    assert retriever.retrieve(["query"], top_k=1) == [["doc1"]]
+
+    retriever.load("prefers-doc2")
+    assert retriever.retrieve(["query"], top_k=1) == [["doc2"]]
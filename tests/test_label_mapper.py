@@ -0,0 +1,51 @@
+import pytest
+
+from ontolearner.learner import LabelMapper
+
+
+@pytest.fixture
+def mapper():
+    mapper = LabelMapper()
+    mapper.fit()
+    return mapper
+
+
+def test_lookup_maps_surface_forms_without_classifier(mapper):
+    calls = []
+    predict = mapper.model.predict
+    mapper.model.predict = lambda texts: calls.append(list(texts)) or predict(texts)
+    outputs = ["Yes.", " TRUE", "no, it is not", "'false'", "Answer: yes", "nothing"]
+    assert mapper.predict(outputs) == ["yes", "yes", "no", "no", "yes", mapper.predict(["nothing"])[0]]
+    assert calls == [["Answer: yes", "nothing"]]
+    # repeated outputs are memoized
+    mapper.predict(["Answer: yes", "nothing", "nothing"])
+    assert len(calls) == 1
+
+
+def test_lookup_respects_word_boundaries(mapper):
+    assert mapper.lookup("not sure") is None
+    assert mapper.lookup("yes, but") == "yes"
+
+
+def test_weighted_training_matches_replication():
+    weighted, replicated = LabelMapper(iterator_no=50), LabelMapper(iterator_no=50)
+    weighted.fit()
+    replicated.model.fit(50 * replicated.x_train, 50 * replicated.y_train)
+    texts = ["it is true", "definitely false", "yes it is", "no way"]
+    assert weighted.model.predict(texts).tolist() == replicated.model.predict(texts).tolist()
+    assert weighted.model.predict_proba(texts) == pytest.approx(replicated.model.predict_proba(texts), abs=0.05)
+
+
+def test_fit_is_idempotent_and_mappers_do_not_share_classifiers(mapper):
+    classifier = mapper.model.named_steps["classifier"]
+    mapper.fit()
+    assert mapper.model.named_steps["classifier"] is classifier
+    assert LabelMapper().model.named_steps["classifier"] is not classifier
+
+
+def test_save_and_load(mapper, tmp_path):
+    path = tmp_path / "mapper.joblib"
+    mapper.save(path)
+    loaded = LabelMapper.load(path)
+    texts = ["maybe", "yes", "unclear"]
+    assert loaded.predict(texts) == mapper.predict(texts)
@@ -1,4 +1,10 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
+import torch
 from unittest.mock import MagicMock, patch
 from ontolearner.learner.retriever.augmented_retriever import (
     LLMAugmenterGenerator,
@@ -6,6 +12,7 @@ from ontolearner.learner.retriever.augmented_retriever import (
     LLMAugmentedRetriever,
 )
 from ontolearner.base import AutoRetriever
+from ontolearner.utils.concurrency import TokenBucket
 
 
 class DummyData:
@@ -123,6 +130,27 @@ def test_llm_augmented_retriever_taxonomy(monkeypatch):
 
 
 
+def test_set_augmenter_drops_cached_results():
+    class OneHotEncoder:
+        def encode(self, inputs, convert_to_tensor=True, **kwargs):
+            return torch.tensor([[1.0, 0.0] if text == "a" else [0.0, 1.0] for text in inputs])
+
+    class FixedAug:
+        def __init__(self, variant):
+            self.variant = variant
+
+        def transform(self, q, task):
+            return [self.variant]
+
+    retriever = LLMAugmentedRetriever()
+    retriever.embedding_model = OneHotEncoder()
+    retriever.index(["a", "b"])
+    retriever.set_augmenter(FixedAug("a"))
+    assert retriever.augmented_retrieve(["Dog"], top_k=1, task="taxonomy-discovery") == [["a"]]
+    retriever.set_augmenter(FixedAug("b"))
+    assert retriever.augmented_retrieve(["Dog"], top_k=1, task="taxonomy-discovery") == [["b"]]
+
+
 def test_llm_augmented_retriever_normal(monkeypatch):
     """Test normal retrieval path (no taxonomy discovery)."""
     retriever = LLMAugmentedRetriever()
@@ -134,3 +162,95 @@ def test_llm_augmented_retriever_normal(monkeypatch):
 
     results = retriever.retrieve(["Cat"], top_k=3)
     assert results == [["doc_Cat_0", "doc_Cat_1", "doc_Cat_2"]]
+
+
+class StubCompletionServer:
+    """Local OpenAI-compatible chat-completions server returning function calls."""
+
+    def __init__(self, fail_first=(), malformed=()):
+        self.requests = []
+        self.fail_first = set(fail_first)
+        self.malformed = set(malformed)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                query = body["messages"][-1]["content"].split("(or class) ")[1].split(",")[0]
+                stub.requests.append(query)
+                if query in stub.fail_first:
+                    stub.fail_first.discard(query)
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                arguments = "not json" if query in stub.malformed else \
+                    json.dumps({"candidate_parents": [f"{query}_parent_{i}" for i in range(3)]})
+                payload = json.dumps({
+                    "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                    "choices": [{"index": 0, "finish_reason": "function_call",
+                                 "message": {"role": "assistant", "content": None,
+                                             "function_call": {"name": "discover_taxonomy_parents",
+                                                               "arguments": arguments}}}],
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubCompletionServer(fail_first={"Dog"}, malformed={"Broken"})
+    yield server
+    server.close()
+
+
+def test_generator_against_stub_server_retries_and_caches(stub_server, tmp_path):
+    kwargs = dict(token="fake", top_n_candidate=2, base_url=stub_server.base_url, max_concurrency=4,
+                  max_retries=2, backoff_base=0.01, cache_path=str(tmp_path / "augment.jsonl"))
+    queries = ["Dog", "Broken"] + [f"Type{i}" for i in range(10)]
+    generator = LLMAugmenterGenerator(**kwargs)
+
+    output = generator.augment_taxonomy_discovery(queries)
+    assert output["Dog"] == ["Dog_parent_0", "Dog_parent_1"]
+    assert "Broken" not in output
+    assert list(output) == [q for q in queries if q != "Broken"]
+    assert stub_server.requests.count("Dog") == 2
+    assert stub_server.requests.count("Broken") == 3
+
+    # a new run resumes from the on-disk cache and only retries the failed query
+    stub_server.requests.clear()
+    resumed = LLMAugmenterGenerator(**kwargs).augment_taxonomy_discovery(queries)
+    assert resumed == output
+    assert stub_server.requests == ["Broken"] * 3
+
+    # repeated queries are requested once
+    stub_server.requests.clear()
+    assert list(generator.augment_taxonomy_discovery(["New", "New", "Type1", "New"])) == ["New", "Type1"]
+    assert stub_server.requests == ["New"]
+    assert sum(1 for line in open(tmp_path / "augment.jsonl") if '"New"' in line) == 1
+
+    # asking for another number of candidates is a different request
+    stub_server.requests.clear()
+    more = LLMAugmenterGenerator(**{**kwargs, "top_n_candidate": 3}).augment_taxonomy_discovery(["Type0"])
+    assert more == {"Type0": ["Type0_parent_0", "Type0_parent_1", "Type0_parent_2"]}
+    assert stub_server.requests == ["Type0"]
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.04
@@ -0,0 +1,85 @@
+import gc
+
+import torch
+from tokenizers import pre_tokenizers
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from ontolearner.base import AutoLLM
+from ontolearner.learner import LabelMapper
+from ontolearner.utils.model_pool import ModelPool, get_model_pool, pool_key
+
+from test_prompt_compiler import bpe_tokenizer
+
+
+class Owner:
+    pass
+
+
+def linear_loader(calls, size=8):
+    def load():
+        calls.append(size)
+        return torch.nn.Linear(size, size, bias=False)
+    return load
+
+
+def test_pool_shares_models_and_counts_references():
+    pool, calls = ModelPool(max_memory=0), []
+    key = pool_key("Linear", "tiny", torch_dtype=torch.float32, token="secret")
+    assert key == pool_key("Linear", "tiny", torch_dtype=torch.float32)  # credentials are not part of the key
+    first, second = pool.acquire(key, linear_loader(calls)), pool.acquire(key, linear_loader(calls))
+    assert first is second and calls == [8]
+    assert pool.info() == {"models": 1, "in_use": 1, "memory": 8 * 8 * 4, "loads": 1, "hits": 1, "evictions": 0}
+    pool.release(first)
+    assert key in pool
+    pool.release(second)
+    assert key not in pool and pool.info()["evictions"] == 1
+    pool.release(first)  # no longer pooled: ignored
+
+    # references held by an owner are dropped when it is garbage-collected
+    owner = Owner()
+    model = pool.acquire(key, linear_loader(calls), owner=owner)
+    pool.acquire(key, linear_loader(calls), owner=owner)
+    pool.release(model, owner=owner)
+    assert pool.info()["in_use"] == 1
+    del owner
+    gc.collect()
+    assert key not in pool and calls == [8, 8]
+
+
+def test_idle_models_are_evicted_least_recently_used_first():
+    pool, calls = ModelPool(max_memory=2 * 16 * 16 * 4), []
+    owners = {size: Owner() for size in (16, 15, 14)}
+    for size, owner in owners.items():
+        pool.acquire(("Linear", size), linear_loader(calls, size), owner=owner)
+    pool.acquire(("Linear", 16), linear_loader(calls, 16))  # 16 is now the most recently used
+    del owners[16], owners[15]
+    gc.collect()
+    # 16 is still referenced; 15 is idle and evicted to fit the budget; 14 is in use
+    assert ("Linear", 15) not in pool and ("Linear", 16) in pool and ("Linear", 14) in pool
+    unlimited = ModelPool(max_memory=None)
+    unlimited.release(unlimited.acquire(("Linear", 8), linear_loader(calls)))
+    assert unlimited.info()["models"] == 1 and unlimited.info()["in_use"] == 0
+
+
+def test_llms_loading_the_same_model_share_it(tmp_path):
+    tokenizer = bpe_tokenizer(pre_tokenizers.ByteLevel(add_prefix_space=False))
+    config = LlamaConfig(vocab_size=len(tokenizer), hidden_size=32, num_hidden_layers=1, num_attention_heads=4,
+                         num_key_value_heads=4, intermediate_size=64, pad_token_id=tokenizer.pad_token_id,
+                         eos_token_id=tokenizer.eos_token_id)
+    LlamaForCausalLM(config).save_pretrained(tmp_path)
+    tokenizer.save_pretrained(tmp_path)
+    pool = get_model_pool()
+    loads = pool.stats["loads"]
+    llms = [AutoLLM(label_mapper=LabelMapper(), device="cpu") for _ in range(3)]
+    for llm in llms:
+        llm.load(str(tmp_path))
+    assert llms[0].model is llms[1].model is llms[2].model
+    assert pool.stats["loads"] == loads + 1
+    llms[0].load(str(tmp_path))  # reloading keeps the shared instance
+    llms[0].unload()
+    assert llms[0].model is None and llms[1].model is llms[2].model
+    key = pool_key("AutoModelForCausalLM", str(tmp_path), torch_dtype=torch.bfloat16)
+    assert key in pool
+    del llms, llm
+    gc.collect()
+    assert key not in pool and pool.stats["loads"] == loads + 1
@@ -0,0 +1,37 @@
+from ontolearner.base import AutoLLM
+from ontolearner.learner import AutoLLMLearner, LabelMapper
+from ontolearner.learner.prompt import StandardizedPrompting
+from ontolearner.utils.parallel import core_subsets
+
+from test_auto_llm import KeywordModel, WordTokenizer
+
+
+class KeywordLLM(AutoLLM):
+    """AutoLLM whose load() builds the keyword stand-in model, so that spawned workers can load it."""
+
+    def load(self, model_id: str) -> None:
+        self.tokenizer = WordTokenizer()
+        self.scoring_token_ids()
+        self.model = KeywordModel(self.tokenizer, positive=(model_id,))
+
+
+def test_core_subsets_split_available_cores():
+    subsets = core_subsets(num_workers=3, cores_per_worker=2)
+    assert len(subsets) == 3 and all(len(subset) == 2 for subset in subsets)
+
+
+def test_data_parallel_learner_matches_single_process():
+    types = ["cat", "dog", "oak", "cat food", "car", "catalog", "tree"]
+    predictions = {}
+    for num_workers in (1, 2):
+        learner = AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(), llm=KeywordLLM,
+                                 scoring="logits", batch_size=2, num_workers=num_workers, cores_per_worker=1)
+        learner.load(model_id="cat")
+        try:
+            predictions[num_workers] = learner._taxonomy_discovery(types, test=True)
+        finally:
+            learner.close()
+        assert (learner.llm.model is None) == (num_workers > 1)
+    assert predictions[2] == predictions[1]
+    assert {"parent": "cat", "child": "dog"} in predictions[1]
+    assert {"parent": "oak", "child": "car"} not in predictions[1]
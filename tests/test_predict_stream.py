@@ -0,0 +1,67 @@
+from ontolearner.base import AutoLLM
+from ontolearner.learner import AutoLLMLearner, LabelMapper
+from ontolearner.learner.prompt import StandardizedPrompting
+from ontolearner.utils.checkpoint import PredictionCheckpoint
+
+from test_auto_llm import KeywordModel, WordTokenizer
+
+
+def keyword_learner(**kwargs):
+    learner = AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(), scoring="logits",
+                             batch_size=2, **kwargs)
+    learner.llm = AutoLLM(label_mapper=LabelMapper())
+    learner.llm.tokenizer = WordTokenizer()
+    learner.llm.scoring_token_ids()
+    learner.llm.model = KeywordModel(learner.llm.tokenizer)
+    return learner
+
+
+def test_checkpoint_resumes_and_skips_partial_lines(tmp_path):
+    path = tmp_path / "run.ckpt.jsonl"
+    checkpoint = PredictionCheckpoint(path)
+    checkpoint.put_many({"a": True, "b": {"eats": 0.5}})
+    checkpoint.close()
+    with open(path, "a") as file:
+        file.write('{"key": "c", "val')  # crash while writing
+
+    resumed = PredictionCheckpoint(path)
+    assert len(resumed) == 2 and resumed.get("b") == {"eats": 0.5} and "c" not in resumed
+    resumed.put_many({"c": False})
+    resumed.close()
+    assert PredictionCheckpoint(path).get("c") is False
+
+
+def test_predict_stream_matches_predict_and_resumes(tmp_path):
+    types = ["cat", "dog", "oak", "cat food", "car", "tree"]
+    learner = keyword_learner()
+    expected = learner.predict(types, task="taxonomy-discovery", ontologizer=False)
+    assert expected and all("cat" in f"{record['parent']} {record['child']}".split() for record in expected)
+
+    path = tmp_path / "taxonomy.ckpt.jsonl"
+    stream = learner.predict_stream(types, task="taxonomy-discovery", ontologizer=False,
+                                    checkpoint_path=path, chunk_size=4)
+    first = next(stream)
+    stream.close()  # interrupted after the first chunk
+    assert first == expected[0]
+    assert len(PredictionCheckpoint(path)) == 4
+
+    calls = learner.llm.model.calls
+    resumed = list(learner.predict_stream(types, task="taxonomy-discovery", ontologizer=False,
+                                          checkpoint_path=path, chunk_size=4))
+    assert resumed == expected
+    assert len(PredictionCheckpoint(path)) == 15
+    # the first chunk came from the checkpoint, the remaining 11 pairs need 6 batches of 2
+    assert learner.llm.model.calls - calls == 6
+    assert list(learner.predict_stream(types, task="taxonomy-discovery", ontologizer=False,
+                                       checkpoint_path=path)) == expected
+    assert learner.llm.model.calls - calls == 6
+
+
+def test_term_typing_stream_yields_records_per_chunk():
+    learner = keyword_learner()
+    learner.fit(["animal", "plant"], task="term-typing", ontologizer=False)
+    terms = ["cat", "oak", "wild cat"]
+    records = list(learner.predict_stream(terms, task="term-typing", ontologizer=False, chunk_size=1))
+    assert records == learner.predict(terms, task="term-typing", ontologizer=False)
+    assert records[0] == {"term": "cat", "types": ["animal", "plant"]}
+    assert records[1] == {"term": "oak", "types": []}
@@ -0,0 +1,69 @@
+import pytest
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers
+from transformers import PreTrainedTokenizerFast
+
+from ontolearner.learner import AutoLLMLearner, LabelMapper
+from ontolearner.learner.prompt import StandardizedPrompting
+from ontolearner.utils.prompt_compiler import CompiledTemplate, PromptCompiler
+
+from test_predict_stream import keyword_learner
+
+TASKS = ("term-typing", "taxonomy-discovery", "non-taxonomic-re", "relation-classification")
+
+
+def bpe_tokenizer(pre_tokenizer):
+    """Small BPE tokenizer trained on the prompt templates, adding a BOS token and padding on the left."""
+    tokenizer = Tokenizer(models.BPE(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizer
+    alphabet = pre_tokenizers.ByteLevel.alphabet() if isinstance(pre_tokenizer, pre_tokenizers.ByteLevel) else []
+    trainer = trainers.BpeTrainer(vocab_size=400, special_tokens=["<pad>", "<s>", "</s>", "<unk>"],
+                                  initial_alphabet=alphabet)
+    corpus = [StandardizedPrompting(task=task).prompt_template for task in TASKS] + ["cat dog oak tree animal plant"]
+    tokenizer.train_from_iterator(corpus * 5, trainer)
+    tokenizer.post_processor = processors.TemplateProcessing(single="<s> $A", special_tokens=[("<s>", 1)])
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, bos_token="<s>", eos_token="</s>", pad_token="<pad>",
+                                   unk_token="<unk>", padding_side="left")
+
+
+@pytest.mark.parametrize("pre_tokenizer", [pre_tokenizers.ByteLevel(add_prefix_space=False), pre_tokenizers.Metaspace()])
+def test_compiled_prompts_match_the_tokenizer(pre_tokenizer):
+    tokenizer = bpe_tokenizer(pre_tokenizer)
+    term_typing, taxonomy = StandardizedPrompting(task="term-typing"), StandardizedPrompting(task="taxonomy-discovery")
+    compiler = PromptCompiler(tokenizer, [term_typing.prompt_template, taxonomy.prompt_template])
+    terms = ["cat", "wild cat", "Café au lait", "x-ray", "oak tree.", '"quoted"', "two\nlines", "cat"]
+    prompts = [term_typing.format(term=term, type=type) for term in terms for type in ("animal", "food item")]
+    prompts += [taxonomy.format(parent=parent, child=child) for parent in terms for child in terms[:3]]
+    prompts.append("Not formatted from a template.")
+    for _ in range(2):  # the second round reuses the memoized slot values
+        expected = tokenizer(prompts, return_tensors="pt", max_length=48, truncation=True, padding=True)
+        encoded = compiler(prompts, return_tensors="pt", max_length=48, truncation=True, padding=True)
+        assert torch.equal(encoded["input_ids"], expected["input_ids"])
+        assert torch.equal(encoded["attention_mask"], expected["attention_mask"])
+    assert compiler(prompts[:3])["input_ids"] == tokenizer(prompts[:3])["input_ids"]
+    assert compiler.stats["compiled"] > compiler.stats["tokenized"]
+
+
+def test_templates_that_cannot_be_compiled():
+    tokenizer = bpe_tokenizer(pre_tokenizers.ByteLevel(add_prefix_space=False))
+    for template in ("{0} is a {type}", "{term:>10}", "{term}{type}"):
+        with pytest.raises(ValueError):
+            CompiledTemplate(template, tokenizer)
+    compiler = PromptCompiler(tokenizer, ["{term}{type}"])
+    assert compiler.encode("cat animal") == tokenizer.encode("cat animal")
+    assert compiler.stats == {"compiled": 0, "tokenized": 1}
+
+
+def test_learner_compiles_prompts_of_all_tasks():
+    terms = ["cat", "oak", "wild cat"]
+    templates = AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(),
+                               compile_prompts=True).llm.prompt_templates
+    assert len(templates) == len(TASKS)
+    predictions = []
+    for prompt_templates in ([], templates):
+        learner = keyword_learner()
+        learner.llm.prompt_templates = prompt_templates
+        learner.fit(["animal", "plant"], task="term-typing", ontologizer=False)
+        predictions.append(learner.predict(terms, task="term-typing", ontologizer=False))
+    assert predictions[1] == predictions[0]
+    assert learner.llm._prompt_compiler.stats["compiled"] > 0
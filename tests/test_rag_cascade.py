@@ -0,0 +1,65 @@
+import pytest
+
+from ontolearner.base import AutoRetriever
+from ontolearner.learner import AutoRAGLearner, AutoRetrieverLearner
+
+from test_auto_retriever import CountingEncoder
+from test_predict_stream import keyword_learner
+
+
+def retriever_learner(top_k=3):
+    retriever = AutoRetriever()
+    retriever.embedding_model = CountingEncoder()
+    return AutoRetrieverLearner(base_retriever=retriever, top_k=top_k)
+
+
+def test_retrieve_with_scores_matches_retrieve():
+    retriever = AutoRetriever()
+    retriever.embedding_model = CountingEncoder()
+    retriever.index(["animal", "plant", "vehicle", "food"])
+    scored = retriever.retrieve_with_scores(["cat", "oak"], top_k=3)
+    assert [[doc for doc, _ in results] for results in scored] == retriever.retrieve(["cat", "oak"], top_k=3)
+    assert all(scores == sorted(scores, reverse=True) for scores in [[s for _, s in r] for r in scored])
+
+
+def test_cascade_sends_only_uncertain_candidates_to_the_llm():
+    terms, types = ["cat", "oak", "wild cat"], ["animal", "plant", "vehicle"]
+    scorer = retriever_learner()
+    scorer.return_scores = True
+    scorer.fit(types, task="term-typing", ontologizer=False)
+    scores = {(record["term"], type): score
+              for record in scorer.predict(terms, task="term-typing", ontologizer=False)
+              for type, score in zip(record["types"], record["scores"])}
+    ranked = sorted(scores.values())
+    accept_above, reject_below = ranked[-2], ranked[2]
+
+    learner, shared = keyword_learner(), retriever_learner()
+    rag = AutoRAGLearner(retriever=shared, llm=learner, accept_above=accept_above, reject_below=reject_below)
+    rag.fit(types, task="term-typing", ontologizer=False)
+    predictions = rag.predict(terms, task="term-typing", ontologizer=False)
+    # the cascade asks for scores per call and leaves the shared retriever learner as it was
+    assert shared.return_scores is False
+    assert "scores" not in shared.predict(terms, task="term-typing", ontologizer=False)[0]
+
+    def expected_accept(term, type):
+        if scores[(term, type)] >= accept_above:
+            return True
+        return scores[(term, type)] >= reject_below and "cat" in term.split()
+
+    assert predictions == [{"term": term, "types": [type for (t, type) in scores if t == term and expected_accept(t, type)]}
+                           for term in terms]
+    stats = rag.cascade_stats
+    assert (stats["candidates"], stats["accepted"], stats["rejected"], stats["llm"]) == (9, 2, 2, 5)
+    assert learner.llm.model.calls == 3  # 5 band prompts in batches of 2
+    assert stats["retriever_seconds"] >= 0 and stats["llm_seconds"] >= 0
+
+
+def test_cascade_taxonomy_discovery_and_validation():
+    types = ["cat", "dog", "oak", "car"]
+    rag = AutoRAGLearner(retriever=retriever_learner(top_k=2), llm=keyword_learner(), accept_above=2.0)
+    pairs = rag.predict(types, task="taxonomy-discovery", ontologizer=False)
+    # no cosine similarity reaches 2.0, so every candidate went to the LLM
+    assert rag.cascade_stats["llm"] == rag.cascade_stats["candidates"] > 0
+    assert pairs and all("cat" in (pair["parent"], pair["child"]) for pair in pairs)
+    with pytest.raises(ValueError):
+        AutoRAGLearner(retriever=retriever_learner(), llm=keyword_learner(), accept_above=0.1, reject_below=0.5)
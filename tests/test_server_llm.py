@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ontolearner.learner import AutoLLMLearner, LabelMapper, ServerLLM, StandardizedPrompting
+from ontolearner.utils.completion_cache import disable_completion_cache, enable_completion_cache
+
+
+def answer(prompt):
+    return " yes" if "cat" in prompt else " no"
+
+
+class StubServer:
+    """Local OpenAI-compatible completions/chat server answering "yes" for prompts mentioning a cat."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.requests = []
+        self.failures = failures
+        self.delay = delay
+        self.in_flight = self.max_in_flight = 0
+        lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with lock:
+                    stub.requests.append((self.path, body))
+                    failed = stub.failures > 0
+                    stub.failures -= failed
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.delay)
+                with lock:
+                    stub.in_flight -= 1
+                if failed:
+                    return self.reply(500, {"error": {"message": "overloaded"}})
+                if self.path.endswith("/chat/completions"):
+                    content = answer(body["messages"][-1]["content"]).strip()
+                    choices = [{"index": 0, "finish_reason": "stop",
+                                "message": {"role": "assistant", "content": content}}]
+                    return self.reply(200, {"id": "stub", "object": "chat.completion", "created": 0,
+                                            "model": body["model"], "choices": choices})
+                prompts = body["prompt"] if isinstance(body["prompt"], list) else [body["prompt"]]
+                # answer in reverse order, the client must sort the choices by index
+                choices = [{"index": i, "text": answer(p), "finish_reason": "stop", "logprobs": None}
+                           for i, p in reversed(list(enumerate(prompts)))]
+                self.reply(200, {"id": "stub", "object": "text_completion", "created": 0,
+                                 "model": body["model"], "choices": choices})
+
+            def reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer(delay=0.05)
+    yield server
+    server.close()
+
+
+def make_llm(stub, **kwargs):
+    llm = ServerLLM(label_mapper=LabelMapper(), base_url=stub.base_url, backoff_base=0.01, **kwargs)
+    llm.load("stub-model")
+    return llm
+
+
+def test_completions_are_batched_and_concurrent(stub):
+    llm = make_llm(stub, max_concurrency=4, prompts_per_request=8)
+    prompts = [f"{'cat' if i % 3 == 0 else 'car'} {i}" for i in range(20)]
+    assert llm.complete(prompts) == [answer(p).strip() for p in prompts]
+    # concurrent requests may reach the server in any order
+    assert sorted(len(body["prompt"]) for _, body in stub.requests) == [4, 8, 8]
+    assert 1 < stub.max_in_flight <= 3
+    assert all(body["temperature"] == 0.0 and body["model"] == "stub-model" for _, body in stub.requests)
+    llm.close()
+
+
+def test_chat_api_sends_one_message_per_request(stub):
+    llm = make_llm(stub, api="chat", max_concurrency=2)
+    assert llm.complete(["a cat", "a car", "another cat"]) == ["yes", "no", "yes"]
+    assert len(stub.requests) == 3 and stub.max_in_flight == 2
+    assert all(path.endswith("/chat/completions") for path, _ in stub.requests)
+    llm.close()
+
+
+def test_server_errors_are_retried():
+    server = StubServer(failures=2)
+    try:
+        llm = make_llm(server, max_retries=2)
+        assert llm.complete(["cat"]) == ["yes"]
+        assert len(server.requests) == 3
+        server.failures = 5
+        with pytest.raises(Exception):
+            llm.complete(["car"])
+        llm.close()
+    finally:
+        server.close()
+
+
+def test_learner_with_server_llm_and_completion_cache(stub, tmp_path):
+    cache = enable_completion_cache(tmp_path / "completions.sqlite")
+    try:
+        learner = AutoLLMLearner(prompting=StandardizedPrompting, label_mapper=LabelMapper(),
+                                 llm=partial(ServerLLM, base_url=stub.base_url), batch_size=4)
+        learner.load(model_id="stub-model")
+        learner._term_typing(["animal", "vehicle"])
+        predictions = learner._term_typing(["cat", "car"], test=True)
+        assert predictions == [{"term": "cat", "types": ["animal", "vehicle"]}, {"term": "car", "types": []}]
+        requests = len(stub.requests)
+        assert learner._term_typing(["cat", "car"], test=True) == predictions
+        assert len(stub.requests) == requests and cache.info()["hits"] == 4
+        learner.llm.close()
+    finally:
+        disable_completion_cache()
@@ -0,0 +1,53 @@
+import torch
+from tokenizers import decoders, pre_tokenizers
+from transformers import LlamaConfig, LlamaForCausalLM, StoppingCriteriaList
+
+from ontolearner.utils.structured_output import JsonScanner, JsonStoppingCriteria, parse_json_value
+
+from test_prompt_compiler import bpe_tokenizer
+
+
+def test_scanner_reads_the_first_complete_value():
+    scanner = JsonScanner()
+    pieces = ['Sure! ```json\n{"terms": ["a]', '", "it\'s \\"b\\""', ', "{c}"]}\n``` trailing {"x": 1}']
+    assert [scanner.feed(piece) for piece in pieces] == [False, False, True]
+    assert scanner.value == {"terms": ["a]", 'it\'s "b"', "{c}"]}
+    assert scanner.text[scanner.span[0]:scanner.span[1]].startswith('{"terms"')
+    assert parse_json_value("Types: ['cat', \"dog's\"]", types=(list,)) == ["cat", "dog's"]
+    # values that do not parse or have another type are skipped
+    assert parse_json_value("[PAIR]\ncat\n[PAIR]\n[{'parent': 'animal', 'child': 'cat'}]", types=(list,)) == \
+        [{"parent": "animal", "child": "cat"}]
+    assert parse_json_value('{"a": [1}] then [1, 2]') == [1, 2]
+    assert parse_json_value('["no"] {"terms": []}', types=(dict,)) == {"terms": []}
+    assert parse_json_value('{"text": "two\nlines"}') == {"text": "two\nlines"}
+    assert parse_json_value('["cut off') is None and parse_json_value(None) is None
+
+
+def test_generation_stops_per_sequence_after_the_value():
+    tokenizer = bpe_tokenizer(pre_tokenizers.ByteLevel(add_prefix_space=False))
+    tokenizer.backend_tokenizer.decoder = decoders.ByteLevel()
+    torch.manual_seed(0)
+    config = LlamaConfig(vocab_size=len(tokenizer), hidden_size=32, num_hidden_layers=2, num_attention_heads=4,
+                         num_key_value_heads=4, intermediate_size=64, pad_token_id=tokenizer.pad_token_id,
+                         bos_token_id=tokenizer.bos_token_id, eos_token_id=tokenizer.eos_token_id)
+    model = LlamaForCausalLM(config).eval()
+    answers = ['["cat", "dog"] and some more text after the answer',
+               'The answer is {"types": ["animal", "plant ]"]} and more text']
+    scripts = [tokenizer.encode(answer, add_special_tokens=False) for answer in answers]
+    encoded = tokenizer(["Term: cat\nTypes:", "Term: oak tree\nTypes:"], return_tensors="pt", padding=True)
+    prompt_length = encoded["input_ids"].shape[1]
+
+    def scripted(batch_id, input_ids):
+        step = len(input_ids) - prompt_length
+        script = scripts[batch_id]
+        return [script[step] if step < len(script) else tokenizer.eos_token_id]
+
+    criteria = JsonStoppingCriteria(tokenizer, prompt_length)
+    outputs = model.generate(**encoded, max_new_tokens=max(map(len, scripts)) + 1, do_sample=False,
+                             prefix_allowed_tokens_fn=scripted, pad_token_id=tokenizer.pad_token_id,
+                             stopping_criteria=StoppingCriteriaList([criteria]))
+    completions = tokenizer.batch_decode(outputs[:, prompt_length:], skip_special_tokens=True)
+    assert [completion.strip() for completion in completions] == \
+        ['["cat", "dog"]', 'The answer is {"types": ["animal", "plant ]"]}']
+    assert [scanner.value for scanner in criteria.scanners] == [["cat", "dog"], {"types": ["animal", "plant ]"]}]
+    assert outputs.shape[1] - prompt_length < max(map(len, scripts))
@@ -6,6 +6,7 @@ from ontolearner.learner.retriever.embedding import (
     Word2VecRetriever,
     GloveRetriever,
 )
+from ontolearner.learner.retriever.vector_store import MemmapKeyedVectors
 
 
 # -------------------------
@@ -88,3 +89,66 @@ def test_glove_encode_single(mock_glove_model):
 
     vec = r._encode_text("world")
     assert np.allclose(vec, np.array([4, 5, 6]))
+
+
+# -------------------------
+# Batch encoding tests
+# -------------------------
+
+def test_w2v_encode_batch_matches_mean(mock_w2v_model):
+    r = Word2VecRetriever()
+    r.embedding_model = mock_w2v_model
+
+    vecs = r._encode_texts(["hello world", "hello hello", "unknown text"])
+    assert vecs.shape == (3, 3)
+    assert np.allclose(vecs[0], [2.5, 3.5, 4.5])
+    assert np.allclose(vecs[1], [1, 2, 3])
+    assert np.allclose(vecs[2], 0.0)
+
+
+def test_glove_retrieve_orders_by_similarity(mock_glove_model):
+    r = GloveRetriever()
+    r.embedding_model = mock_glove_model
+
+    docs = ["hello", "world", "hello world", "nothing here"]
+    r.index(docs)
+
+    results = r.retrieve(["world", "hello"], top_k=3)
+    assert results[0][0] == "world"
+    assert results[1][0] == "hello"
+    assert all(len(row) == 3 for row in results)
+
+
+# -------------------------
+# Memory-mapped vector store tests
+# -------------------------
+
+def test_glove_binary_store_roundtrip(tmp_path):
+    glove_file = tmp_path / "glove.txt"
+    glove_file.write_text("hello 1.0 2.0 3.0\nworld 4.0 5.0 6.0\n", encoding="utf8")
+    store_dir = tmp_path / "store"
+
+    r = GloveRetriever()
+    r.load(str(glove_file), cache_dir=str(store_dir), dtype="float16")
+    assert MemmapKeyedVectors.is_store(store_dir)
+    assert r.embedding_model.vectors.dtype == np.float16
+    assert np.allclose(r._encode_text("hello world"), [2.5, 3.5, 4.5])
+
+    # A second load opens the store directly, even if the text file is gone.
+    glove_file.unlink()
+    r2 = GloveRetriever()
+    r2.load(str(store_dir))
+    r2.index(["hello", "world"])
+    assert r2.retrieve(["world"], top_k=1) == [["world"]]
+
+
+def test_store_keeps_carriage_returns_in_words(tmp_path):
+    glove_file = tmp_path / "glove.txt"
+    glove_file.write_bytes("a\rb 1.0 0.0\nworld 0.0 1.0\n".encode("utf8"))
+    store = MemmapKeyedVectors.from_glove(str(glove_file), tmp_path / "store")
+    assert store.index_to_key == ["a\rb", "world"]
+    assert np.allclose(store["world"], [0.0, 1.0])
+
+    (tmp_path / "store" / MemmapKeyedVectors.VOCAB_FILE).write_text("a\nb\nworld", encoding="utf8")
+    with pytest.raises(ValueError, match="inconsistent"):
+        MemmapKeyedVectors(tmp_path / "store")